@@ -0,0 +1,98 @@
+"""Compares the parsing of a bulk import by a pool of threads and by a pool of processes (see customWorkers.ImportWorker).
+
+The files are generated in a temporary directory, parsed by an ImportWorker in each mode and written one by one in an HDF5 file by the main thread, as in MainWindow.add_data. Two kinds of files are used:
+    - "npy": arrays of 128x128 floats loaded by HDF5_BLS.load_data.load_general, the parsing being mostly I/O
+    - "text": spectra of 2048 points stored as text and parsed in Python, the parsing being limited by the GIL
+
+Usage: python benchmarks/import_workers.py [--files 1000 10000] [--kinds npy text] [--workers N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import h5py
+import numpy as np
+from PySide6 import QtCore as qtc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from customWorkers import ImportWorker
+
+def load_text_spectrum(filepath):
+    """Parses a text spectrum line by line, the way the text loaders of HDF5_BLS do.
+    """
+    with open(filepath) as file:
+        values = [[float(v) for v in line.split()] for line in file]
+    data = np.array(values)
+    return {"Raw_data": {"Name": "Raw_data", "Data": data},
+            "Attributes": {"FILEPROP.Name": os.path.splitext(os.path.basename(filepath))[0]}}
+
+def load_npy(filepath):
+    from HDF5_BLS import load_data
+    return load_data.load_general(filepath)
+
+def make_files(directory, kind, n_files):
+    rng = np.random.default_rng(0)
+    filepaths = []
+    for i in range(n_files):
+        if kind == "npy":
+            filepath = os.path.join(directory, f"spectrum_{i}.npy")
+            np.save(filepath, rng.random((128, 128)))
+        else:
+            filepath = os.path.join(directory, f"spectrum_{i}.txt")
+            np.savetxt(filepath, np.column_stack((np.linspace(-10, 10, 2048), rng.random(2048))))
+        filepaths.append(filepath)
+    return filepaths
+
+def run_import(filepaths, load, processes, max_workers, h5_filepath):
+    """Imports the files with an ImportWorker and returns the time taken and the number of files written.
+    """
+    n_written = 0
+    with h5py.File(h5_filepath, "w") as file:
+        def write(i, filepath, dic):
+            nonlocal n_written
+            file.create_dataset(f"Data_{i}", data = dic["Raw_data"]["Data"])
+            n_written += 1
+            importer.written()
+
+        def fail(i, filepath, error):
+            print(f"{filepath}: {error}")
+            importer.written()
+
+        start = time.perf_counter()
+        importer = ImportWorker(filepaths, load, max_workers = max_workers, processes = processes)
+        importer.parsed.connect(write)
+        importer.failed.connect(fail)
+        loop = qtc.QEventLoop()
+        importer.finished.connect(loop.quit)
+        importer.start()
+        loop.exec()
+        return time.perf_counter() - start, n_written
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--files", type = int, nargs = "+", default = [1000, 10000])
+    parser.add_argument("--kinds", nargs = "+", choices = ["npy", "text"], default = ["npy", "text"])
+    parser.add_argument("--workers", type = int, default = os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    app = qtc.QCoreApplication(sys.argv)
+    print(f"{args.workers} workers")
+    print(f"{'kind':>6} {'files':>7} {'threads (s)':>12} {'processes (s)':>14} {'speedup':>8}")
+    for kind in args.kinds:
+        load = load_npy if kind == "npy" else load_text_spectrum
+        for n_files in args.files:
+            with tempfile.TemporaryDirectory() as directory:
+                filepaths = make_files(directory, kind, n_files)
+                h5_filepath = os.path.join(directory, "import.h5")
+                times = []
+                for processes in (False, True):
+                    duration, n_written = run_import(filepaths, load, processes, args.workers, h5_filepath)
+                    assert n_written == n_files
+                    times.append(duration)
+            print(f"{kind:>6} {n_files:>7} {times[0]:>12.2f} {times[1]:>14.2f} {times[0] / times[1]:>8.2f}")
+
+if __name__ == "__main__":
+    main()
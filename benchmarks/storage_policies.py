@@ -0,0 +1,79 @@
+"""Reports the write and read throughput of the storage policies (see storagePolicy.StoragePolicy) on a map of spectra.
+
+For each preset, the map is written with the chunks of each layout, then read spectrum by spectrum (as in the treatment) and image by image (as when displaying a map at a given frequency). The throughputs are given in MB/s of uncompressed data, with the size of the file.
+
+Usage: python benchmarks/storage_policies.py [--shape 64 64 512] [--presets none fast balanced compact] [--layouts spectra images tiles] [--chunk-size BYTES]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from storagePolicy import PRESETS, StoragePolicy
+
+def make_map(shape):
+    """Returns a map of noisy Lorentzian spectra, compressible like real data.
+    """
+    rng = np.random.default_rng(0)
+    frequency = np.linspace(-10, 10, shape[-1])
+    shift = 5 + 0.1 * rng.standard_normal(shape[:-1] + (1,))
+    spectra = 1 / (1 + ((np.abs(frequency) - shift) / 0.3) ** 2)
+    return (1000 * spectra + rng.poisson(10, shape)).astype(np.float32)
+
+def benchmark(policy, layout, data, directory, chunk_size = None, n_reads = 256):
+    """Writes and reads the map with a policy and returns the throughputs (MB/s) and the size of the file (MB).
+    """
+    parameters = {**policy.to_dict(), "layouts": {"*": layout}}
+    if chunk_size is not None:
+        parameters["chunk_size"] = chunk_size
+    policy = StoragePolicy.from_dict(parameters)
+    filepath = os.path.join(directory, f"{policy.name}_{layout}.h5")
+    size = data.nbytes / 1e6
+
+    start = time.perf_counter()
+    with h5py.File(filepath, "w") as file:
+        file.create_dataset("PSD", data = data, **policy.dataset_options("PSD", data.shape, data.dtype))
+    write = size / (time.perf_counter() - start)
+
+    rng = np.random.default_rng(1)
+    spectra = [tuple(rng.integers(0, n) for n in data.shape[:-1]) for _ in range(n_reads)]
+    planes = rng.integers(0, data.shape[-1], min(n_reads // 16, data.shape[-1]))
+    with h5py.File(filepath, "r") as file:
+        dataset = file["PSD"]
+        start = time.perf_counter()
+        for index in spectra:
+            dataset[index]
+        read_spectra = n_reads * data.shape[-1] * data.itemsize / 1e6 / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for plane in planes:
+            dataset[..., plane]
+        read_images = len(planes) * data[..., 0].nbytes / 1e6 / (time.perf_counter() - start)
+    return write, read_spectra, read_images, os.path.getsize(filepath) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--shape", type = int, nargs = "+", default = [64, 64, 512])
+    parser.add_argument("--presets", nargs = "+", choices = list(PRESETS), default = list(PRESETS))
+    parser.add_argument("--layouts", nargs = "+", choices = ["spectra", "images", "tiles"], default = ["spectra", "images", "tiles"])
+    parser.add_argument("--chunk-size", type = int, default = None, help = "target size of the chunks in bytes, by default the one of each preset")
+    args = parser.parse_args()
+
+    data = make_map(tuple(args.shape))
+    print(f"Map of shape {data.shape} ({data.nbytes / 1e6:.1f} MB)")
+    print(f"{'preset':>9} {'layout':>8} {'write':>9} {'spectra':>9} {'images':>9} {'size (MB)':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for preset in args.presets:
+            # The "none" preset is only measured once as it does not chunk the datasets
+            layouts = ["contiguous"] if preset == "none" else args.layouts
+            for layout in layouts:
+                write, read_spectra, read_images, size = benchmark(PRESETS[preset], layout, data, directory, args.chunk_size)
+                print(f"{preset:>9} {layout:>8} {write:>9.1f} {read_spectra:>9.1f} {read_images:>9.1f} {size:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Reports the peak memory and the throughput of the import of a large .npy file, loaded as a whole and streamed (see streamedData.load_streamed).
+
+The file is written in a temporary directory and imported in a new HDF5 file by a BatchWriter, as in MainWindow.add_data, with a preset of the storage policies ("balanced" by default): once loaded in memory by HDF5_BLS.load_data.load_general and once loaded by load_streamed, the writer then reading it by blocks of frames. The peak memory is the one allocated by Python and numpy (tracemalloc).
+
+Usage: python benchmarks/streamed_import.py [--shape 512 256 256] [--block-size BYTES] [--preset balanced]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import h5py
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from HDF5_BLS import load_data
+from HDF5_BLS.wrapper import Wrapper
+
+from storagePolicy import PRESETS
+from streamedData import load_streamed
+from wrapperIndex import WrapperIndex
+from wrapperWriter import BatchWriter
+
+def run_import(filepath, h5_filepath, load, policy, block_size):
+    """Loads a file and writes it in a new HDF5 file with a BatchWriter, and returns the duration of the import.
+    """
+    wrapper = Wrapper(filepath = h5_filepath)
+    writer = BatchWriter(wrapper, WrapperIndex(wrapper), policy = policy)
+    writer.STREAM_BLOCK_SIZE = block_size
+    start = time.perf_counter()
+    writer.add(filepath, load(filepath), "Brillouin", "frames")
+    _, failed = writer.flush()
+    duration = time.perf_counter() - start
+    if failed:
+        raise RuntimeError(f"The file could not be imported: {failed[0][1]}")
+    with h5py.File(h5_filepath, "r") as file:
+        assert file["Brillouin/frames/Raw_data"].shape == np.load(filepath, mmap_mode = "r").shape
+    return duration
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--shape", type = int, nargs = "+", default = [512, 256, 256])
+    parser.add_argument("--block-size", type = int, default = BatchWriter.STREAM_BLOCK_SIZE, help = "size in bytes of the blocks of frames of the streamed import")
+    parser.add_argument("--preset", choices = list(PRESETS), default = "balanced", help = "storage policy of the imported dataset")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, "frames.npy")
+        data = np.lib.format.open_memmap(filepath, mode = "w+", dtype = np.float32, shape = tuple(args.shape))
+        for i in range(len(data)):
+            data[i] = np.random.default_rng(i).poisson(100, data.shape[1:])
+        size = data.nbytes / 1e6
+        del data
+        print(f"File of shape {tuple(args.shape)} ({size:.1f} MB), {args.preset} storage policy")
+        print(f"{'loader':>9} {'peak (MB)':>10} {'MB/s':>9}")
+        for name, load in (("numpy", load_data.load_general), ("streamed", load_streamed)):
+            tracemalloc.start()
+            duration = run_import(filepath, os.path.join(directory, f"{name}.h5"), load, PRESETS[args.preset], args.block_size)
+            peak = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            print(f"{name:>9} {peak:>10.1f} {size / duration:>9.1f}")
+
+if __name__ == "__main__":
+    main()
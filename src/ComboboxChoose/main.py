@@ -10,6 +10,7 @@ class ComboboxChoose(qtw.QDialog, Ui_Dialog):
         self.setupUi(self)
 
         self.l_Text.setText(text)
+        self.options_layout = None
 
         if element_italic is None:
             element_italic = [False for i in range(len(list_choices))]
@@ -23,7 +24,53 @@ class ComboboxChoose(qtw.QDialog, Ui_Dialog):
                 self.cb_Structure.setItemData(i, font, qtc.Qt.FontRole)
             i+=1
 
+    def set_choice(self, choice, label = None):
+        """Adds a choice to the combobox, or updates its label if it is already in the combobox.
+
+        Parameters
+        ----------
+        choice : str
+            The choice, returned by get_selected_structure when it is selected.
+        label : str, optional
+            The text displayed for the choice, by default the choice itself.
+        """
+        if label is None:
+            label = choice
+        i = self.cb_Structure.findData(choice)
+        if i == -1:
+            self.cb_Structure.addItem(label, choice)
+        else:
+            self.cb_Structure.setItemText(i, label)
+
+    def add_option(self, text, checked = False):
+        """Adds a check box under the combobox, for an option of the choice.
+
+        Parameters
+        ----------
+        text : str
+            The text of the check box.
+        checked : bool, optional
+            Whether the check box is checked at first. Default is False.
+
+        Returns
+        -------
+        QCheckBox
+            The check box, whose state gives the option.
+        """
+        # The options take the place of the spacer between the combobox and the buttons
+        if self.options_layout is None:
+            self.gridLayout.removeItem(self.verticalSpacer)
+            self.options_layout = qtw.QVBoxLayout()
+            self.gridLayout.addLayout(self.options_layout, 2, 0, 1, 2)
+        check_box = qtw.QCheckBox(text, self)
+        check_box.setChecked(checked)
+        self.options_layout.addWidget(check_box)
+        return check_box
+
     def get_selected_structure(self):
+        choice = self.cb_Structure.currentData()
+        if choice is not None:
+            return choice
         return self.cb_Structure.currentText()
 
         
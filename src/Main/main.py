@@ -1,11 +1,13 @@
 import sys
 import os
+import time
 from PySide6 import QtCore as qtc
 from PySide6 import QtWidgets as qtw
 from PySide6 import QtGui as qtg
 import h5py
 import pyperclip
 import json
+from functools import partial
 from inspect import getmembers, isfunction
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
@@ -16,29 +18,25 @@ from ParameterWindow.main import ParameterWindow
 from ProgressBar.main import ProgressBar
 from TreatWindow.main import TreatWindow
 from customWidgets import CheckableComboBox
+from customModels import HDF5TreeModel, HDF5FilterProxyModel
+from customWorkers import StructureScanner, ImportWorker, DirectoryIndexer, FolderImporter, DatasetConsolidator, FileSaver, SwmrWriter, source_fingerprint, same_content, load_source
+from wrapperIndex import WrapperIndex, file_key, SOURCE_FINGERPRINT
+from searchIndex import SearchIndex
+from wrapperWriter import BatchWriter, SpectrumStacker, mount_hdf5, materialize, combine_virtual, is_virtual, sync_file, estimate_wasted_space, preserve_scales, is_repack_worthwhile, DIMENSION_SCALE_ATTRIBUTES
+from storagePolicy import StoragePolicy, PRESETS
+from streamedData import load_streamed
+from loaderCache import LoaderCache, sniff_creator
+from userSettings import UserSettings
+from sessionJournal import SessionJournal, JOURNALS_DIRNAME, JOURNALED_METHODS, session_state, replay
 
 from HDF5_BLS.load_formats.errors import LoadError_creator, LoadError_parameters
-from HDF5_BLS import wrapper, load_data, conversion_PSD, WrapperError_Save, WrapperError_Overwrite, WrapperError_ArgumentType
+from HDF5_BLS import wrapper, conversion_PSD, WrapperError_Save, WrapperError_Overwrite, WrapperError_ArgumentType
+from HDF5_BLS.wrapper import is_tempfile
 import conversion_ui, treat_ui
 
 current_dir = os.path.abspath(os.path.dirname(__file__))
-
-class MyStandardItemModel(qtg.QStandardItemModel):
-    def mimeData(self, indexes):
-        mime_data = super().mimeData(indexes)
-        if indexes:
-            item = self.itemFromIndex(indexes[0])
-            if item:
-                path = self.get_item_path(item)
-                mime_data.setData("application/x-brillouin-path", path.encode("utf-8"))
-        return mime_data
-
-    def get_item_path(self, item):
-        path = [item.text()]
-        while item.parent():
-            item = item.parent()
-            path.insert(0, item.text())
-        return "/".join(path)
+cache_dir = os.path.join(qtc.QStandardPaths.writableLocation(qtc.QStandardPaths.GenericCacheLocation), "HDF5_BLS_GUI")
+config_dir = os.path.join(qtc.QStandardPaths.writableLocation(qtc.QStandardPaths.GenericConfigLocation), "HDF5_BLS_GUI")
 
 class MainWindow(qtw.QMainWindow, Ui_w_Main):
     """Main window class for the HDF5_BLS GUI application.
@@ -48,24 +46,63 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
     Attributes
         wrapper : wrapper.Wrapper or None
             The HDF5 wrapper object used to manage HDF5 files.
+        wrapper_index : WrapperIndex or None
+            The in-memory index of the structure of the wrapper, used for all the lookups of types, children and main attributes.
         hover_timer : qtc.QTimer
             Timer to measure the time spent when dragging an item into the table.
-        current_hover_index : QModelIndex or None
-            Index of the current item being hovered over in the tree view.
+        search_index : SearchIndex or None
+            The inverted index used to search the tree view, created at the first search.
+        proxy_model : HDF5FilterProxyModel
+            The proxy model between the tree model and the tree view, filtering the elements with the results of the search.
+        scanner : StructureScanner or None
+            The worker reading the structure of the opened file in the background, None if no scan is running.
+        scan_thread : qtc.QThread or None
+            The thread of the scanner.
+        folder_importer : FolderImporter or None
+            The importer of the watched folder, None if no folder is watched.
+        consolidator : DatasetConsolidator or None
+            The worker copying the data of a virtual dataset into a regular dataset, None if no consolidation is running.
+        saver : FileSaver or None
+            The worker copying the file to the location chosen with "Save As", None if no save is running. The file cannot be modified during the save.
+        swmr : SwmrWriter or None
+            The writer keeping the opened file open in SWMR mode, so that other processes can read it while it is written. None if the SWMR mode is disabled.
+        current_hover_path : str or None
+            Path of the current item being hovered over in the tree view.
         treeview_selected : str or None
             Path of the currently selected item in the tree view.
         filepath : str or None
             Path to the currently opened HDF5 file.
         file_changed : bool
             Whether the wrapper has had changes or not since last save.
+        loader_cache : LoaderCache
+            The creator and parameters used to load the files of each directory and extension, so that they are not asked again.
+        settings : UserSettings
+            The options chosen by the user in the menus, kept from one session to the next.
+        journal : SessionJournal or None
+            The journal of the operations made on the opened file, used to recover the session if it ends unexpectedly. None if the journal could not be created.
     """
 
     wrapper = None
-    current_hover_index = None
+    wrapper_index = None
+    search_index = None
+    proxy_model = None
+    scanner = None
+    scan_thread = None
+    folder_importer = None
+    consolidator = None
+    saver = None
+    swmr = None
+    journal = None
+    current_hover_path = None
     treeview_selected = "Brillouin"
     filepath = None
     file_changed = False
 
+    # Maximal number of results of a search displayed in the tree view
+    MAX_SEARCH_RESULTS = 1000
+    # Whether the files of a bulk import are parsed by a pool of processes rather than a pool of threads by default (see customWorkers.ImportWorker), the choice of the user being stored in its settings (see set_import_processes). Processes are faster for the loaders limited by the GIL but are slower to start (see customWorkers.ImportWorker)
+    IMPORT_PROCESSES = False
+
     def __init__(self):
         def initialize_buttons(self):
             self.b_NewHDF5.clicked.connect(self.new_hdf5)
@@ -92,21 +129,91 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             self.a_Save.triggered.connect(self.save_hdf5)
             self.a_SaveFileAs.triggered.connect(lambda: self.save_hdf5(saveas=True))
             self.a_AddData.triggered.connect(self.add_data)
+            # Live reading of the file by other processes (SWMR mode), placed after the saves in the File menu
+            self.a_Swmr = qtg.QAction("Live reading (SWMR)", self)
+            self.a_Swmr.setCheckable(True)
+            self.a_Swmr.setToolTip("Keeps the file open in SWMR mode so that scripts can read it while it is written")
+            actions = self.menuFile.actions()
+            self.menuFile.insertAction(actions[actions.index(self.a_SaveFileAs) + 1], self.a_Swmr)
+            self.a_Swmr.triggered.connect(self.set_swmr)
+            # Watching a folder, placed after the addition of files in the File menu
+            self.a_WatchFolder = qtg.QAction("Watch folder", self)
+            self.a_WatchFolder.setToolTip("Import the files written in a folder into the selected group while they are written")
+            actions = self.menuFile.actions()
+            self.menuFile.insertAction(actions[actions.index(self.a_AddData) + 1], self.a_WatchFolder)
+            self.a_WatchFolder.triggered.connect(lambda: self.watch_folder())
+            # Forgetting the loaders remembered for the files of a folder, placed after the folder watch in the File menu
+            self.a_ForgetLoaders = qtg.QAction("Forget the loaders of a folder", self)
+            self.a_ForgetLoaders.setToolTip("Forget how the files of a folder were loaded, the loader being asked again for the next files added")
+            actions = self.menuFile.actions()
+            self.menuFile.insertAction(actions[actions.index(self.a_WatchFolder) + 1], self.a_ForgetLoaders)
+            self.a_ForgetLoaders.triggered.connect(lambda: self.forget_loaders())
+            # Parsing the files of the bulk imports in processes, placed after the loaders in the File menu
+            self.a_ImportProcesses = qtg.QAction("Import with processes", self)
+            self.a_ImportProcesses.setCheckable(True)
+            self.a_ImportProcesses.setToolTip("Parse the imported files in separate processes: faster for the slow text formats, but the processes are slower to start")
+            actions = self.menuFile.actions()
+            self.menuFile.insertAction(actions[actions.index(self.a_ForgetLoaders) + 1], self.a_ImportProcesses)
+            self.a_ImportProcesses.triggered.connect(self.set_import_processes)
             self.a_ConvertCSV.triggered.connect(self.convert_csv)
 
             # Action menu
             self.a_RenameElement.triggered.connect(self.rename_element) 
             self.a_RepackHDF5.triggered.connect(self.repack)
+            self.a_Materialize = qtg.QAction("Materialize mounted files", self)
+            self.a_Materialize.setToolTip("Copy the data of all the mounted HDF5 files in the opened file")
+            self.menuEdit.insertAction(self.a_RepackHDF5, self.a_Materialize)
+            self.a_Materialize.triggered.connect(lambda: self.materialize_files(self.wrapper_index.get_mounts()))
             self.a_ExportPython.triggered.connect(self.export_code_line)
             self.a_Apply_Treatment.triggered.connect(self.get_treatment)
             self.a_Get_PSD.triggered.connect(self.get_PSD)
             self.a_ExportImage.triggered.connect(self.export_image)
 
+        def initialize_statusbar(self):
+            # Button to cancel the background scan of the structure of the file, only displayed during the scan
+            self.b_CancelScan = qtw.QPushButton("Cancel scan")
+            self.b_CancelScan.setToolTip("Stop reading the structure of the file in the background, the groups will be read when they are expanded")
+            self.b_CancelScan.clicked.connect(self.stop_structure_scan)
+            self.b_CancelScan.hide()
+            self.statusbar.addPermanentWidget(self.b_CancelScan)
+
+            # Button to stop watching a folder, only displayed while a folder is watched
+            self.b_StopWatch = qtw.QPushButton("Stop watching")
+            self.b_StopWatch.setToolTip("Stop importing the new files of the watched folder")
+            self.b_StopWatch.clicked.connect(self.stop_folder_watch)
+            self.b_StopWatch.hide()
+            self.statusbar.addPermanentWidget(self.b_StopWatch)
+
+            # Button to cancel the consolidation of a virtual dataset, only displayed during the consolidation
+            self.b_CancelConsolidation = qtw.QPushButton("Cancel consolidation")
+            self.b_CancelConsolidation.setToolTip("Stop copying the data of the virtual dataset, the virtual dataset is kept")
+            self.b_CancelConsolidation.clicked.connect(self.stop_consolidation)
+            self.b_CancelConsolidation.hide()
+            self.statusbar.addPermanentWidget(self.b_CancelConsolidation)
+
+            # Progress of the background save, with the amount of data written and the throughput, and button to cancel it, only displayed during the save
+            self.pb_Save = qtw.QProgressBar()
+            self.pb_Save.setRange(0, 1000)
+            self.pb_Save.setMaximumWidth(300)
+            self.pb_Save.hide()
+            self.statusbar.addPermanentWidget(self.pb_Save)
+            self.b_CancelSave = qtw.QPushButton("Cancel save")
+            self.b_CancelSave.setToolTip("Stop the save, the file at the chosen location is left untouched")
+            self.b_CancelSave.clicked.connect(self.stop_save)
+            self.b_CancelSave.hide()
+            self.statusbar.addPermanentWidget(self.b_CancelSave)
+
         def initialize_timer(self):
             self.hover_timer = qtc.QTimer(self) 
             self.hover_timer.setSingleShot(True)
             self.hover_timer.timeout.connect(self.expand_on_hover)  # Connect to the expand function
 
+            # The tree view is updated at most once per interval while a folder is watched
+            self.folder_watch_timer = qtc.QTimer(self)
+            self.folder_watch_timer.setSingleShot(True)
+            self.folder_watch_timer.setInterval(500)
+            self.folder_watch_timer.timeout.connect(self.folder_watch_update)
+
         def initialize_tableview(self):   
             # Creates a model with 3 columns and sets it to the tableview.
             self.model_table_Measure = qtg.QStandardItemModel()
@@ -182,6 +289,23 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             self.treeView.customContextMenuRequested.connect(self.show_treeview_context_menu)
             self.treeView.expanded.connect(self.adjust_treeview_columns)
 
+            # Adds a search box above the tree view, the search is launched when the text has not been changed for a short time
+            self.le_Search = qtw.QLineEdit()
+            self.le_Search.setObjectName(u"le_Search")
+            self.le_Search.setPlaceholderText("Search (e.g. water, sample:water, date:2024, type:psd, SPECTROMETER.Type:vipa)")
+            self.le_Search.setClearButtonEnabled(True)
+            self.gridLayout_3.removeWidget(self.treeView)
+            self.gridLayout_3.removeWidget(self.tabWidget_Visualize)
+            self.gridLayout_3.addWidget(self.le_Search, 0, 0, 1, 1)
+            self.gridLayout_3.addWidget(self.treeView, 1, 0, 1, 1)
+            self.gridLayout_3.addWidget(self.tabWidget_Visualize, 0, 1, 2, 1)
+
+            self.search_timer = qtc.QTimer(self)
+            self.search_timer.setSingleShot(True)
+            self.search_timer.setInterval(150)
+            self.search_timer.timeout.connect(self.search_treeview)
+            self.le_Search.textChanged.connect(lambda text: self.search_timer.start())
+
         super().__init__()
         self.setupUi(self)
     
@@ -191,6 +315,9 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         # Set the menu to functions
         initialize_menu(self)
 
+        # Set up the status bar
+        initialize_statusbar(self)
+
         # Set up the timer (used to develop elements in the treeview when dragging items into it)
         initialize_timer(self)
 
@@ -201,12 +328,23 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         initialize_tableview(self)
 
         self.wrapper = wrapper.Wrapper(filepath = None)
+        self.wrapper_index = WrapperIndex(self.wrapper)
         self.filepath = self.wrapper.filepath
         self.update_treeview()
 
+        # The loaders used for the files of each directory and the options of the menus, read from the configuration of the user
+        self.loader_cache = LoaderCache.from_config(config_dir)
+        self.settings = UserSettings.from_config(config_dir)
+        self.IMPORT_PROCESSES = self.settings.get("import_processes", self.IMPORT_PROCESSES)
+        self.a_ImportProcesses.setChecked(self.IMPORT_PROCESSES)
+
         # Initiates the log
         self.textBrowser_Log.setText("Welcome to a new HDF5_BLS GUI session")
 
+        # The operations made on the file are journaled, and the sessions that ended unexpectedly are proposed to be recovered once the window is shown
+        self.start_journal()
+        qtc.QTimer.singleShot(0, self.recover_session)
+
     @qtc.Slot()
     def activate_buttons(self):
         """
@@ -218,7 +356,7 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         """
         if self.wrapper is not None:
             self.b_AddData.setEnabled(True)
-            if len(self.wrapper.get_children_elements()) > 0:
+            if len(self.wrapper_index.get_children_elements()) > 0:
                 self.b_RemoveData.setEnabled(True)
                 self.b_ConvertCSV.setEnabled(True)
 
@@ -230,7 +368,7 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         -------
         None
         """
-        if len(self.wrapper.get_children_elements()) > 0:
+        if len(self.wrapper_index.get_children_elements()) > 0:
             self.a_RepackHDF5.setEnabled(True)
             self.a_RenameElement.setEnabled(True)
             self.a_ExportPython.setEnabled(True)
@@ -263,140 +401,103 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
                     self.wrapper = wrapper.Wrapper()
                 except WrapperError_Save:
                     if not self.handle_error_save(): return # If the user decides to cancel his action at this point, the function ends
+                self.stop_swmr()
+                self.a_Swmr.setChecked(False)
                 self.wrapper = wrapper.Wrapper()
+                self.wrapper_index = WrapperIndex(self.wrapper)
+                self.start_journal()
             elif dialog == qtw.QMessageBox.Cancel:
                 return
 
-        def create_group_data(group_dim, data, n_dim):
-            if len(group_dim) == 0:
-                return wrapper.Wrapper(data={"Raw_data": data},
-                                        attributes = {"FILEPROP.Name": "Data_0"})
-            elif len(group_dim) == 1:
-                dic = {}
-                for i in range(group_dim[0]): 
-                    dic["Data_"+str(i)] = wrapper.Wrapper(data={"Raw_data": data[i]},
-                                                          attributes = {"FILEPROP.Name": "Data_"+str(i)})
-                return  wrapper.Wrapper(data = dic)
-            else:
-                dic = {}
-                for i in range(group_dim[0]): 
-                    dic["Data_"+str(i)] = create_group_data(group_dim[1:], data[i], n_dim+1)
-                return wrapper.Wrapper(data = dic,
-                                      attributes = {"FILEPROP.Name": "Dimension_"+str(n_dim)})
-
-        def create_structure(dic, parent_path):
-            for key in dic.keys():
-                if "." in key:
-                    pass
-                else:
-                    self.wrapper.create_group(key, parent_group=parent_path)
-                    create_structure(dic[key], f"{parent_path}/{key}")
-
-        def get_dictionnary(file, creator = None, parameters = None):
-            # First we try adding the data based on the file extension
-            try: 
-                dic = load_data.load_general(file)
-            # If it does not work, it might be that the file extension is not supported, in that case display a warning window
-            except ValueError: 
-                qtw.QMessageBox.warning(self, "Warning", "The file extension is not supported.")
+        def index_batch(batch):
+            # Files found by the indexer: before the choice of the extension, they are counted by extension, after, the files with the chosen extension are added to the import
+            if extension is None:
+                for file, path_parent, ext in batch:
+                    found.setdefault(ext, []).append((file, path_parent))
+                for ext in {ext for _, _, ext in batch}:
+                    dialog.set_choice(ext, f"{ext} ({len(found[ext])} files)")
                 return
-            
-            # It can also be that there are different ways to load the data, in that case display a dialog box to choose the type of structure to load
-            except LoadError_creator as e: 
-                creator_list = e.creators 
-                dialog = ComboboxChoose(text = "Choose the type of structure to load", list_choices = creator_list, parent = self)
-                # If the user cancels the dialog box, we return
-                if dialog.exec_() == qtw.QDialog.Rejected:
-                    return
-                else:
-                    creator = dialog.get_selected_structure()
-                    # After choosing the type of structure, we try to load the data again by precising the structure
-                    try:
-                        dic = load_data.load_general(file, creator = creator)
-                    
-                    # If it does not work, this means that the user needs to indicate the parameters to load the data, so we load a window to do so
-                    except LoadError_parameters as e: 
-                        parameters = e.parameters
-                        dialog = ParameterWindow(text = f"Please indicate the value of the following parameters to load the data:",
-                                                list_parameters = parameters, 
-                                                parent = self,
-                                                root_path=os.path.dirname(file))
-                        if dialog.exec_() == qtw.QDialog.Accepted:
-                            parameters = dialog.get_selected_structure()
-                            dialog.close()
-                        else:
-                            dialog.close()
-                            return
-                        dic = load_data.load_general(file, creator, parameters)
-                    
-                    # If it still doesn't work, then there was a mistake while opening the file so print an error
-                    except Exception as e:
-                        qtw.QMessageBox.warning(self, "Error while adding the file: ", str(e))
-                        return
-            
-            # If it doesn't work, there was a mistake while opening the file so print an error
-            except Exception as e:
-                qtw.QMessageBox.warning(self, "Error while adding the file: ", str(e))
+            files = [(file, path_parent) for file, path_parent, ext in batch if ext == extension]
+            if not files:
                 return
-            return creator, parameters, dic
-
-        def get_extensions(filepath, extensions = []):
-            for f in filepath:
-                ext = os.path.splitext(f)[1]
-                if ext == "":
-                    files = os.listdir(f)
-                    if ".DS_Store" in files: files.remove(".DS_Store")
-                    get_extensions([f"{f}/{file}" for file in files], extensions)
-                else:
-                    if ext not in extensions:
-                        extensions.append(ext)
-            return extensions
-
-        def get_children_files_by_extension(filepath, extension, file = [], path_from_parent = [], parent = ""):
-            files = os.listdir(filepath)
-            if ".DS_Store" in files: files.remove(".DS_Store")
-            for f in files:
-                ext = os.path.splitext(f)[1]
-                if ext == extension:
-                    file.append(os.path.join(filepath, f))
-                    path_from_parent.append(parent)
-                elif ext == "":
-                    if ".DS_Store" in files: files.remove(".DS_Store")
-                    if parent != "":
-                        file, path_from_parent = get_children_files_by_extension(os.path.join(filepath, f), 
-                                                                                extension, 
-                                                                                file = file, 
-                                                                                path_from_parent= path_from_parent,
-                                                                                parent = f"{parent}/{f}")
-                    else:
-                        file, path_from_parent = get_children_files_by_extension(os.path.join(filepath, f), 
-                                                                                extension, 
-                                                                                file = file, 
-                                                                                path_from_parent= path_from_parent,
-                                                                                parent = f)
-            return file, path_from_parent
-
-        def update_progress():
-            nonlocal i
-            if i < len(filepath):
-                file, path_parent = filepath[i], path_from_parent[i]
-                dic = load_data.load_general(file, creator=creator, parameters=parameters)
-                name_group = os.path.basename(file).split(".")[0]
-                name_group = name_group.replace("  ", " ")
-                if path_parent == "":
-                    self.wrapper.add_dictionnary(dic, 
-                                                 parent_group=parent_path, 
-                                                 name_group=name_group)
-                else:
-                    self.wrapper.add_dictionnary(dic, 
-                                                 parent_group=f"{parent_path}/{path_parent}",
-                                                 name_group = name_group)
+            record_fingerprints(files)
+            path_from_parent.extend(path_parent for _, path_parent in files)
+            if importer is None:
+                filepath.extend(file for file, _ in files)
+            else:
+                importer.add_files([file for file, _ in files])
+
+        def index_progress(n_files, n_directories):
+            self.statusbar.showMessage(f"{n_files} files found in {n_directories} directories")
+
+        def index_finished(complete):
+            nonlocal scan_done
+            scan_done = True
+            if importer is not None:
+                importer.end_files()
+
+        def stop_indexer():
+            indexer.cancel()
+            indexer.wait()
+            indexer.batch_ready.disconnect()
+            indexer.finished.disconnect()
+            indexer.deleteLater()
+
+        def group_path(file, path_parent):
+            # Returns the parent group and the name of the group of a file
+            name_group = os.path.basename(file).split(".")[0]
+            name_group = name_group.replace("  ", " ")
+            if path_parent == "":
+                return parent_path, name_group
+            return f"{parent_path}/{path_parent}", name_group
+
+        def record_fingerprints(files):
+            # Gets the fingerprints of the files already imported in the group where they are imported, or in the table of the sources of the stacks of the import, so that the unchanged files are skipped and the modified ones replace their group or their row
+            nonlocal stacked_fingerprints
+            if isinstance(writer, SpectrumStacker) and stacked_fingerprints is None:
+                stacked_fingerprints = writer.recorded_values(SOURCE_FINGERPRINT)
+            for file, path_parent in files:
+                recorded = self.wrapper_index.get_attribute("/".join(group_path(file, path_parent)), SOURCE_FINGERPRINT, inherited = False)
+                if recorded is None and stacked_fingerprints is not None:
+                    recorded = stacked_fingerprints.get(file)
+                if recorded is not None:
+                    fingerprints[file] = str(recorded)
+
+        def write_dictionnary(file, path_parent, dic):
+            # The dictionnaries are written by batches, the groups corresponding to the directories between the dropped directory and the file being created by the writer
+            parent_group, name_group = group_path(file, path_parent)
+            log_written(*writer.add(file, dic, parent_group, name_group, replace = file in fingerprints))
+            return name_group
+
+        def log_written(written, failed):
+            # Logging the added data
+            for file, _ in written:
                 self.textBrowser_Log.append(f"<i>{file}</i> added to <b>{parent_path}</b>")
-                i += 1
-                progress.update_progress(i / len(filepath) * 100, f"Adding {file} to {path_parent}")
+            for file, error in failed:
+                self.textBrowser_Log.append(f"<i>{file}</i> could not be added: {error}")
+            for file, warning in writer.warnings:
+                self.textBrowser_Log.append(f"<b>Warning</b>: <i>{file}</i> has been added but {warning}")
+            writer.warnings.clear()
+
+        def file_parsed(i, file, dic):
+            nonlocal n_handled, n_skipped
+            # The files parsed after the cancellation are ignored, their dictionnary being None with a pool of processes (see ImportWorker.cancel)
+            if importer.is_cancelled():
+                pass
+            elif dic is None:
+                n_skipped += 1
             else:
-                timer.stop()
-                progress.close()
+                write_dictionnary(file, path_from_parent[i], dic)
+            n_handled += 1
+            progress.update_progress(int(n_handled / len(importer.filepaths) * 100), f"Adding {file} to {path_from_parent[i]}")
+            importer.written()
+
+        def file_failed(i, file, error):
+            nonlocal n_handled
+            n_handled += 1
+            self.textBrowser_Log.append(f"<i>{file}</i> could not be added: {error}")
+            progress.update_progress(int(n_handled / len(importer.filepaths) * 100), f"Error while adding {file}: {error}")
+            importer.written()
 
         # Get filepath            
         if filepath is None: 
@@ -410,89 +511,124 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             parent_path = self.treeview_selected
 
         # Create a new wrapper if the file is not empty and the parent path is the root
-        if parent_path == "Brillouin" and len(self.wrapper.get_children_elements()) > 0:
+        if parent_path == "Brillouin" and len(self.wrapper_index.get_children_elements()) > 0:
             add_to_root()
 
         # Makes sure to add the data to a group, even if it is dragged under a dataset
-        if self.wrapper.get_type(parent_path) != h5py._hl.group.Group:
+        if self.wrapper_index.get_type(parent_path) != h5py._hl.group.Group:
             parent_path = "/".join(parent_path.split("/")[:-1])
+        if self.check_mounted(parent_path):
+            return
 
         # If we have dragged an entire directory, add each element of the directory with the same structure (directory <=> groups)
+        # The directory is scanned in the background: the extensions are proposed as they are found, and the import of the files starts while the scan continues
+        indexer, importer, extension = None, None, None
+        scan_done = True
+        try:
+            policy = StoragePolicy.for_file(self.filepath, config_dir)
+        except (OSError, ValueError, TypeError) as e:
+            self.textBrowser_Log.append(f"<b>Error</b> while reading the storage policy, the default one is used: {e}")
+            policy = None
+        writer = BatchWriter(self.wrapper, self.wrapper_index, policy = policy)
+        fingerprints = {}
+        stacked_fingerprints = None
+        n_skipped = 0
         dir_present = False
         for f in filepath:
-            if os.path.splitext(f)[1] == "":
+            if os.path.isdir(f):
                 dir_present = True
         if dir_present:
             if len(filepath) > 1:
                 qtw.QMessageBox.warning(self, "Warning", "You are trying to add more than one directory. Please select only one directory.")
                 return
             response = qtw.QMessageBox.question(self, "Warning", "You are trying to add a directory. Do you want to add all the files in the directory with the same structure?", qtw.QMessageBox.Yes | qtw.QMessageBox.No)
-            if response == qtw.QMessageBox.Yes:
-                extensions = get_extensions(filepath)
-                dialog = ComboboxChoose(text = "Choose the file you want to load by their extension", list_choices = extensions, parent = self)
-                if dialog.exec_() == qtw.QDialog.Accepted:
-                    extension = dialog.get_selected_structure()
-                    files, path_from_parent = [], []
-                    for file in filepath:
-                        temp_file, temp_path_from_parent = get_children_files_by_extension(file, extension)
-                        files += temp_file
-                        path_from_parent += temp_path_from_parent
-                    # Create file structure in the HDF5 file
-                    for path_parent in path_from_parent:
-                        if path_parent == "": continue
-                        path_split = path_parent.split("/")
-                        temp_path = ""
-                        for p in path_split:
-                            if temp_path == "": 
-                                if p not in self.wrapper.get_children_elements(parent_path):
-                                    self.wrapper.create_group(p, parent_group = parent_path)
-                                temp_path = p
-                            else: 
-                                if p not in self.wrapper.get_children_elements(parent_path+"/"+temp_path):
-                                    self.wrapper.create_group(p, parent_group = parent_path+"/"+temp_path)
-                                temp_path = f"{temp_path}/{p}"
-                    filepath = files
-                else:
-                    return
+            if response != qtw.QMessageBox.Yes:
+                return
+            directory = filepath[0]
+            found = {}
+            scan_done = False
+            dialog = ComboboxChoose(text = "Choose the file you want to load by their extension", list_choices = [], parent = self)
+            stack_option = dialog.add_option("Stack the spectra of the files in a single dataset")
+            indexer = DirectoryIndexer(directory, parent = self)
+            indexer.batch_ready.connect(index_batch)
+            indexer.progress.connect(index_progress)
+            indexer.finished.connect(index_finished)
+            indexer.start()
+            if dialog.exec_() != qtw.QDialog.Accepted or not found:
+                stop_indexer()
+                return
+            extension = dialog.get_selected_structure()
+            # The single spectra of the files can be stacked in a dataset named after the directory instead of being written in a group per file
+            if stack_option.isChecked():
+                writer = SpectrumStacker(self.wrapper, self.wrapper_index, parent_path, os.path.basename(os.path.normpath(directory)), policy = policy)
+            filepath = [file for file, _ in found.get(extension, [])]
+            path_from_parent = [path_parent for _, path_parent in found.get(extension, [])]
+            if not filepath:
+                stop_indexer()
+                return
         else:
             path_from_parent = ["" for i in filepath]
         
         # Creating the dictionnary with the data and the attributes starting with the addition of a single file
+        # The fingerprint of each source file is stored on its group: the files imported again are skipped if they have not changed, and replace their group otherwise
+        record_fingerprints(zip(filepath, path_from_parent))
         file = filepath.pop(0)
         path_parent = path_from_parent.pop(0)
-        creator, parameters, dic = get_dictionnary(file, creator = None, parameters = None)
-        
-        name_group = os.path.basename(file).split(".")[0]
-        name_group = name_group.replace("  ", " ")
-        if path_parent == "":
-            self.wrapper.add_dictionnary(dic, 
-                                        parent_group = parent_path, 
-                                        name_group = name_group)
+        loaded = self.get_dictionnary(file, creator = None, parameters = None)
+        if loaded is None:
+            if indexer is not None:
+                stop_indexer()
+            return
+        creator, parameters, dic = loaded
+        fingerprint = source_fingerprint(file)
+        if file in fingerprints and same_content(fingerprint, fingerprints[file]):
+            n_skipped += 1
+            name_group = group_path(file, path_parent)[1]
         else:
-            self.wrapper.add_dictionnary(dic, 
-                                        parent_group = parent_path+"/"+path_parent, 
-                                        name_group = name_group)
-        
-        # Logging the added data
-        self.textBrowser_Log.append(f"<i>{file}</i> added to <b>{parent_path}</b>")
-
-        # Using the creator and parameters used to load the first data to load the rest of the data. During loading, a progress window is opened allowing to see the progress of the loading
-        timer = qtc.QTimer(self)
-        i = 0
-        progress = ProgressBar(f"Adding {len(filepath)} files to the HDF5 file", self)
-        progress.show()
-        timer.timeout.connect(update_progress)
-        timer.start(10)  # Update every 10 ms
-        while timer.isActive(): # Wait for the timer to finish
-            qtw.QApplication.processEvents()
+            dic.setdefault("Attributes", {})[SOURCE_FINGERPRINT] = fingerprint
+            name_group = write_dictionnary(file, path_parent, dic)
+            log_written(*writer.flush())
+
+        # Using the creator and parameters used to load the first data to load the rest of the data. 
+        # The files are parsed in parallel by a pool of threads and the parsed dictionnaries are written one by one by this thread, the window staying responsive during the loading. A progress window allows to see the progress of the loading and to cancel it
+        if filepath or not scan_done:
+            n_handled = 0
+            if scan_done:
+                progress = ProgressBar(f"Adding {len(filepath)} files to the HDF5 file", self, cancellable = True)
+            else:
+                progress = ProgressBar(f"Adding the {extension} files of {directory} to the HDF5 file", self, cancellable = True)
+            progress.setWindowModality(qtc.Qt.WindowModal)
+            progress.show()
+
+            importer = ImportWorker(filepath, partial(load_streamed, creator = creator, parameters = parameters), processes = self.IMPORT_PROCESSES, streaming = not scan_done, fingerprints = fingerprints, parent = self)
+            importer.parsed.connect(file_parsed)
+            importer.failed.connect(file_failed)
+            progress.cancelled.connect(importer.cancel)
+            if indexer is not None:
+                progress.cancelled.connect(indexer.cancel)
+
+            loop = qtc.QEventLoop()
+            importer.finished.connect(loop.quit)
+            importer.start()
+            loop.exec() # Wait for the import to finish
+            log_written(*writer.flush())
+            progress.accept()
+            importer.deleteLater()
+        if indexer is not None:
+            stop_indexer()
+        if n_skipped:
+            self.textBrowser_Log.append(f"{n_skipped} files already imported and unchanged were skipped")
 
         # Updating the treeview
-        if path_parent == "":
+        if isinstance(writer, SpectrumStacker):
+            # The files of a stacked import that were all skipped have no stack written during this import
+            self.treeview_selected = next(iter(writer.stacks.values()), parent_path)
+        elif path_parent == "":
             self.treeview_selected = f"{parent_path}/{name_group}"
         else:
             self.treeview_selected = f"{parent_path}/{path_parent}/{name_group}"
 
-        self.update_treeview()
+        self.update_treeview_path(parent_path)
         self.update_parameters()
         self.expand_treeview_path(self.treeview_selected)
     
@@ -504,12 +640,15 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         -------
         None
         """
+        if self.check_mounted(self.treeview_selected):
+            return
         self.wrapper.create_group(name = "New group", 
                                   parent_group = self.treeview_selected)
         self.treeview_selected = f"{self.treeview_selected}/New group"
+        self.wrapper_index.refresh(self.treeview_selected)
         self.textBrowser_Log.append(f"<i>New group</i> added to <b>{self.treeview_selected}</b>")
-        self.update_treeview()
-        self.expand_treeview_path(self.treeview_selected)
+        self.model.update_path(self.treeview_selected)
+        self.select_treeview_path(self.treeview_selected)
 
     def adjust_treeview_columns(self, index=None):
         """
@@ -518,6 +657,65 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         for col in range(self.treeView.model().columnCount()):
             self.treeView.resizeColumnToContents(col)
 
+    def check_mounted(self, path):
+        """
+        Checks if an element is stored in a mounted HDF5 file (see mount_files), these files being read-only, or if the file is being saved (see check_saving). A warning is displayed if it is.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element to modify.
+
+        Returns
+        -------
+        bool
+            True if the element is in a mounted file and cannot be modified.
+        """
+        if self.check_saving():
+            return True
+        mount = self.wrapper_index.get_mount(path)
+        if mount is None:
+            return False
+        qtw.QMessageBox.warning(self, "Mounted file", f"{path} is stored in the HDF5 file mounted at {mount}, which is read-only. Materialize the mounted file to modify it.")
+        return True
+
+    def check_saving(self):
+        """
+        Checks if the file is being saved in the background (see save_hdf5), the file being copied as it is and not modifiable until the save ends. A warning is displayed if it is.
+
+        Returns
+        -------
+        bool
+            True if a save is running and the file cannot be modified.
+        """
+        if self.saver is None:
+            return False
+        qtw.QMessageBox.warning(self, "Save in progress", f"The file is being saved to {self.saver.filepath}. Wait for the end of the save or cancel it to modify the file.")
+        return True
+
+    def check_virtual_sources(self, path):
+        """
+        Checks if an element about to be removed, renamed or moved contains datasets mapped by virtual datasets (see merge_group_dataset), which cannot be read anymore once these datasets have changed path. The user can then consolidate the virtual datasets first, modify the element anyway or cancel.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element to modify.
+
+        Returns
+        -------
+        bool
+            True if the element must not be modified.
+        """
+        virtual_datasets = self.wrapper_index.get_virtual_datasets([path])
+        if not virtual_datasets:
+            return False
+        answer = qtw.QMessageBox.question(self, "Virtual datasets", f"{path} is mapped by the virtual datasets {', '.join(virtual_datasets)}, which cannot be read anymore once it is modified. Do you want to consolidate the virtual datasets first?\n\nYes: the first virtual dataset is consolidated in the background, modify the element once the virtual datasets are consolidated.\nNo: the element is modified and the virtual datasets cannot be read anymore.", qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
+        if answer == qtw.QMessageBox.Yes:
+            self.consolidate_dataset(virtual_datasets[0])
+            return True
+        return answer != qtw.QMessageBox.No
+
     def closeEvent(self):
         """
         Close the window and exit the application.
@@ -526,21 +724,117 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         -------
         None
         """
-        # Handle the error if the wrapper is not saved
+        # Stop the import of the watched folder and the consolidation of a virtual dataset, which write in the file, so that the file can be saved
+        self.stop_folder_watch()
+        self.stop_consolidation()
+
+        # Handle the error if the wrapper is not saved. The window is not closed if the file has not been saved (save cancelled or failed), the temporary file and the journal of the session being kept
         if self.wrapper.save:
-            self.handle_error_save()
+            if not self.handle_error_save() or self.wrapper.save:
+                return
 
-        # Repack the wrapper if it exists
-        # if os.path.isfile(self.filepath):
-        #     self.wrapper.repack()
-        
-        # Delete the temporary file if it exists
+        # Stop the save of the file and the scan of the structure of the file, and store the structure in the cache
+        self.stop_save()
+        self.stop_swmr()
+        self.a_Swmr.setChecked(False)
+        self.stop_structure_scan()
+        self.write_structure_cache()
+
+        # Propose to repack the file if elements have been removed and the space they free is worth it. The repack of the library when the wrapper is closed is skipped: it is blocking and does not keep the links, the chunks and the compression of the datasets
+        if self.wrapper.need_for_repack and not is_tempfile(self.wrapper.filepath):
+            self.suggest_repack()
+        self.wrapper.need_for_repack = False
+
+        # Delete the temporary file if it exists, the session being closed normally its journal is removed
         self.wrapper.close(delete_temp_file = True)
+        if self.journal is not None:
+            self.journal.close()
         try:
             self.close()
         except:
             pass
 
+    def consolidate_dataset(self, path = None):
+        """
+        Copies the data of a virtual dataset (see merge_group_dataset) into a regular dataset in the background, with the chunks and compression of the storage policy. The datasets mapped by the virtual dataset are kept.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the virtual dataset. If None, the selected element is used.
+
+        Returns
+        -------
+        None
+        """
+        if path is None:
+            path = self.treeview_selected
+        if self.check_mounted(path):
+            return
+        if self.consolidator is not None:
+            qtw.QMessageBox.warning(self, "Warning", f"The virtual dataset {self.consolidator.path} is already being consolidated.")
+            return
+        try:
+            policy = StoragePolicy.for_file(self.filepath, config_dir)
+        except (OSError, ValueError, TypeError) as e:
+            self.textBrowser_Log.append(f"<b>Error</b> while reading the storage policy, the default one is used: {e}")
+            policy = None
+        self.consolidator = DatasetConsolidator(self.wrapper, path, policy = policy, parent = self)
+        self.consolidator.progress.connect(self.consolidation_progress)
+        self.consolidator.finished.connect(self.consolidation_finished)
+        self.consolidator.start()
+        self.b_CancelConsolidation.show()
+        self.textBrowser_Log.append(f"Consolidation of the virtual dataset <b>{path}</b> started")
+
+    def consolidation_finished(self, done, error):
+        """
+        Updates the index and the tree view at the end of the consolidation of a virtual dataset.
+
+        Parameters
+        ----------
+        done : bool
+            True if the dataset has been consolidated, False if the consolidation has been cancelled or has failed.
+        error : str
+            The error message, empty if there is none.
+
+        Returns
+        -------
+        None
+        """
+        consolidator, self.consolidator = self.consolidator, None
+        self.b_CancelConsolidation.hide()
+        if done:
+            if is_tempfile(self.wrapper.filepath):
+                self.wrapper.save = True
+            self.wrapper_index.refresh(consolidator.path)
+            self.update_treeview_path(consolidator.path)
+            self.textBrowser_Log.append(f"The virtual dataset <b>{consolidator.path}</b> has been consolidated")
+            self.statusbar.showMessage(f"{consolidator.path} consolidated", 5000)
+        elif error:
+            self.textBrowser_Log.append(f"<b>Error</b> while consolidating <b>{consolidator.path}</b>: {error}")
+            self.statusbar.clearMessage()
+        else:
+            self.textBrowser_Log.append(f"Consolidation of <b>{consolidator.path}</b> cancelled")
+            self.statusbar.clearMessage()
+        consolidator.deleteLater()
+
+    def consolidation_progress(self, n_copied, n_slices):
+        """
+        Displays the progress of the consolidation of a virtual dataset in the status bar.
+
+        Parameters
+        ----------
+        n_copied : int
+            The number of slices copied.
+        n_slices : int
+            The number of slices of the virtual dataset.
+
+        Returns
+        -------
+        None
+        """
+        self.statusbar.showMessage(f"Consolidating {self.consolidator.path}: {n_copied}/{n_slices} ({n_copied / max(n_slices, 1):.0%})")
+
     def convert_csv(self):
         """
         Exports the properties of the wrapper to a CSV file.
@@ -559,23 +853,25 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
 
         """
         def get_structure_list(elt = "Brillouin", lst = ["Brillouin"], selectable = [True], lvl = 0):
-            for child in self.wrapper.get_children_elements(path = elt):
-                if self.wrapper.get_type(path = f"{elt}/{child}") == h5py._hl.group.Group:
-                    if self.wrapper.get_type(path = f"{elt}/{child}", return_Brillouin_type=True) in ["Measure", "Calibration_spectrum", "Impulse_response"]:
-                        for e in self.wrapper.get_children_elements(path = f"{elt}/{child}"):
-                            if self.wrapper.get_type(path = f"{elt}/{child}/{e}", return_Brillouin_type=True) == "Frequency":
+            for child in self.wrapper_index.get_children_elements(path = elt):
+                if self.wrapper_index.get_type(path = f"{elt}/{child}") == h5py._hl.group.Group:
+                    if self.wrapper_index.get_type(path = f"{elt}/{child}", return_Brillouin_type=True) in ["Measure", "Calibration_spectrum", "Impulse_response"]:
+                        for e in self.wrapper_index.get_children_elements(path = f"{elt}/{child}"):
+                            if self.wrapper_index.get_type(path = f"{elt}/{child}/{e}", return_Brillouin_type=True) == "Frequency":
                                 lst.append("  "*lvl + "|- " + f"{elt}/{child}/{e}")
                                 selectable.append(False)
-                    elif self.wrapper.get_type(path = f"{elt}/{child}", return_Brillouin_type=True) == "Root":
+                    elif self.wrapper_index.get_type(path = f"{elt}/{child}", return_Brillouin_type=True) == "Root":
                         lst.append("  "*lvl + "|- " + f"{elt}/{child}")
                         selectable.append(True)
                         lst, selectable = get_structure_list(elt = f"{elt}/{child}", lst = lst, selectable = selectable, lvl = lvl+1)
             return lst, selectable
 
         new_path = self.treeview_selected
-        if self.wrapper.get_type(path = new_path, return_Brillouin_type = False) == h5py._hl.dataset.Dataset:
+        if self.wrapper_index.get_type(path = new_path, return_Brillouin_type = False) == h5py._hl.dataset.Dataset:
             new_path = "/".join(new_path.split("/")[:-1])
-        if not self.wrapper.get_type(path = new_path, return_Brillouin_type = True) == "Measure":
+        if self.check_mounted(new_path):
+            return
+        if not self.wrapper_index.get_type(path = new_path, return_Brillouin_type = True) == "Measure":
             qtw.QMessageBox.warning(self, "Warning", "The selected group is not a measure group")
             return
 
@@ -589,8 +885,11 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         while path[0] != "B":
             path = path[1:]
         
-        self.wrapper.copy_dataset(path = path, copy_path = new_path)
-        self.update_treeview()
+        # The copy keeps the dimension scales of the copied dataset as references, which are attached again by path
+        with preserve_scales(self.wrapper, path, f"{new_path}/{path.split('/')[-1]}"):
+            self.wrapper.copy_dataset(path = path, copy_path = new_path)
+        self.wrapper_index.refresh(f"{new_path}/{path.split('/')[-1]}")
+        self.model.update_path(f"{new_path}/{path.split('/')[-1]}")
         self.expand_treeview_path(new_path)
         
     @qtc.Slot()
@@ -602,8 +901,8 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         -------
         None
         """
-        if self.current_hover_index is not None:
-            self.treeView.expand(self.current_hover_index)  # Expand the item
+        if self.current_hover_path is not None:
+            self.treeView.expand(self.proxy_model.index_from_path(self.current_hover_path))  # Expand the item
 
     def expand_treeview_path(self, path):
         """
@@ -619,17 +918,39 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         None
         """
         # Start from the root item and expand it
-        current_index = self.treeView.model().index(0, 0)  # Assuming the first row is the root
-        self.treeView.setExpanded(current_index, True)
-
-        # Traverse the path and expand
-        if not path is None:
-            for part in path.split("/"):
-                for row in range(self.treeView.model().rowCount(current_index)):
-                    child_index = self.treeView.model().index(row, 0, current_index)
-                    if child_index.data() == part:
-                        current_index = child_index
-                        self.treeView.setExpanded(current_index, True)  # Expand the parent
+        self.treeView.setExpanded(self.proxy_model.index(0, 0), True)  # Assuming the first row is the root
+        if path is None: 
+            return
+
+        # Find the deepest displayed element of the path, its index is directly retrieved from the model
+        index = self.proxy_model.index_from_path(path)
+        while not index.isValid() and "/" in path:
+            path = "/".join(path.split("/")[:-1])
+            index = self.proxy_model.index_from_path(path)
+
+        # Expand the element and all its parents
+        while index.isValid():
+            self.treeView.setExpanded(index, True)
+            index = index.parent()
+
+    def expand_treeview_children(self, path):
+        """
+        Expand all the children of an element of the tree view.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element whose children are expanded.
+
+        Returns
+        -------
+        None
+        """
+        self.expand_treeview_path(path)
+        self.model.fetch_all(self.model.index_from_path(path))
+        index = self.proxy_model.index_from_path(path)
+        for row in range(self.proxy_model.rowCount(index)):
+            self.treeView.setExpanded(self.proxy_model.index(row, 0, index), True)
     
     def export_code_line(self):
         """
@@ -639,7 +960,7 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         -------
         None
         """
-        if self.wrapper.get_type(path = self.treeview_selected) is h5py._hl.group.Group:
+        if self.wrapper_index.get_type(path = self.treeview_selected) is h5py._hl.group.Group:
             qtw.QMessageBox.warning(self, "Warning", "The selected path is not a dataset. Please select a dataset.")
             return
 
@@ -651,10 +972,22 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             return
         language = dialog.get_selected_structure()
 
-        if language == "Python":
+        # In SWMR mode, the file is read while the interface writes it, the datasets being refreshed to read the new data
+        if language == "Python" and self.swmr is not None:
+            text = "import h5py\n"
+            text += f'file = h5py.File("{self.filepath}", "r", libver = "latest", swmr = True)\n'
+            text += f'dataset = file["{self.treeview_selected}"]\n'
+            text += "dataset.refresh() # Reads the data written since the file was opened\n"
+            text += "data = dataset[()]\n"
+        elif language == "Python":
             text = "from HDF5_BLS import Wrapper\n"
             text += f'wrp = Wrapper("{self.filepath}")\n'
             text += f'data = wrp["{self.treeview_selected}"]\n'
+        elif language == "Matlab" and self.swmr is not None:
+            text = f'file = H5F.open("{self.filepath}", "H5F_ACC_SWMR_READ", "H5P_DEFAULT");\n'
+            text += f'dataset = H5D.open(file, "{self.treeview_selected}");\n'
+            text += "H5D.refresh(dataset); % Reads the data written since the file was opened\n"
+            text += "data = H5D.read(dataset);\n"
         elif language == "Matlab":
             text = f'data = h5read("{self.filepath}", "{self.treeview_selected}");'
         
@@ -674,7 +1007,14 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         """
         filepath = qtw.QFileDialog.getSaveFileName(self, "Open File", "", "HDF5 Files (*.h5)")[0]
         if filepath:
-            self.wrapper.export_group(self.treeview_selected, filepath)
+            if not filepath.endswith(".h5"):
+                filepath += ".h5"
+            # The group is copied under the "Brillouin" group of the new file, with its name unless it is a "Root" group
+            new_path = "Brillouin"
+            if self.wrapper_index.get_type(path = self.treeview_selected, return_Brillouin_type = True) != "Root":
+                new_path += "/" + self.treeview_selected.split("/")[-1]
+            with preserve_scales(self.wrapper, self.treeview_selected, new_path, target = filepath):
+                self.wrapper.export_group(self.treeview_selected, filepath)
 
     def export_image(self):
         """
@@ -685,18 +1025,13 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         None
         """
         def return_names_2D_datasets_children(path, names = []):
-            for e in self.wrapper.get_children_elements(path = path):
-                if self.wrapper.get_type(path = f"{path}/{e}") == h5py._hl.dataset.Dataset:
-                    data = self.wrapper[f"{path}/{e}"]
-
-                    # Reshape the element to avoid singleton dimensions
-                    new_shape = []
-                    for s in data.shape:
-                        if s > 1: new_shape.append(s)
-                    data = data.reshape(new_shape)
+            for e in self.wrapper_index.get_children_elements(path = path):
+                if self.wrapper_index.get_type(path = f"{path}/{e}") == h5py._hl.dataset.Dataset:
+                    # Get the shape of the element without singleton dimensions, without reading it
+                    shape = self.wrapper_index.get_shape(f"{path}/{e}", squeeze = True)
 
                     # If the dataset is 2D and the name is not already in the list of names, add it to the list
-                    if len(data.shape) == 2:
+                    if len(shape) == 2:
                         if not e in names:
                             names.append(e)
                 else:
@@ -718,8 +1053,8 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             save_hierarchy : bool, optional
                 Wether to store the file hierarchically or not. If False, the name of the image will be the name of the whole path in the HDF5 file. If true, directories corresponding to the groups of the HDF5 file are created, and the image names are just the name of the elements in the HDF5 file, by default True.
             """
-            for e in self.wrapper.get_children_elements(path = path):
-                if self.wrapper.get_type(path = f"{path}/{e}") == h5py._hl.dataset.Dataset and e == name:
+            for e in self.wrapper_index.get_children_elements(path = path):
+                if self.wrapper_index.get_type(path = f"{path}/{e}") == h5py._hl.dataset.Dataset and e == name:
                     if 'shift' in name.lower():
                         colorbarlabel = "Shift (GHz)"
                     elif 'linewidth' in name.lower():
@@ -728,8 +1063,8 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
                         self.wrapper.export_image(f"{path}/{e}", filepath+"/"+e+fmt, colorbar_label=colorbarlabel)
                     else:
                         self.wrapper.export_image(f"{path}/{e}", filepath+"/"+path.replace("/", " - ")+" - "+e+fmt, colorbar_label=colorbarlabel)
-                elif self.wrapper.get_type(path = f"{path}/{e}") == h5py._hl.group.Group:
-                    if self.wrapper.get_type(path = f"{path}/{e}", return_Brillouin_type= True) == "Treatment" or not save_hierarchy:
+                elif self.wrapper_index.get_type(path = f"{path}/{e}") == h5py._hl.group.Group:
+                    if self.wrapper_index.get_type(path = f"{path}/{e}", return_Brillouin_type= True) == "Treatment" or not save_hierarchy:
                         save_images_group_recursively(filepath, path+"/"+e, name, save_hierarchy, fmt = fmt)
                     else:
                         if not os.path.isdir(filepath+"/"+e):
@@ -739,7 +1074,7 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         hierarchy = False
         formats = [".tiff", ".png", ".jpg", ".jpeg", ".bmp", ".gif", ".pdf"]
         # If a dataset has been selected, ask the user for a filename to save the image at
-        if self.wrapper.get_type(self.treeview_selected) == h5py._hl.dataset.Dataset:
+        if self.wrapper_index.get_type(self.treeview_selected) == h5py._hl.dataset.Dataset:
             # Asks the user for the format of the image
             dialog = ComboboxChoose(text = "Choose the format in which to store the images", list_choices = formats, parent = self)
             # If the user cancels the dialog box, we return
@@ -808,6 +1143,113 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         if filepath:
             self.wrapper.export_dataset(self.treeview_selected, filepath)
 
+    def folder_watch_failed(self, failed):
+        """
+        Logs the files of the watched folder that could not be imported.
+
+        Parameters
+        ----------
+        failed : list of (str, str)
+            The paths of the files and the error messages.
+
+        Returns
+        -------
+        None
+        """
+        for file, error in failed:
+            self.textBrowser_Log.append(f"<i>{file}</i> could not be added: {error}")
+
+    def folder_watch_loader(self, file):
+        """
+        Asks how to load the files of the watched folder from the first file found, and starts importing them.
+
+        Parameters
+        ----------
+        file : str
+            The path of the first file found.
+
+        Returns
+        -------
+        None
+        """
+        loaded = self.get_dictionnary(file, creator = None, parameters = None)
+        if loaded is None or self.folder_importer is None:
+            self.stop_folder_watch()
+            return
+        creator, parameters, _ = loaded
+        self.folder_importer.set_loader(partial(load_streamed, creator = creator, parameters = parameters))
+
+    def folder_watch_update(self):
+        """
+        Updates the tree view and the status bar after files of the watched folder have been written.
+
+        Returns
+        -------
+        None
+        """
+        if self.folder_importer is None:
+            return
+        importer = self.folder_importer
+        self.update_treeview_path(importer.parent_group)
+        self.statusbar.showMessage(f"Watching {importer.directory}: {importer.n_written} files added ({importer.rate():.1f} files/s), {importer.n_skipped} unchanged, {importer.n_failed} failed")
+
+    def folder_watch_warned(self, warned):
+        """
+        Logs the files of the watched folder imported without some of their attributes.
+
+        Parameters
+        ----------
+        warned : list of (str, str)
+            The paths of the files and the warning messages.
+
+        Returns
+        -------
+        None
+        """
+        for file, warning in warned:
+            self.textBrowser_Log.append(f"<b>Warning</b>: <i>{file}</i> has been added but {warning}")
+
+    def folder_watch_written(self, written):
+        """
+        Logs the files of the watched folder that have been written, the tree view being updated at most once every half second.
+
+        Parameters
+        ----------
+        written : list of (str, str)
+            The paths of the files and of their groups.
+
+        Returns
+        -------
+        None
+        """
+        self.textBrowser_Log.append(f"{len(written)} files of <i>{self.folder_importer.directory}</i> added to <b>{self.folder_importer.parent_group}</b>")
+        if not self.folder_watch_timer.isActive():
+            self.folder_watch_timer.start()
+
+    def forget_loaders(self, directory = None):
+        """
+        Forgets the creators and parameters remembered for the files of a folder (see LoaderCache), the files of the folder being loaded again from their extension.
+
+        Parameters
+        ----------
+        directory : str, optional
+            The folder whose loaders are forgotten, asked to the user if None.
+
+        Returns
+        -------
+        None
+        """
+        if directory is None:
+            directory = qtw.QFileDialog.getExistingDirectory(self, "Choose the folder whose loaders are forgotten")
+            if not directory:
+                return
+        try:
+            self.loader_cache.forget_directory(directory)
+        except OSError as e:
+            self.textBrowser_Log.append(f"<b>Error</b> while forgetting the loaders of <i>{directory}</i>: {e}")
+            return
+        self.textBrowser_Log.append(f"The loaders of the files of <i>{directory}</i> have been forgotten")
+
     def get_PSD(self):
         """
         Get the Power Spectrum Density of the selected data. If the process to extract the PSD is already stored in the attributes of the selected group, it is opened.
@@ -816,13 +1258,14 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         -------
         None
         """
-        try:
-            type = self.wrapper.get_attributes(self.treeview_selected)['SPECTROMETER.Type']
-            type = type.replace(" ", "_")
-            type = type.replace("-", "_")
-        except KeyError:
+        if self.check_mounted(self.treeview_selected):
+            return
+        type = self.wrapper_index.get_attribute(self.treeview_selected, 'SPECTROMETER.Type')
+        if type is None:
             qtw.QMessageBox.warning(self, "Warning", "The selected data does not have a spectrometer type.")
             return
+        type = type.replace(" ", "_")
+        type = type.replace("-", "_")
 
         # Check if the conversion can be performed
         function_name = f"check_conversion_{type}"
@@ -855,21 +1298,111 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
                     else:
                         func(self, self.wrapper, self.treeview_selected_multiple)
 
+        # The conversion can modify any element of the selected groups, they are read again
+        for path in self.treeview_selected_multiple or [self.treeview_selected]:
+            if self.wrapper_index.get_type(path) != h5py._hl.group.Group:
+                path = "/".join(path.split("/")[:-1])
+            self.wrapper_index.refresh(path)
+            self.model.update_path(path)
         
-        self.update_treeview()
         self.expand_treeview_path(self.treeview_selected)
 
+    def get_dictionnary(self, file, creator = None, parameters = None):
+        """
+        Loads a file to add, asking the user how to load it if it cannot be loaded from its extension only. The creator and parameters chosen are remembered for the other files of the directory with the same extension (see LoaderCache).
+
+        Parameters
+        ----------
+        file : str
+            The path of the file to load.
+        creator : str, optional
+            The creator of the file, by default None.
+        parameters : dict, optional
+            The parameters used to load the file, by default None.
+
+        Returns
+        -------
+        tuple or None
+            The creator, the parameters and the dictionnary of the loaded file, None if the file could not be loaded or if the user cancelled.
+        """
+        # The creator and parameters remembered for the directory and extension of the file, or else the creator found from the header of the file, are tried first so that the file is not read several times and the dialogs are not shown again
+        guessed = creator is None and parameters is None
+        remembered = None
+        if guessed:
+            remembered = self.loader_cache.get(file)
+            if remembered is not None:
+                creator, parameters = remembered
+            else:
+                creator = sniff_creator(file)
+            guessed = creator is not None or parameters is not None
+        asked = False
+        while True:
+            try:
+                dic = load_streamed(file, creator = creator, parameters = parameters)
+                break
+
+            # There are different ways to load the data, in that case display a dialog box to choose the type of structure to load
+            except LoadError_creator as e:
+                dialog = ComboboxChoose(text = "Choose the type of structure to load", list_choices = e.creators, parent = self)
+                # If the user cancels the dialog box, we return
+                if dialog.exec_() == qtw.QDialog.Rejected:
+                    return
+                creator, parameters, asked = dialog.get_selected_structure(), None, True
+
+            # The user needs to indicate the parameters to load the data, so we load a window to do so
+            except LoadError_parameters as e:
+                dialog = ParameterWindow(text = f"Please indicate the value of the following parameters to load the data:",
+                                        list_parameters = e.parameters,
+                                        parent = self,
+                                        root_path=os.path.dirname(file))
+                accepted = dialog.exec_() == qtw.QDialog.Accepted
+                if accepted:
+                    parameters = dialog.get_selected_structure()
+                dialog.close()
+                if not accepted:
+                    return
+                asked = True
+
+            except Exception as e:
+                # The remembered or sniffed loader does not apply to this file, which is loaded again from its extension only. The user can forget a remembered loader that no longer applies to the files of the directory
+                if guessed:
+                    if remembered is not None:
+                        response = qtw.QMessageBox.question(self, "Remembered loader", f"The file {file} could not be loaded the way the files of its folder with the same extension were loaded: {e}\nDo you want to forget this loader?", qtw.QMessageBox.Yes | qtw.QMessageBox.No)
+                        if response == qtw.QMessageBox.Yes:
+                            try:
+                                self.loader_cache.forget(file)
+                            except OSError as error:
+                                self.textBrowser_Log.append(f"<b>Error</b> while forgetting the loader: {error}")
+                    creator, parameters, guessed = None, None, False
+                    continue
+                # If the file extension is not supported, display a warning window
+                if isinstance(e, ValueError) and not asked:
+                    qtw.QMessageBox.warning(self, "Warning", "The file extension is not supported.")
+                # Else there was a mistake while opening the file so print an error
+                else:
+                    qtw.QMessageBox.warning(self, "Error while adding the file: ", str(e))
+                return
+
+        if creator is not None or parameters is not None:
+            try:
+                self.loader_cache.set(file, creator, parameters)
+            except (OSError, TypeError, ValueError) as e:
+                self.textBrowser_Log.append(f"<b>Error</b> while remembering how the file was loaded: {e}")
+        return creator, parameters, dic
+
     def get_treatment(self):
         """
         Treats all the PSD of the selected data.
         """
+        if self.check_mounted(self.treeview_selected):
+            return
         # Verifies that in the Measure group selected, a PSD is stored
         parent = self.treeview_selected
-        while self.wrapper.get_type(path = parent, return_Brillouin_type = True) != "Measure":
+        while self.wrapper_index.get_type(path = parent, return_Brillouin_type = True) != "Measure":
             parent = "/".join(parent.split("/")[:-1])
         no_PSD = True
-        for e in self.wrapper.get_children_elements(path = parent):
-            if self.wrapper.get_type(path = f"{parent}/{e}", return_Brillouin_type = True) == "PSD":
+        for e in self.wrapper_index.get_children_elements(path = parent):
+            if self.wrapper_index.get_type(path = f"{parent}/{e}", return_Brillouin_type = True) == "PSD":
                 no_PSD = False
         if no_PSD:
             qtw.QMessageBox.warning(self, "Warning", "No PSD has been stored in the selected group")
@@ -878,6 +1411,10 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         treatment = TreatWindow(self)
         treatment.exec_()
 
+        # The results of the treatment are stored in the measure group
+        self.wrapper_index.refresh(parent)
+        self.model.update_path(parent)
+
     def handle_error_save(self):
         """Function that handles the error when trying to close the wrapper without saving it.
 
@@ -889,6 +1426,13 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         dialog = qtw.QMessageBox.question(self,"Unsaved changes", "The file has not been saved yet. Do you want to save it?", qtw.QMessageBox.Yes | qtw.QMessageBox.No |qtw.QMessageBox.Cancel)
         if dialog == qtw.QMessageBox.Yes:
             self.save_hdf5()
+            # The file is copied in the background, the window staying responsive until the end of the copy
+            if self.saver is not None:
+                loop = qtc.QEventLoop()
+                self.saver.finished.connect(loop.quit)
+                loop.exec()
+            if self.wrapper.save:
+                return False
             self.wrapper.close()
         elif dialog == qtw.QMessageBox.No:
             self.wrapper.save = False
@@ -897,6 +1441,45 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             return False
         return True
 
+    def materialize_files(self, paths = None):
+        """
+        Copies the data of mounted HDF5 files in the opened file, in place of their links (see mount_files).
+
+        Parameters
+        ----------
+        paths : list of str, optional
+            The paths of the links of the mounted files. If None, the mounted file containing the selected element is materialized.
+
+        Returns
+        -------
+        None
+        """
+        if self.check_saving():
+            return
+        if paths is None:
+            mount = self.wrapper_index.get_mount(self.treeview_selected)
+            if mount is None:
+                qtw.QMessageBox.information(self, "Materialize", "The selected element is not in a mounted HDF5 file.")
+                return
+            paths = [mount]
+        if not paths:
+            qtw.QMessageBox.information(self, "Materialize", "No HDF5 file is mounted in the opened file.")
+            return
+
+        self.statusbar.showMessage(f"Copying the data of {len(paths)} mounted files")
+        qtw.QApplication.setOverrideCursor(qtc.Qt.WaitCursor)
+        try:
+            materialized, failed = materialize(self.wrapper, self.wrapper_index, paths)
+        finally:
+            qtw.QApplication.restoreOverrideCursor()
+        for path in materialized:
+            self.textBrowser_Log.append(f"The data of the file mounted at <b>{path}</b> have been copied in the file")
+            self.update_treeview_path(path)
+        for path, error in failed:
+            self.textBrowser_Log.append(f"<b>Error</b> while materializing <b>{path}</b>: {error}")
+        self.statusbar.showMessage(f"{len(materialized)} mounted files materialized", 5000)
+        self.update_parameters()
+
     def merge_group_dataset(self):
         """
         Merge all the datasets of a group into a single dataset
@@ -906,26 +1489,25 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         None
         """
         def get_all_brillouin_types(path, brillouin_types = []):
-            for e in self.wrapper.get_children_elements(path = path):
-                if self.wrapper.get_type(path = f"{path}/{e}") == h5py._hl.group.Group:
-                    get_all_brillouin_types(path = f"{path}/{e}", brillouin_types = brillouin_types)
-                else:
-                    tpe = self.wrapper.get_type(path = f"{path}/{e}", return_Brillouin_type = True)
+            for p in self.wrapper_index.walk(path):
+                if self.wrapper_index.get_type(path = p) == h5py._hl.dataset.Dataset:
+                    tpe = self.wrapper_index.get_type(path = p, return_Brillouin_type = True)
                     if tpe not in brillouin_types:
                         brillouin_types.append(tpe)
             return brillouin_types
 
         def get_all_datasets(path, type_dset = None, datasets = []):
-            for e in self.wrapper.get_children_elements(path = path):
-                if self.wrapper.get_type(path = f"{path}/{e}") == h5py._hl.dataset.Dataset:
-                    if self.wrapper.get_type(path = f"{path}/{e}", return_Brillouin_type = True) == type_dset:
-                        datasets.append(f"{path}/{e}")
-                else:
-                    datasets = get_all_datasets(path = f"{path}/{e}", type_dset = type_dset, datasets = datasets)
+            for p in self.wrapper_index.walk(path):
+                if self.wrapper_index.get_type(path = p) == h5py._hl.dataset.Dataset:
+                    if self.wrapper_index.get_type(path = p, return_Brillouin_type = True) == type_dset:
+                        datasets.append(p)
             return datasets
 
+        if self.check_mounted(self.treeview_selected):
+            return
+
         # Extract the types of all the datasets under the selected group
-        brillouin_types = get_all_brillouin_types(self.treeview_selected)
+        brillouin_types = get_all_brillouin_types(self.treeview_selected, brillouin_types = [])
 
         # Asks the user for the type to merge the datasets into
         dialog = ComboboxChoose(text = "Choose the type to merge the datasets into", list_choices = brillouin_types, parent = self)
@@ -935,12 +1517,53 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             return
         
         # Extract a list of all the datasets under the selected groups with the correct type.
-        datasets = get_all_datasets(self.treeview_selected, type_dset = brillouin_type)
+        datasets = get_all_datasets(self.treeview_selected, type_dset = brillouin_type, datasets = [])
 
-        self.wrapper.combine_datasets(datasets = datasets, parent_group = self.treeview_selected, name = brillouin_type, overwrite = True)
-        self.update_treeview()
+        # The datasets can be mapped by a virtual dataset (nothing is copied) or copied in a new dataset
+        dialog = qtw.QMessageBox.question(self, "Precisions", "Do you want to create a virtual dataset mapping the datasets without copying them (Yes), or to copy them in a new dataset (No)? The virtual dataset can be consolidated later.", qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
+        if dialog == qtw.QMessageBox.Cancel:
+            return
+        if dialog == qtw.QMessageBox.Yes:
+            try:
+                combine_virtual(self.wrapper, self.wrapper_index, datasets, self.treeview_selected, brillouin_type)
+            except (WrapperError_ArgumentType, WrapperError_Overwrite) as e:
+                qtw.QMessageBox.warning(self, "Warning", str(e))
+                return
+            self.textBrowser_Log.append(f"Virtual dataset <b>{self.treeview_selected}/{brillouin_type}</b> created from {len(datasets)} datasets")
+        else:
+            self.wrapper.combine_datasets(datasets = datasets, parent_group = self.treeview_selected, name = brillouin_type, overwrite = True)
+            self.wrapper_index.refresh(f"{self.treeview_selected}/{brillouin_type}")
+        self.model.update_path(f"{self.treeview_selected}/{brillouin_type}")
         self.expand_treeview_path(self.treeview_selected)
 
+    def mount_files(self, filepaths, parent_path):
+        """
+        Mounts HDF5 files in a group of the opened file: the files are added as external links to their "Brillouin" group, their data being read from them without being copied. The elements of the mounted files are read-only until they are materialized (see materialize_files).
+
+        Parameters
+        ----------
+        filepaths : list of str
+            The paths of the HDF5 files to mount.
+        parent_path : str
+            The group where the files are mounted.
+
+        Returns
+        -------
+        None
+        """
+        if self.check_saving():
+            return
+        if self.wrapper_index.get_type(parent_path) != h5py._hl.group.Group:
+            parent_path = "/".join(parent_path.split("/")[:-1])
+        mounted, failed = mount_hdf5(self.wrapper, self.wrapper_index, filepaths, parent_path)
+        for filepath, path in mounted:
+            self.textBrowser_Log.append(f"<i>{filepath}</i> mounted at <b>{path}</b>")
+        for filepath, error in failed:
+            self.textBrowser_Log.append(f"<i>{filepath}</i> could not be mounted: {error}")
+        self.update_treeview_path(parent_path)
+        self.update_parameters()
+        self.expand_treeview_path(parent_path)
+
     def new_hdf5(self):
         """
         Create a new HDF5 file.
@@ -952,8 +1575,15 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         if self.wrapper.save:
             self.handle_error_save()
         
+        self.stop_folder_watch()
+        self.stop_consolidation()
+        self.stop_save()
+        self.stop_swmr()
+        self.a_Swmr.setChecked(False)
         self.wrapper = wrapper.Wrapper()
+        self.wrapper_index = WrapperIndex(self.wrapper)
         self.filepath = None
+        self.start_journal()
             
         # Update treeview
         self.update_treeview()
@@ -987,7 +1617,22 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         if self.wrapper.save:
             self.handle_error_save()
         
+        self.stop_folder_watch()
+        self.stop_consolidation()
+        self.stop_save()
+        self.stop_swmr()
+        self.a_Swmr.setChecked(False)
+        self.stop_structure_scan()
+
+        # The key of the file is taken before the wrapper is created, the wrapper updating the file when opening it
+        key = file_key(filepath)
         self.wrapper = wrapper.Wrapper(filepath)
+        self.start_journal()
+
+        # The structure is loaded from the cache if the file has not changed since it was cached, otherwise only the root of the file is read here. In both cases the structure is read again in the background
+        self.wrapper_index = WrapperIndex.from_cache(self.wrapper, cache_dir, key)
+        if self.wrapper_index is None:
+            self.wrapper_index = WrapperIndex(self.wrapper, scan = False)
             
         # Update treeview
         self.update_treeview()
@@ -997,6 +1642,7 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         self.update_parameters()
 
         self.textBrowser_Log.append(f"<i>{self.filepath}</i> opened")
+        self.start_structure_scan()
     
     def paramters_visualize(self):
         """
@@ -1027,65 +1673,429 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             params[param_name] = (param_value, param_unit)
         return params
 
+    def recover_session(self):
+        """
+        Proposes to recover a session that ended unexpectedly, from the journals left by the sessions that were not closed (see SessionJournal). The file of the session is opened again if it can be read. Otherwise, if the file was never saved, the operations of the session are replayed in a new file, the imported files being read again from their sources.
+
+        Returns
+        -------
+        None
+        """
+        def import_files(files, stack = None):
+            # Imports again files recorded by a BatchWriter or a SpectrumStacker, with the loaders remembered for their directory
+            try:
+                policy = StoragePolicy.for_file(self.filepath, config_dir)
+            except (OSError, ValueError, TypeError):
+                policy = PRESETS["balanced"]
+            if stack is None:
+                writer = BatchWriter(self.wrapper, self.wrapper_index, policy = policy)
+            else:
+                writer = SpectrumStacker(self.wrapper, self.wrapper_index, stack["parent_group"], stack["name"], policy = policy)
+            failed = []
+            for file in files:
+                source = file["source"]
+                creator, parameters = self.loader_cache.get(source) or (None, None)
+                try:
+                    dic = load_source(partial(load_streamed, creator = creator, parameters = parameters), source)
+                except Exception as e:
+                    failed.append((source, str(e)))
+                    continue
+                parent_group = file.get("parent_group", stack["parent_group"] if stack is not None else "Brillouin")
+                name_group = file.get("name_group", os.path.basename(source).split(".")[0])
+                failed.extend(writer.add(source, dic, parent_group, name_group, replace = file.get("replace", False))[1])
+            failed.extend(writer.flush()[1])
+            if failed:
+                raise ValueError(", ".join(f"{source} ({error})" for source, error in failed))
+
+        directory = os.path.join(config_dir, JOURNALS_DIRNAME)
+        for journal_path in SessionJournal.orphans(directory):
+            try:
+                records = SessionJournal.read(journal_path)
+            except OSError:
+                continue
+            filepath, saved, operations, interrupted = session_state(records)
+            # Nothing is lost if no operation was made since the last save
+            if filepath is None or not (operations or interrupted):
+                SessionJournal.remove(journal_path)
+                continue
+            try:
+                with h5py.File(filepath, 'r'):
+                    readable = True
+            except OSError:
+                readable = False
+            if not readable and saved:
+                self.textBrowser_Log.append(f"<b>Error</b>: the session on <i>{filepath}</i> ended unexpectedly and the file cannot be read anymore, it cannot be recovered")
+                SessionJournal.remove(journal_path)
+                continue
+
+            text = f"The session on {'the new file' if not saved else filepath} ended unexpectedly with {len(operations)} operations since the last save."
+            if interrupted:
+                text += f" The interrupted operations ({', '.join(record['operation'] for record in interrupted)}) may be partially applied."
+            if readable:
+                text += " Do you want to open the file of the session again?"
+            else:
+                text += " Its file has been lost, do you want to replay the operations in a new file? The imported files are read again from their sources."
+            answer = qtw.QMessageBox.question(self, "Recover the session", text, qtw.QMessageBox.Yes | qtw.QMessageBox.No)
+            SessionJournal.remove(journal_path)
+            if answer != qtw.QMessageBox.Yes:
+                continue
+
+            if readable:
+                self.open_hdf5(filepath = filepath)
+                if not saved:
+                    # The file is a temporary file, the user is asked where to save it
+                    self.wrapper.save = True
+                    self.filepath = None
+                self.textBrowser_Log.append(f"Session recovered ({len(operations)} operations since the last save)")
+            else:
+                self.new_hdf5()
+                handlers = {name: getattr(self.wrapper, name) for name in JOURNALED_METHODS if hasattr(self.wrapper, name)}
+                handlers["import_files"] = import_files
+                handlers["mount_hdf5"] = lambda filepaths, parent_group: mount_hdf5(self.wrapper, self.wrapper_index, filepaths, parent_group)
+                handlers["materialize"] = lambda paths: materialize(self.wrapper, self.wrapper_index, paths)
+                handlers["combine_virtual"] = lambda datasets, parent_group, name: combine_virtual(self.wrapper, self.wrapper_index, datasets, parent_group, name)
+                replayed, skipped = replay(operations, handlers)
+                self.wrapper.save = True
+                # The operations of the wrapper do not update the index, which is read again
+                self.wrapper_index = WrapperIndex(self.wrapper)
+                self.update_treeview()
+                self.update_parameters()
+                self.textBrowser_Log.append(f"Session recovered in a new file ({len(replayed)} operations replayed)")
+                for name, reason in skipped:
+                    self.textBrowser_Log.append(f"<b>Error</b>: the operation {name} could not be replayed: {reason}")
+            return
+
     def remove_data(self):
         """Removes the selected element from the HDF5 file.
         """
-        confirm = qtw.QMessageBox.question(self, "Remove element", f"Do you want to remove {self.treeview_selected} from the HDF5 file? This action cannot be undone.")
-        if confirm == qtw.QMessageBox.Yes:
-            self.wrapper.delete_element(path = self.treeview_selected)
-            self.textBrowser_Log.append(f"<i>{self.treeview_selected}</i> removed from the HDF5 file")
-            self.treeview_selected = "/".join(self.treeview_selected.split("/")[:-1])
-            self.update_treeview()
-            self.expand_treeview_path(self.treeview_selected)
+        # The link of a mounted file can be removed, not the elements of the mounted file
+        if self.check_saving() or (self.wrapper_index.get_mount(self.treeview_selected) != self.treeview_selected and self.check_mounted(self.treeview_selected)):
+            return
+        if self.check_virtual_sources(self.treeview_selected):
+            return
+        confirm = qtw.QMessageBox.question(self, "Remove element", f"Do you want to remove {self.treeview_selected} from the HDF5 file? This action cannot be undone.")
+        if confirm == qtw.QMessageBox.Yes:
+            self.wrapper.delete_element(path = self.treeview_selected)
+            self.wrapper_index.remove(self.treeview_selected)
+            self.model.remove_path(self.treeview_selected)
+            self.textBrowser_Log.append(f"<i>{self.treeview_selected}</i> removed from the HDF5 file")
+            self.treeview_selected = "/".join(self.treeview_selected.split("/")[:-1])
+            self.select_treeview_path(self.treeview_selected)
+
+    def rename_element(self):
+        """
+        Renames the selected element in the HDF5 file.
+
+        Returns
+        -------
+        None
+        """
+        if self.check_saving() or (self.wrapper_index.get_mount(self.treeview_selected) != self.treeview_selected and self.check_mounted(self.treeview_selected)):
+            return
+        new_name = qtw.QInputDialog.getText(self, "Rename element", "Enter the new name:")[0]
+        if new_name and not self.check_virtual_sources(self.treeview_selected):
+            with preserve_scales(self.wrapper, self.treeview_selected, "/".join(self.treeview_selected.split("/")[:-1])+"/"+new_name):
+                self.wrapper.change_name(path = self.treeview_selected, name = new_name)
+            self.wrapper_index.rename(self.treeview_selected, new_name)
+            self.model.rename_path(self.treeview_selected, new_name)
+            self.treeview_selected = "/".join(self.treeview_selected.split("/")[:-1])+"/"+new_name
+            self.expand_treeview_path(self.treeview_selected)
+
+    def repack(self):
+        """
+        Repacks the file in the background to give back the space of the removed elements, which HDF5 does not free. The space that can be freed is estimated first (see estimate_wasted_space) and the user chooses how the datasets are stored in the repacked file: with their current chunks and compression, or with a storage policy. The mounted files are kept as links.
+
+        Returns
+        -------
+        None
+        """
+        if self.check_saving():
+            return
+        if self.folder_importer is not None or self.consolidator is not None:
+            qtw.QMessageBox.warning(self, "Warning", "Stop watching the folder and the consolidation of the virtual dataset before repacking the file.")
+            return
+        try:
+            size, wasted = estimate_wasted_space(self.wrapper.filepath)
+        except OSError as e:
+            self.textBrowser_Log.append(f"<b>Error</b> while reading <i>{self.wrapper.filepath}</i>: {e}")
+            return
+        text = f"The file takes {size / 1e6:.1f} MB, about {wasted / 1e6:.1f} MB ({wasted / max(size, 1):.0%}) would be freed by repacking it."
+        if not is_repack_worthwhile(size, wasted):
+            text += " Repacking the file is not worthwhile unless its storage is changed."
+        dialog = ComboboxChoose(text = text + "\nChoose how the datasets are stored in the repacked file:", list_choices = [], parent = self)
+        dialog.set_choice("keep", "Keep the current chunks and compression")
+        dialog.set_choice("file", "Storage policy of the file")
+        for name in PRESETS:
+            dialog.set_choice(name, f"Storage preset \"{name}\"")
+        if dialog.exec_() != qtw.QDialog.Accepted:
+            return
+        choice = dialog.get_selected_structure()
+        policy = None
+        if choice == "file":
+            try:
+                policy = StoragePolicy.for_file(self.filepath, config_dir)
+            except (OSError, ValueError, TypeError) as e:
+                self.textBrowser_Log.append(f"<b>Error</b> while reading the storage policy, the default one is used: {e}")
+                policy = PRESETS["balanced"]
+        elif choice in PRESETS:
+            policy = PRESETS[choice]
+        self.start_save(self.wrapper.filepath, policy = policy)
+
+    def save_hdf5(self, saveas=False):
+        """
+        Save the current data to an HDF5 file.
+        The wrapper modifies the opened file in place, so saving it only makes sure that the elements modified since the last save are written on the disk, without copying the file. A new file (stored in a temporary file until it is saved) and "Save As" copy the whole file to the chosen location in the background (see FileSaver), the progress being displayed in the status bar.
+
+        Parameters
+        ----------
+        saveas : bool, optional
+            If True, a file dialog will open to select a save location. Default is False.
+
+        Returns
+        -------
+        None
+        """
+        if self.check_saving():
+            return
+        if not saveas and not is_tempfile(self.wrapper.filepath):
+            modified = self.wrapper_index.mark_saved()
+            try:
+                sync_file(self.wrapper.filepath)
+            except OSError as e:
+                self.wrapper_index.modified.update(modified)
+                self.textBrowser_Log.append(f"<b>Error</b> while saving <i>{self.wrapper.filepath}</i>: {e}")
+                return
+            self.wrapper.save = False
+            if self.journal is not None:
+                self.journal.saved(self.wrapper.filepath)
+            self.textBrowser_Log.append(f"<i>{self.wrapper.filepath}</i> has been saved ({len(modified)} elements modified since the last save)")
+            self.write_structure_cache()
+            return
+
+        # The file is copied as it is, so it must not be modified by the background jobs during the copy
+        if self.folder_importer is not None or self.consolidator is not None:
+            qtw.QMessageBox.warning(self, "Warning", "Stop watching the folder and the consolidation of the virtual dataset before saving the file to a new location.")
+            return
+        # The user is asked by the system if he wants to overwrite an existing file
+        filepath = qtw.QFileDialog.getSaveFileName(self, "Save File", "", "HDF5 Files (*.h5)")[0]
+        if not filepath:
+            return
+        if os.path.abspath(filepath) == os.path.abspath(self.wrapper.filepath):
+            self.save_hdf5()
+            return
+        self.start_save(filepath)
+
+    def saving_finished(self, done, error):
+        """
+        Opens the saved file in the wrapper at the end of a background save (see save_hdf5), the temporary file of a new file being removed, or reports the end of a repack (see repack).
+
+        Parameters
+        ----------
+        done : bool
+            True if the file has been saved, False if the save has been cancelled or has failed.
+        error : str
+            The error message, empty if there is none.
+
+        Returns
+        -------
+        None
+        """
+        saver, self.saver = self.saver, None
+        self.pb_Save.hide()
+        self.b_CancelSave.hide()
+        if done and saver.is_repack():
+            self.wrapper.need_for_repack = False
+            self.write_structure_cache()
+            self.textBrowser_Log.append(f"<i>{saver.filepath}</i> has been repacked, it now takes {os.path.getsize(saver.filepath) / 1e6:.1f} MB ({saver.n_written / 1e6:.1f} MB written at {saver.rate():.1f} MB/s)")
+        elif done:
+            if is_tempfile(saver.source):
+                try:
+                    os.remove(saver.source)
+                except OSError:
+                    pass
+            self.wrapper.filepath = saver.filepath
+            self.wrapper.save = False
+            self.filepath = saver.filepath
+            if self.journal is not None:
+                self.journal.saved(saver.filepath)
+            self.wrapper_index.mark_saved()
+            self.write_structure_cache()
+            self.textBrowser_Log.append(f"<i>{saver.filepath}</i> has been saved ({saver.n_written / 1e6:.1f} MB at {saver.rate():.1f} MB/s)")
+        elif error:
+            self.textBrowser_Log.append(f"<b>Error</b> while copying the file to <i>{saver.filepath}</i>: {error}")
+        else:
+            self.textBrowser_Log.append(f"Copy of the file to <i>{saver.filepath}</i> cancelled")
+        for path, error in saver.scale_errors:
+            self.textBrowser_Log.append(f"<b>Warning</b>: the dimension scales of <b>{path}</b> could not be copied: {error}")
+        saver.deleteLater()
+        if self.a_Swmr.isChecked():
+            self.start_swmr()
+
+    def saving_progress(self, n_written, n_bytes):
+        """
+        Displays the progress of a background save in the status bar.
+
+        Parameters
+        ----------
+        n_written : int
+            The number of bytes written.
+        n_bytes : int
+            The number of bytes to write.
+
+        Returns
+        -------
+        None
+        """
+        self.pb_Save.setValue(int(1000 * n_written / max(n_bytes, 1)))
+        self.pb_Save.setFormat(f"Saving: {n_written / 1e6:.1f} / {n_bytes / 1e6:.1f} MB ({self.saver.rate():.1f} MB/s)")
+
+    def search_index_changed(self, removed, added):
+        """
+        Launches the search again after a change of the index of the wrapper, if a search is displayed.
+
+        Parameters
+        ----------
+        removed : list of str
+            The paths removed from the index.
+        added : list of str
+            The paths added to the index.
+
+        Returns
+        -------
+        None
+        """
+        if self.le_Search.text().strip():
+            self.search_timer.start()
+
+    @qtc.Slot()
+    def search_treeview(self):
+        """
+        Filters the tree view with the text of the search box. The search index is created at the first search and then updated with each modification of the wrapper index.
+
+        Returns
+        -------
+        None
+        """
+        query = self.le_Search.text().strip()
+        if not query:
+            self.proxy_model.set_matches(None)
+            self.statusbar.clearMessage()
+            return
 
-    def rename_element(self):
+        if self.search_index is None or self.search_index.wrapper_index is not self.wrapper_index:
+            self.search_index = SearchIndex(self.wrapper_index)
+            self.wrapper_index.listeners.append(self.search_index_changed)
+
+        start = time.perf_counter()
+        matches = self.search_index.search(query)
+        duration = (time.perf_counter() - start) * 1000
+
+        # Only the first results are displayed so that the tree view stays responsive
+        displayed = sorted(matches)[:self.MAX_SEARCH_RESULTS]
+        self.proxy_model.set_matches(displayed)
+
+        # Expands the parents of the displayed results, the columns being adjusted only once at the end
+        self.treeView.blockSignals(True)
+        for parent_path in set(path.rsplit("/", 1)[0] for path in displayed if "/" in path):
+            self.expand_treeview_path(parent_path)
+        self.treeView.blockSignals(False)
+        self.adjust_treeview_columns()
+
+        message = f"{len(matches)} elements found in {duration:.1f} ms"
+        if len(matches) > len(displayed):
+            message += f", the first {len(displayed)} are displayed"
+        if self.wrapper_index.unscanned:
+            message += " (some groups of the file have not been read yet)"
+        self.statusbar.showMessage(message)
+
+    def select_treeview_path(self, path):
         """
-        Renames the selected element in the HDF5 file.
+        Selects the element at the given path in the tree view, expanding its parents, without updating the displayed parameters.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element to select.
 
         Returns
         -------
         None
         """
-        new_name = qtw.QInputDialog.getText(self, "Rename element", "Enter the new name:")[0]
-        if new_name:
-            self.wrapper.change_name(path = self.treeview_selected, name = new_name)
-            self.treeview_selected = new_name
-            self.update_treeview()
-            self.expand_treeview_path(self.treeview_selected)
+        index = self.proxy_model.index_from_path(path)
+        if not index.isValid():
+            return
+        self.expand_treeview_path("/".join(path.split("/")[:-1]))
+        selection_model = self.treeView.selectionModel()
+        selection_model.blockSignals(True)
+        selection_model.setCurrentIndex(index, qtc.QItemSelectionModel.ClearAndSelect | qtc.QItemSelectionModel.Rows)
+        selection_model.blockSignals(False)
+        self.treeView.viewport().update()
+        self.treeView.scrollTo(index)
 
-    def repack(self):
+    def set_import_processes(self, enabled):
         """
-        Repacks the wrapper to minimize its size.
+        Chooses whether the files of the bulk imports and of the watched folders are parsed by a pool of processes rather than a pool of threads (see customWorkers.ImportWorker), the choice being kept in the settings of the user. The imports running keep their pool.
+
+        Parameters
+        ----------
+        enabled : bool
+            Whether the files are parsed by processes.
 
         Returns
         -------
         None
         """
-        self.wrapper.repack(force_repack=True)
-        self.textBrowser_Log.append(f"The HDF5 file located at <i>{self.filepath}</i> has been repacked")
+        self.IMPORT_PROCESSES = enabled
+        try:
+            self.settings.set("import_processes", enabled)
+        except OSError as e:
+            self.textBrowser_Log.append(f"<b>Error</b> while saving the settings: {e}")
 
-    def save_hdf5(self, saveas=False):
+    def set_swmr(self, enabled):
         """
-        Save the current data to an HDF5 file.
+        Enables or disables the SWMR mode of the opened file (see SwmrWriter), in which other processes (the scripts given by export_code_line for example) can read the file while the interface writes it. A file in an earlier HDF5 format is converted to the latest one first, with a background copy.
 
         Parameters
         ----------
-        saveas : bool, optional
-            If True, a file dialog will open to select a save location. Default is False.
+        enabled : bool
+            Whether the SWMR mode is enabled.
 
         Returns
         -------
         None
         """
-        self.filepath = qtw.QFileDialog.getSaveFileName(self, "Save File", "", "HDF5 Files (*.h5)")[0]
-        if self.filepath:
-            # We first try to save the file, if the file already exists, then the user is asked if he wants to overwrite it by the system (not done by this code)
-            try:
-                self.wrapper.save_as_hdf5(self.filepath)
-            # If the user continues despite the system error message, we overwrite the file
-            except WrapperError_Overwrite:
-                self.wrapper.save_as_hdf5(self.filepath, overwrite = True)
-            self.textBrowser_Log.append(f"<i>{self.filepath}</i> has been saved")
+        if not enabled:
+            if self.swmr is not None:
+                self.stop_swmr()
+                self.textBrowser_Log.append(f"<i>{self.wrapper.filepath}</i> can only be read by other processes when the interface does not write it")
+            return
+        # The readers need the location of the file, and the file cannot be converted during a save
+        if is_tempfile(self.wrapper.filepath):
+            qtw.QMessageBox.warning(self, "Warning", "Save the file before enabling the live reading.")
+            self.a_Swmr.setChecked(False)
+            return
+        if self.check_saving():
+            self.a_Swmr.setChecked(False)
+            return
+        try:
+            capable = SwmrWriter.is_swmr_capable(self.wrapper.filepath)
+        except OSError as e:
+            self.textBrowser_Log.append(f"<b>Error</b> while reading <i>{self.wrapper.filepath}</i>: {e}")
+            self.a_Swmr.setChecked(False)
+            return
+        if not capable:
+            if self.folder_importer is not None or self.consolidator is not None:
+                qtw.QMessageBox.warning(self, "Warning", "Stop watching the folder and the consolidation of the virtual dataset before converting the file.")
+                self.a_Swmr.setChecked(False)
+                return
+            answer = qtw.QMessageBox.question(self, "Convert the file", "The file has to be converted to the latest HDF5 format to be read while it is written, the converted file can only be read with HDF5 1.10 or later. Do you want to convert it?", qtw.QMessageBox.Yes | qtw.QMessageBox.No)
+            if answer != qtw.QMessageBox.Yes:
+                self.a_Swmr.setChecked(False)
+                return
+            # The file is copied in the latest format in place of itself, the SWMR mode being started at the end of the copy (see saving_finished)
+            self.start_save(self.wrapper.filepath, libver = "latest")
+            return
+        self.start_swmr()
 
     def show_treeview_context_menu(self, position):
         """
@@ -1105,14 +2115,17 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
                 qtw.QMessageBox.information(self, "Not implemented", "To do")
 
             def apply_change(value):
+                if self.check_mounted(self.treeview_selected):
+                    return
                 self.wrapper.change_brillouin_type(path=self.treeview_selected, brillouin_type=value)
-                self.update_treeview()
+                self.wrapper_index.set_attribute(self.treeview_selected, "Brillouin_type", value)
+                self.model.update_path(self.treeview_selected)
                 self.expand_treeview_path("/".join(self.treeview_selected.split("/")[:-1]))
 
             edit_Brillouin_type.clear()
             actions = []
 
-            if self.wrapper.get_type(path=self.treeview_selected) == h5py._hl.group.Group:
+            if self.wrapper_index.get_type(path=self.treeview_selected) == h5py._hl.group.Group:
                 calibration = qtg.QAction("Calibration Spectrum", self)
                 calibration.triggered.connect(lambda: apply_change(value="Calibration_spectrum"))
                 actions.append(calibration)
@@ -1184,29 +2197,31 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             export_CSV.triggered.connect(self.convert_csv)
             actions.append(export_CSV)
 
-            if self.wrapper.get_type(path=self.treeview_selected) == h5py._hl.group.Group:
+            if self.wrapper_index.get_type(path=self.treeview_selected) == h5py._hl.group.Group:
                 export_HDF5 = qtg.QAction("Export group as HDF5 file", self)
                 export_HDF5.triggered.connect(self.export_HDF5_group)
                 actions.append(export_HDF5)
                 export_image = qtg.QAction("Export image", self)
                 export_image.triggered.connect(self.export_image)
                 actions.append(export_image)
-                if "Process_PSD" in self.wrapper.get_attributes(path=self.treeview_selected).keys():
+                process_PSD = self.wrapper_index.get_attribute(self.treeview_selected, "Process_PSD")
+                if process_PSD is not None:
                     export_PSD = qtg.QAction("Export PSD algorithm", self)
-                    export_PSD.triggered.connect(lambda: export_algorithm(self.wrapper.get_attributes(path=self.treeview_selected)["Process_PSD"]))
+                    export_PSD.triggered.connect(lambda: export_algorithm(process_PSD))
                     actions.append(export_PSD)
             else:
                 export_HDF5 = qtg.QAction("Export dataset as numpy array", self)
                 export_HDF5.triggered.connect(self.export_numpy_array)
                 actions.append(export_HDF5)
-                if len(self.wrapper[self.treeview_selected].shape) == 2:
+                if len(self.wrapper_index.get_shape(self.treeview_selected)) == 2:
                     export_image = qtg.QAction("Export image", self)
                     export_image.triggered.connect(self.export_image)
                     actions.append(export_image)
 
-                if "Process_PSD" in self.wrapper.get_attributes(path="/".join(self.treeview_selected.split("/")[:-1])).keys():
+                process_PSD = self.wrapper_index.get_attribute("/".join(self.treeview_selected.split("/")[:-1]), "Process_PSD")
+                if process_PSD is not None:
                     export_PSD = qtg.QAction("Export PSD algorithm", self)
-                    export_PSD.triggered.connect(lambda: export_algorithm(self.wrapper.get_attributes(path="/".join(self.treeview_selected.split("/")[:-1]))["Process_PSD"]))
+                    export_PSD.triggered.connect(lambda: export_algorithm(process_PSD))
                     actions.append(export_PSD)
 
             for action in actions:
@@ -1220,7 +2235,8 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             menu.addSeparator()
             add_group_action = menu.addAction("Add Group")
             edit_Brillouin_type = menu.addMenu("Edit Type")
-            if self.wrapper.get_type(path=self.treeview_selected, return_Brillouin_type = True) == "Root":
+            is_root = self.wrapper_index.get_type(path=self.treeview_selected, return_Brillouin_type = True) == "Root"
+            if is_root:
                 merge_group = menu.addAction("Merge Group into Dataset")
             menu.addSeparator()
             get_PSD = menu.addAction("Get Power Spectrum Density")
@@ -1230,6 +2246,23 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             export = menu.addMenu("Export")
             menu.addSeparator()
             expand = menu.addAction("Expand all children")
+            # A virtual dataset can be consolidated into a regular dataset
+            virtual = self.wrapper_index.get_type(path=self.treeview_selected) == h5py._hl.dataset.Dataset and is_virtual(self.wrapper, self.treeview_selected)
+            if virtual:
+                consolidate = menu.addAction("Consolidate virtual dataset")
+            # The elements of a mounted file are read-only, the mounted file can be materialized
+            mount = self.wrapper_index.get_mount(self.treeview_selected)
+            if mount is not None:
+                menu.addSeparator()
+                materialize_action = menu.addAction("Materialize mounted file")
+                for read_only in (add_action, add_group_action, edit_Brillouin_type.menuAction(), get_PSD, copy_frequency_axis, perform_treatment):
+                    read_only.setEnabled(False)
+                if is_root:
+                    merge_group.setEnabled(False)
+                if mount != self.treeview_selected:
+                    remove_action.setEnabled(False)
+                if virtual:
+                    consolidate.setEnabled(False)
 
             edit_Brillouin_type.aboutToShow.connect(sub_menu_Brillouin_type)
             export.aboutToShow.connect(sub_menu_export)
@@ -1248,12 +2281,292 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             elif action == copy_frequency_axis:
                 self.copy_frequency_axis()
             elif action == expand:
-                for e in self.wrapper.get_children_elements(path = self.treeview_selected):
-                    self.expand_treeview_path(f"{self.treeview_selected}/{e}")
-            elif self.wrapper.get_type(path=self.treeview_selected, return_Brillouin_type = True) == "Root" and action == merge_group:
+                self.expand_treeview_children(self.treeview_selected)
+            elif is_root and action == merge_group:
                 self.merge_group_dataset()
+            elif mount is not None and action == materialize_action:
+                self.materialize_files([mount])
+            elif virtual and action == consolidate:
+                self.consolidate_dataset(self.treeview_selected)
 
     @qtc.Slot()
+    def suggest_repack(self):
+        """
+        Proposes to repack the file before it is closed if repacking it frees enough space (see is_repack_worthwhile), the window waiting for the end of the repack.
+
+        Returns
+        -------
+        None
+        """
+        try:
+            size, wasted = estimate_wasted_space(self.wrapper.filepath)
+        except OSError:
+            return
+        if not is_repack_worthwhile(size, wasted):
+            return
+        answer = qtw.QMessageBox.question(self, "Repack the file", f"About {wasted / 1e6:.1f} MB of the {size / 1e6:.1f} MB of the file are not used anymore. Do you want to repack the file to free them?", qtw.QMessageBox.Yes | qtw.QMessageBox.No)
+        if answer != qtw.QMessageBox.Yes:
+            return
+        self.start_save(self.wrapper.filepath)
+        loop = qtc.QEventLoop()
+        self.saver.finished.connect(loop.quit)
+        loop.exec()
+
+    def start_journal(self):
+        """
+        Starts the journal of the operations made on the file of the wrapper (see SessionJournal), the journal of the previous file being closed.
+
+        Returns
+        -------
+        None
+        """
+        if self.journal is not None:
+            self.journal.close()
+        try:
+            self.journal = SessionJournal.start(os.path.join(config_dir, JOURNALS_DIRNAME), self.wrapper)
+        except OSError as e:
+            self.journal = None
+            self.textBrowser_Log.append(f"<b>Error</b> while creating the journal of the session, the session cannot be recovered if it ends unexpectedly: {e}")
+
+    def start_save(self, filepath, policy = None, libver = None):
+        """
+        Starts copying the file to a location in the background (see FileSaver), the progress being displayed in the status bar. The file is repacked if the location is the one of the file.
+        The SWMR mode is suspended during the copy and started again on the copy, which is then in the latest HDF5 format.
+
+        Parameters
+        ----------
+        filepath : str
+            The location where the file is saved.
+        policy : StoragePolicy, optional
+            The policy giving the chunks and compression of the datasets in the copy. By default, the datasets keep their storage.
+        libver : str, optional
+            The earliest version of the HDF5 format of the copy, see FileSaver. By default, the version of h5py, or the latest one in SWMR mode.
+
+        Returns
+        -------
+        None
+        """
+        # The repacked file is replaced at the end of the copy, it must not be kept open
+        self.stop_swmr()
+        if libver is None and self.a_Swmr.isChecked():
+            libver = "latest"
+        self.saver = FileSaver(self.wrapper, filepath, policy = policy, libver = libver, parent = self)
+        self.saver.progress.connect(self.saving_progress)
+        self.saver.finished.connect(self.saving_finished)
+        self.saver.start()
+        self.pb_Save.setValue(0)
+        self.pb_Save.setFormat("Preparing the copy")
+        self.pb_Save.show()
+        self.b_CancelSave.show()
+        if self.saver.is_repack():
+            self.textBrowser_Log.append(f"Repacking <i>{filepath}</i>")
+        else:
+            self.textBrowser_Log.append(f"Saving <i>{filepath}</i>")
+
+    def start_structure_scan(self):
+        """
+        Starts reading the structure of the opened file in a background thread. The index and the tree view are completed batch by batch (or corrected if the structure was loaded from the cache), the groups that are expanded before being scanned being read directly.
+
+        Returns
+        -------
+        None
+        """
+        self.stop_structure_scan()
+        if not self.wrapper_index.unscanned and not self.wrapper_index.unverified:
+            return
+
+        self.scan_thread = qtc.QThread(self)
+        self.scanner = StructureScanner(self.wrapper_index)
+        self.scanner.moveToThread(self.scan_thread)
+        self.scan_thread.started.connect(self.scanner.run)
+        self.scanner.batch_ready.connect(self.structure_scan_batch)
+        self.scanner.progress.connect(self.structure_scan_progress)
+        self.scanner.finished.connect(self.structure_scan_finished)
+
+        self.b_CancelScan.show()
+        self.statusbar.showMessage("Scanning the structure of the file")
+        self.scan_thread.start()
+
+    def start_swmr(self):
+        """
+        Opens the file in SWMR mode (see SwmrWriter), the file being flushed periodically for the readers.
+
+        Returns
+        -------
+        None
+        """
+        if self.swmr is not None:
+            return
+        self.swmr = SwmrWriter(self.wrapper.filepath, parent = self)
+        self.swmr.failed.connect(self.swmr_failed)
+        try:
+            self.swmr.start()
+        except (OSError, ValueError, RuntimeError) as e:
+            self.swmr.deleteLater()
+            self.swmr = None
+            self.a_Swmr.setChecked(False)
+            self.textBrowser_Log.append(f"<b>Error</b> while opening <i>{self.wrapper.filepath}</i> in SWMR mode: {e}")
+            return
+        self.a_Swmr.setChecked(True)
+        self.textBrowser_Log.append(f"<i>{self.wrapper.filepath}</i> can be read while it is written, by opening it with swmr = True (see \"Export code line\")")
+
+    def stop_consolidation(self):
+        """
+        Cancels the consolidation of a virtual dataset, the virtual dataset being kept.
+
+        Returns
+        -------
+        None
+        """
+        if self.consolidator is not None:
+            self.consolidator.cancel()
+
+    def stop_folder_watch(self):
+        """
+        Stops watching a folder, the files already found being imported before returning.
+
+        Returns
+        -------
+        None
+        """
+        if self.folder_importer is None:
+            return
+        importer = self.folder_importer
+        importer.stop()
+        self.folder_importer = None
+        importer.deleteLater()
+        self.folder_watch_timer.stop()
+        self.b_StopWatch.hide()
+        self.a_WatchFolder.setEnabled(True)
+        self.update_treeview_path(importer.parent_group)
+        self.textBrowser_Log.append(f"Stopped watching <i>{importer.directory}</i>: {importer.n_written} files added, {importer.n_skipped} unchanged, {importer.n_failed} failed")
+        self.statusbar.showMessage(f"Stopped watching {importer.directory}", 5000)
+
+    def stop_save(self):
+        """
+        Cancels the background save of the file, the file at the chosen location being left untouched.
+
+        Returns
+        -------
+        None
+        """
+        if self.saver is not None:
+            self.saver.cancel()
+
+    def stop_structure_scan(self):
+        """
+        Stops the background scan of the structure of the file if one is running. The groups that have not been scanned are read when they are expanded.
+
+        Returns
+        -------
+        None
+        """
+        if self.scanner is None:
+            return
+        self.scanner.cancel()
+        self.scan_thread.quit()
+        self.scan_thread.wait()
+        self.scanner.deleteLater()
+        self.scan_thread.deleteLater()
+        self.scanner = None
+        self.scan_thread = None
+        self.b_CancelScan.hide()
+        self.statusbar.showMessage("Scan of the structure cancelled, the remaining groups will be read when they are expanded", 5000)
+
+    @qtc.Slot(object)
+    def stop_swmr(self):
+        """
+        Closes the file opened in SWMR mode, if any.
+
+        Returns
+        -------
+        None
+        """
+        if self.swmr is None:
+            return
+        self.swmr.close()
+        self.swmr.deleteLater()
+        self.swmr = None
+
+    def structure_scan_batch(self, batch):
+        """
+        Adds a batch of groups read by the structure scan to the index and updates the tree view.
+
+        Parameters
+        ----------
+        batch : dict
+            The children of the scanned groups, with the paths of the groups as keys.
+
+        Returns
+        -------
+        None
+        """
+        if self.sender() is not self.scanner:
+            return
+        scanned = [path for path, children in batch.items() if self.wrapper_index.add_scanned(path, children)]
+        self.model.update_scanned(scanned)
+
+    @qtc.Slot(bool)
+    def structure_scan_finished(self, complete):
+        """
+        Ends the structure scan.
+
+        Parameters
+        ----------
+        complete : bool
+            Whether the whole file has been read.
+
+        Returns
+        -------
+        None
+        """
+        if self.sender() is not self.scanner:
+            return
+        n_groups, n_datasets = self.scanner.n_groups, self.scanner.n_datasets
+        self.stop_structure_scan()
+        if complete:
+            self.statusbar.showMessage(f"Structure of the file read: {n_groups} groups / {n_datasets} datasets", 5000)
+            self.write_structure_cache()
+        else:
+            self.statusbar.showMessage("Scan of the structure interrupted, the remaining groups will be read when they are expanded", 5000)
+
+    @qtc.Slot(int, int)
+    def structure_scan_progress(self, n_groups, n_datasets):
+        """
+        Displays the progress of the structure scan in the status bar.
+
+        Parameters
+        ----------
+        n_groups : int
+            The number of groups found.
+        n_datasets : int
+            The number of datasets found.
+
+        Returns
+        -------
+        None
+        """
+        if self.sender() is not self.scanner:
+            return
+        self.statusbar.showMessage(f"Scanned {n_groups} groups / {n_datasets} datasets")
+
+    def swmr_failed(self, error):
+        """
+        Reports that the file opened in SWMR mode could not be flushed, the SWMR mode being disabled.
+
+        Parameters
+        ----------
+        error : str
+            The error message.
+
+        Returns
+        -------
+        None
+        """
+        self.stop_swmr()
+        self.a_Swmr.setChecked(False)
+        self.textBrowser_Log.append(f"<b>Error</b> while flushing <i>{self.wrapper.filepath}</i>, the SWMR mode is disabled: {error}")
+
     def table_view_dragEnterEvent(self, event: qtg.QDragEnterEvent):
         """
         Handle the drag enter event for the table view.
@@ -1312,7 +2625,10 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             elif len(urls) == 1:
                 url = urls[0]
                 if os.path.splitext(url)[1] in [".csv", ".xlsx",".xls"]: 
-                    if len(self.wrapper.get_children_elements(self.treeview_selected))>1:
+                    if self.check_mounted(self.treeview_selected):
+                        event.accept()
+                        return
+                    if len(self.wrapper_index.get_children_elements(self.treeview_selected))>1:
                         response = qtw.QMessageBox.information(self, "Warning", "Do you want to update the properties of each element of the selected group or dataset?", qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
                         if response == qtw.QMessageBox.Yes:
                             self.update_parameters(filepath = url, delete_child_attributes = True) # Verify that the file is a .csv file
@@ -1362,14 +2678,14 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         -------
         None
         """
-        if event.mimeData().hasUrls() or event.mimeData().hasText():
+        if event.mimeData().hasUrls() or event.mimeData().hasText() or event.mimeData().hasFormat("application/x-brillouin-path"):
             index = self.treeView.indexAt(event.pos())
             if index.isValid():
-                if self.current_hover_index != index:  # If a new item is hovered
+                path = index.siblingAtColumn(0).data(qtc.Qt.UserRole)
+                if self.current_hover_path != path:  # If a new item is hovered
                     self.hover_timer.stop()  # Stop any previous timers
-                    self.current_hover_index = index  # Update the current item
-                    item = self.model.itemFromIndex(index)
-                    if item.hasChildren():
+                    self.current_hover_path = path  # Update the current item
+                    if self.proxy_model.hasChildren(index.siblingAtColumn(0)):
                         self.hover_timer.start(500)  # Start a 0.5-second timer
             event.accept()
         elif event.mimeData().hasFormat("application/x-brillouin-path"):
@@ -1383,12 +2699,11 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         Handle the drop event for the tree view.
         """
         self.hover_timer.stop()
-        self.current_hover_index = None
+        self.current_hover_path = None
 
         # Get the target item and path
         index = self.treeView.indexAt(event.pos())
-        target_item = self.model.itemFromIndex(index) if index.isValid() else None
-        target_path = target_item.data(qtc.Qt.UserRole) if target_item else "Brillouin"
+        target_path = index.siblingAtColumn(0).data(qtc.Qt.UserRole) if index.isValid() else "Brillouin"
 
         if event.mimeData().hasUrls():
             # External file drop
@@ -1399,69 +2714,91 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         elif event.mimeData().hasFormat("application/x-brillouin-path"):
             # Internal tree drag-drop
             dragged_path = str(event.mimeData().data("application/x-brillouin-path"), encoding='utf-8')
-            self.wrapper.move(path = dragged_path, new_path = target_path)
+            # Moving an element copies it, the mounted files would be copied in the file
+            if self.wrapper_index.get_mount(dragged_path) is not None or self.wrapper_index.get_mounts(dragged_path):
+                qtw.QMessageBox.warning(self, "Mounted file", f"{dragged_path} is or contains a mounted HDF5 file and cannot be moved. Materialize the mounted file to move it.")
+                event.ignore()
+                return
+            if self.check_mounted(target_path) or self.check_virtual_sources(dragged_path):
+                event.ignore()
+                return
+            # Wrapper.move copies the children of the moved element one by one, the dimension scales being attached again by path
+            with preserve_scales(self.wrapper, dragged_path, target_path+"/"+dragged_path.split("/")[-1]):
+                self.wrapper.move(path = dragged_path, new_path = target_path)
+            self.wrapper_index.move(dragged_path, target_path)
+            self.model.move_path(dragged_path, target_path)
             self.treeview_selected = target_path+"/"+dragged_path.split("/")[-1]
-            self.update_treeview()
             self.update_parameters()
-            self.expand_treeview_path(self.treeview_selected)
+            self.select_treeview_path(self.treeview_selected)
             event.accept()
 
         else:
             event.ignore()
     
     @qtc.Slot()
-    def treeview_element_changed(self, topLeft, bottomRight, roles):
+    def treeview_element_changed(self, path, column, new_value):
         """
-        Handle the event when a tree view element is changed.
+        Handle the event when a tree view element is edited: the change is applied to the wrapper and then to the row of the element.
 
         Parameters
         ----------
-        topLeft : QModelIndex
-            The top-left index of the changed data in the model.
-        bottomRight : QModelIndex
-            The bottom-right index of the changed data in the model.
-        roles : list
-            The roles that triggered the change.
+        path : str
+            The path of the edited element.
+        column : int
+            The edited column (0: name, 1: sample, 2: date).
+        new_value : str
+            The new value entered in the tree view.
 
         Returns
         -------
         None
         """
-        # Ensure we're detecting edits, not just selection changes
-        if qtc.Qt.EditRole in roles:
-            column = topLeft.column()
-            new_value = topLeft.data(qtc.Qt.EditRole)
+        self.treeview_selected = path
+        # Only the link of a mounted file can be renamed
+        if self.check_saving() or ((column != 0 or self.wrapper_index.get_mount(path) != path) and self.check_mounted(path)) or (column == 0 and self.check_virtual_sources(path)):
+            self.model.update_path(path)
+            return
 
-            # Handle changes based on the column
-            if column == 0:  # Name column
+        # Handle changes based on the column
+        if column == 0:  # Name column
+            with preserve_scales(self.wrapper, self.treeview_selected, "/".join(self.treeview_selected.split("/")[:-1])+"/"+new_value):
                 self.wrapper.change_name(path=self.treeview_selected, name=new_value)
-                self.treeview_selected = "/".join(self.treeview_selected.split("/")[:-1])+"/"+new_value
-            elif column == 1:  # Sample column
-                try:
-                    self.wrapper.update_property(name = "MEASURE.Sample", value = new_value, path=self.treeview_selected)
-                except WrapperError_ArgumentType as e:
-                    apply_all = qtw.QMessageBox.question(self, "Apply to all sub-groups?", f"Do you want to apply this change to all the sub-elements of the selected group?", qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
-                    if apply_all == qtw.QMessageBox.Yes:
-                        self.wrapper.update_property(name = "MEASURE.Sample", value = new_value, path=self.treeview_selected, apply_to_all = True)
-                    elif apply_all == qtw.QMessageBox.Cancel:
-                        return
-                    else:
-                        self.wrapper.update_property(name = "MEASURE.Sample", value = new_value, path=self.treeview_selected, apply_to_all=False)
-            elif column == 2:  # Date column
-                try:
-                    self.wrapper.update_property(name = "MEASURE.Date_of_measure", value = new_value, path=self.treeview_selected)
-                except WrapperError_ArgumentType as e:
-                    apply_all = qtw.QMessageBox.question(self, "Apply to all sub-groups?", f"Do you want to apply this change to all the sub-elements of the selected group?", qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
-                    if apply_all == qtw.QMessageBox.Yes:
-                        self.wrapper.update_property(name = "MEASURE.Date_of_measure", value = new_value, path=self.treeview_selected, apply_to_all = True)
-                    elif apply_all == qtw.QMessageBox.Cancel:
-                        return
-                    else:
-                        self.wrapper.update_property(name = "MEASURE.Date_of_measure", value = new_value, path=self.treeview_selected, apply_to_all=False)
+            self.wrapper_index.rename(self.treeview_selected, new_value)
+            self.model.rename_path(self.treeview_selected, new_value)
+            self.treeview_selected = "/".join(self.treeview_selected.split("/")[:-1])+"/"+new_value
+        elif column == 1:  # Sample column
+            try:
+                self.wrapper.update_property(name = "MEASURE.Sample", value = new_value, path=self.treeview_selected)
+                self.wrapper_index.set_attribute(self.treeview_selected, "MEASURE.Sample", new_value)
+            except WrapperError_ArgumentType as e:
+                apply_all = qtw.QMessageBox.question(self, "Apply to all sub-groups?", f"Do you want to apply this change to all the sub-elements of the selected group?", qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
+                if apply_all == qtw.QMessageBox.Yes:
+                    self.wrapper.update_property(name = "MEASURE.Sample", value = new_value, path=self.treeview_selected, apply_to_all = True)
+                    self.wrapper_index.refresh(self.treeview_selected)
+                elif apply_all == qtw.QMessageBox.Cancel:
+                    return
+                else:
+                    self.wrapper.update_property(name = "MEASURE.Sample", value = new_value, path=self.treeview_selected, apply_to_all=False)
+                    self.wrapper_index.set_attribute(self.treeview_selected, "MEASURE.Sample", new_value)
+        elif column == 2:  # Date column
+            try:
+                self.wrapper.update_property(name = "MEASURE.Date_of_measure", value = new_value, path=self.treeview_selected)
+                self.wrapper_index.set_attribute(self.treeview_selected, "MEASURE.Date_of_measure", new_value)
+            except WrapperError_ArgumentType as e:
+                apply_all = qtw.QMessageBox.question(self, "Apply to all sub-groups?", f"Do you want to apply this change to all the sub-elements of the selected group?", qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
+                if apply_all == qtw.QMessageBox.Yes:
+                    self.wrapper.update_property(name = "MEASURE.Date_of_measure", value = new_value, path=self.treeview_selected, apply_to_all = True)
+                    self.wrapper_index.refresh(self.treeview_selected)
+                elif apply_all == qtw.QMessageBox.Cancel:
+                    return
+                else:
+                    self.wrapper.update_property(name = "MEASURE.Date_of_measure", value = new_value, path=self.treeview_selected, apply_to_all=False)
+                    self.wrapper_index.set_attribute(self.treeview_selected, "MEASURE.Date_of_measure", new_value)
 
-            self.update_treeview()
-            self.expand_treeview_path(self.treeview_selected)
-            self.update_parameters()
+        # The sample and date are inherited by the children of the element, so the whole loaded subtree is synchronized
+        self.model.update_path(self.treeview_selected)
+        self.expand_treeview_path(self.treeview_selected)
+        self.update_parameters()
 
     @qtc.Slot()
     def treeview_handle_drops_files(self, filepaths = None, parent_path = None):
@@ -1503,11 +2840,11 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             # If we are dealing with HDF5 files, we first clarify if we want to add the data to the opened file or create a new one
             if extensions[0] in [".hdf5", ".h5"]:
                 # If the opened file is empty, we open the selected HDF5 file
-                if len(self.wrapper.get_children_elements()) == 0:
+                added = filepaths
+                if len(self.wrapper_index.get_children_elements()) == 0:
                     if len(filepaths) == 1:
                         self.open_hdf5(filepath = filepaths[0])
-                    else:
-                        self.wrapper.add_hdf5(filepath = filepaths[0], parent_group = self.treeview_selected)
+                        added = []
                 else:
                     dialog = qtw.QMessageBox.question(self, "Precisions", "Do you want to add the data to the opened file (Yes) or create a new one (No)?", qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
                     if dialog == qtw.QMessageBox.No: # The user wants to create a new file
@@ -1516,13 +2853,34 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
                         except WrapperError_Save:
                             if not self.handle_error_save(): 
                                 return # If the user decides to cancel his action at this point, the function ends
+                        self.stop_swmr()
+                        self.a_Swmr.setChecked(False)
                         self.wrapper = wrapper.Wrapper(filepaths[0])
+                        self.wrapper_index = WrapperIndex(self.wrapper)
+                        self.start_journal()
                         self.treeview_selected = "Brillouin"
+                        added = filepaths[1:]
                     elif dialog == qtw.QMessageBox.Cancel:
                         return
-                for filepath in filepaths[1:]:
-                    self.wrapper.add_hdf5(filepath = filepath, parent_group = self.treeview_selected)
-                self.update_treeview()
+                if added:
+                    if self.check_mounted(self.treeview_selected):
+                        return
+                    # The files can be mounted (external links, nothing is copied) or copied in the file
+                    dialog = qtw.QMessageBox.question(self, "Precisions", "Do you want to mount the files, their data being read from them without being copied (Yes), or to copy their data in the opened file (No)? The mounted files can be materialized later.", qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
+                    if dialog == qtw.QMessageBox.Cancel:
+                        return
+                    if dialog == qtw.QMessageBox.Yes:
+                        self.mount_files(added, self.treeview_selected)
+                        return
+                    # The files are added in the selected group, or in the parent group of the selected dataset
+                    parent_group = self.treeview_selected
+                    if self.wrapper_index.get_type(path = parent_group) is not h5py._hl.group.Group:
+                        parent_group = "/".join(parent_group.split("/")[:-1])
+                    for filepath in added:
+                        with preserve_scales(self.wrapper, "Brillouin", f"{parent_group}/{os.path.basename(filepath).split('.')[0]}", source = filepath):
+                            self.wrapper.add_hdf5(filepath = filepath, parent_group = parent_group)
+                self.wrapper_index.refresh(self.treeview_selected)
+                self.update_treeview_path(self.treeview_selected)
                 self.update_parameters()
                 self.expand_treeview_path(self.treeview_selected)
             else:
@@ -1588,12 +2946,12 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             # Extract the element to plot
             temp = self.treeview_selected.split("/")
             while len(temp) > 1:
-                if self.wrapper.get_type(path = "/".join(temp), return_Brillouin_type = True) == "Measure":
+                if self.wrapper_index.get_type(path = "/".join(temp), return_Brillouin_type = True) == "Measure":
                     break
                 temp = temp[:-1]
             if len(temp) == 0: return
             parent_path = "/".join(temp) + "/" + treatment
-            childs = self.wrapper.get_children_elements(parent_path)
+            childs = self.wrapper_index.get_children_elements(parent_path)
 
             # Adjust the value selected in the combobox to the Brillouin type of the element
             if " Error" in element: 
@@ -1603,7 +2961,7 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
 
             # Goes through the children elements of the selected group and plot the one with the correct type
             for child in childs:
-                if self.wrapper.get_type(path=f"{parent_path}/{child}", return_Brillouin_type=True) == element:
+                if self.wrapper_index.get_type(path=f"{parent_path}/{child}", return_Brillouin_type=True) == element:
                     # Extract the element
                     elt = self.wrapper[f"{parent_path}/{child}"]
 
@@ -1700,21 +3058,21 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
                 return
             
             # If the parent is a group, check it is either a treatment or a measure group
-            if self.wrapper.get_type(path=parent_path) == h5py._hl.group.Group:
-                if self.wrapper.get_type(path=parent_path, return_Brillouin_type = True) == "Measure": 
+            if self.wrapper_index.get_type(path=parent_path) == h5py._hl.group.Group:
+                if self.wrapper_index.get_type(path=parent_path, return_Brillouin_type = True) == "Measure": 
                     pass
-                elif self.wrapper.get_type(path=parent_path, return_Brillouin_type = True) == "Treatment": 
+                elif self.wrapper_index.get_type(path=parent_path, return_Brillouin_type = True) == "Treatment": 
                     pass
                 else: 
                     activate_all(state = False)
                     return
                 
             # Treatments are stored in groups under measure groups, therefore we make sure the parent group is a measure group
-            while self.wrapper.get_type(path=parent_path, return_Brillouin_type = True) != "Measure":
+            while self.wrapper_index.get_type(path=parent_path, return_Brillouin_type = True) != "Measure":
                 parent_path = "/".join(parent_path.split("/")[:-1])
 
             # And then we can extract the different treatments that have been stored in the parent group
-            treatments = self.wrapper.get_children_elements(parent_path, Brillouin_type="Treatment")
+            treatments = self.wrapper_index.get_children_elements(parent_path, Brillouin_type="Treatment")
             self.cb_Treatment.clear()
 
             # If no treatment exist, disable the combobox and the plots
@@ -1742,11 +3100,12 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             overwrite = True if overwrite == qtw.QMessageBox.Yes else False
 
             # Update the attributes of the file with the properties from the file
-            if self.wrapper.get_type(self.treeview_selected) != h5py._hl.group.Group:
+            if self.wrapper_index.get_type(self.treeview_selected) != h5py._hl.group.Group:
                 path = "/".join(self.treeview_selected.split("/")[:-1])
             else: 
                 path = self.treeview_selected
             self.wrapper.import_properties_data(filepath = filepath, path = path, overwrite = overwrite, delete_child_attributes = delete_child_attributes)
+            self.wrapper_index.refresh(path)
 
         # Extract the attributes of the element selected
         attr = self.wrapper.get_attributes(self.treeview_selected)
@@ -1760,6 +3119,9 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         self.model_table_Other.setHorizontalHeaderLabels(["Parameter", "Value", "Units"])
 
         for k, v in attr.items():
+            # The attributes of the HDF5 dimension scales (references between the datasets and their abscissas) are not displayed
+            if k in DIMENSION_SCALE_ATTRIBUTES:
+                continue
             try:
                 if "." in k:
                     cat, name = k.split(".")
@@ -1828,6 +3190,10 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
             
             return attr
 
+        if self.check_mounted(self.treeview_selected):
+            self.update_parameters()
+            return
+
         # Get the parameters of the table view and of the wrapper
         attr_table = create_parameter_dictionnary_from_table_view(self)
         attr_wrapper = self.wrapper.get_attributes(path=self.treeview_selected)
@@ -1837,14 +3203,16 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
 
         # Update the wrapper attributes to have all the attributes of the specified version
         for k, v in attr_changed.items():
-            if self.wrapper.get_type(path=self.treeview_selected) == h5py._hl.group.Group:
+            if self.wrapper_index.get_type(path=self.treeview_selected) == h5py._hl.group.Group:
                 path = self.treeview_selected
             else: 
                 path = "/".join(self.treeview_selected.split("/")[:-1])
             self.wrapper.update_property(name = k, value = v, path = path)
+            self.wrapper_index.set_attribute(path, k, v)
         
         self.update_parameters()
-        self.update_treeview()
+        if attr_changed:
+            self.model.update_path(path)
         self.expand_treeview_path(self.treeview_selected)
 
         self.textBrowser_Log.append(f"Parameters of <b>{self.treeview_selected}</b> have been updated")
@@ -1854,84 +3222,30 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         """
         Update the tree view with the current wrapper.
         """
-        def add_child(element, parent, path):
-            item_path = f"{path}/{element}"
-            attributes = self.wrapper.get_attributes(path = item_path)
-            name, date, sample = element, '', ''
-            if "MEASURE.Date_of_measure" in attributes.keys(): date = attributes["MEASURE.Date_of_measure"]
-            if "MEASURE.Sample" in attributes.keys(): sample = attributes["MEASURE.Sample"]
-            if "Brillouin_type" in attributes.keys(): brillouin_type = attributes["Brillouin_type"]
-            item = qtg.QStandardItem(name)
-            item.setData(item_path, qtc.Qt.UserRole)
-            set_icon_brillouin_type(item, brillouin_type) # Set an icon for the item
-
-            if self.wrapper.get_type(path=item_path) == h5py._hl.group.Group:
-                for e in self.wrapper.get_children_elements(path = item_path):
-                    add_child(e, item, item_path)
-            parent.appendRow([item, qtg.QStandardItem(sample), qtg.QStandardItem(date)])
-
-        def set_icon_brillouin_type(item, brillouin_type):
-            directory = "assets/images"
-            if "Abscissa" in brillouin_type: 
-                item.setIcon(qtg.QIcon(f"{directory}/Abscissa.png"))
-            if brillouin_type == "Amplitude":
-                item.setIcon(qtg.QIcon(f"{directory}/Amplitude.png"))
-            if brillouin_type == "Amplitude_err": 
-                item.setIcon(qtg.QIcon(f"{directory}/Amplitude_error.png"))
-            if brillouin_type == "BLT":
-                item.setIcon(qtg.QIcon(f"{directory}/BLT.png"))
-            if brillouin_type == "BLT_err": 
-                item.setIcon(qtg.QIcon(f"{directory}/BLT_error.png"))
-            elif brillouin_type == "Frequency": 
-                item.setIcon(qtg.QIcon(f"{directory}/Frequency.png"))
-            elif brillouin_type == "Linewidth_err": 
-                item.setIcon(qtg.QIcon(f"{directory}/Gamma_error.png"))
-            elif brillouin_type == "Linewidth": 
-                item.setIcon(qtg.QIcon(f"{directory}/Gamma.png")) 
-            elif brillouin_type == "PSD": 
-                item.setIcon(qtg.QIcon(f"{directory}/PSD.png"))    
-            elif brillouin_type == "Raw_data": 
-                item.setIcon(qtg.QIcon(f"{directory}/Raw_data.png")) 
-            elif brillouin_type == "Shift_err": 
-                item.setIcon(qtg.QIcon(f"{directory}/Nu_error.png"))  
-            elif brillouin_type == "Shift": 
-                item.setIcon(qtg.QIcon(f"{directory}/Nu.png"))  
-
-            elif brillouin_type == "Calibration_spectrum": 
-                item.setIcon(qtg.QIcon(f"{directory}/Calibration.png"))  
-            elif brillouin_type == "Impulse_response": 
-                item.setIcon(qtg.QIcon(f"{directory}/Impulse_response.png"))  
-            elif brillouin_type == "Measure": 
-                item.setIcon(qtg.QIcon(f"{directory}/Measure.png"))   
-            elif brillouin_type == "Root": 
-                item.setIcon(qtg.QIcon(f"{directory}/Root.png"))   
-            elif brillouin_type == "Treatment": 
-                item.setIcon(qtg.QIcon(f"{directory}/Treatment.png"))  
-        
         # Retrieve the current column widths from the existing model
         column_widths = []
         if self.treeView.model() is not None:
             for column in range(self.treeView.model().columnCount()):
                 column_widths.append(self.treeView.columnWidth(column))
 
-        # Create a model with 3 columns
-        self.model = MyStandardItemModel()
-        self.model.setHorizontalHeaderLabels(["Name", "Sample", "Date"])
+        # Makes sure the index corresponds to the current wrapper
+        if self.wrapper_index is None or self.wrapper_index.wrapper is not self.wrapper:
+            self.wrapper_index = WrapperIndex(self.wrapper)
 
-        # Add first item
-        name, date, sample = "Brillouin", "", ""
-        if "MEASURE.Sample" in self.wrapper.get_attributes().keys(): sample = self.wrapper.get_attributes()["MEASURE.Sample"]
-        if "MEASURE.Date_of_measure" in self.wrapper.get_attributes().keys(): date = self.wrapper.get_attributes()["MEASURE.Date_of_measure"]
-        item = qtg.QStandardItem(name)
-        item.setData("Brillouin", qtc.Qt.UserRole)
-    
-        # Add all other elements recursively
-        for e in self.wrapper.get_children_elements(): 
-            add_child(e, item, "Brillouin") 
-        self.model.appendRow([item, qtg.QStandardItem(sample), qtg.QStandardItem(date)])
+        # Stops the scan of a file that is not displayed anymore
+        if self.scanner is not None and self.scanner.wrapper_index is not self.wrapper_index:
+            self.stop_structure_scan()
 
-        # Set the model to the TreeView
-        self.treeView.setModel(self.model)
+        # Create the model, the nodes of the children of each group are only created when the group is expanded
+        old_models = (self.model, self.proxy_model) if self.treeView.model() is not None else ()
+        self.model = HDF5TreeModel(self.wrapper_index, self)
+
+        # Set the model to the TreeView through the proxy model filtering the results of the search
+        self.proxy_model = HDF5FilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+        self.treeView.setModel(self.proxy_model)
+        for old_model in old_models:
+            old_model.deleteLater()
 
         # Adjust column widths to fit the largest size encountered
         try:
@@ -1940,11 +3254,8 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         except:
             pass
 
-        # When a data is changed in the treeview, the function treeview_element_changed is called
-        self.model.dataChanged.connect(self.treeview_element_changed)
-
-        # Collapse all items for visibility
-        self.treeView.collapseAll()
+        # When an element is edited in the treeview, the function treeview_element_changed is called
+        self.model.edited.connect(self.treeview_element_changed)
 
         # Optional: Adjust column widths
         self.treeView.header().setStretchLastSection(False)
@@ -1963,6 +3274,10 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         self.treeView.dragMoveEvent = self.treeView_dragMoveEvent
         self.treeView.dropEvent = self.treeView_dropEvent
 
+        # Applies the current search to the new model
+        if self.le_Search.text().strip():
+            self.search_treeview()
+
         # Activate buttons
         self.activate_buttons()
         self.activate_menu()
@@ -1981,3 +3296,96 @@ class MainWindow(qtw.QMainWindow, Ui_w_Main):
         self.tableView_Spectrometer.dragEnterEvent = self.table_view_dragEnterEvent
         self.tableView_Spectrometer.dragMoveEvent = self.table_view_dragMoveEvent
         self.tableView_Spectrometer.dropEvent = self.table_view_dropEvent
+
+    def update_treeview_path(self, path):
+        """
+        Update the rows of the tree view corresponding to an element after it has been modified, created or deleted, without rebuilding the whole tree view. The index of the wrapper has to be updated before calling this function.
+
+        Parameters
+        ----------
+        path : str
+            The path of the modified element.
+
+        Returns
+        -------
+        None
+        """
+        # If a new wrapper has been created, the model has to be created again
+        if self.model.wrapper_index is not self.wrapper_index:
+            self.update_treeview()
+        else:
+            self.model.update_path(path)
+
+    def watch_folder(self, directory = None, parent_path = None, extension = None):
+        """
+        Imports the files written in a folder into a group while they are written, for example during an acquisition. The files already in the folder are imported first, then the new files are imported as they appear, until stop_folder_watch is called. The files are loaded with the creator and parameters chosen for the first file.
+
+        Parameters
+        ----------
+        directory : str, optional
+            The path of the folder to watch. If None, a dialog opens to select it.
+        parent_path : str, optional
+            The group where the files are imported. If None, the selected group is used.
+        extension : str, optional
+            The extension of the files to import. If None, the user chooses it among the extensions of the files of the folder.
+
+        Returns
+        -------
+        None
+        """
+        if directory is None:
+            directory = qtw.QFileDialog.getExistingDirectory(self, "Choose the folder to watch")
+            if not directory: return
+        if parent_path is None:
+            parent_path = self.treeview_selected
+        # Makes sure to add the data to a group, even if a dataset is selected
+        if self.wrapper_index.get_type(parent_path) != h5py._hl.group.Group:
+            parent_path = "/".join(parent_path.split("/")[:-1])
+        if self.check_mounted(parent_path):
+            return
+
+        if extension is None:
+            extensions = sorted({os.path.splitext(f)[1] for f in os.listdir(directory) if os.path.splitext(f)[1] and f not in DirectoryIndexer.IGNORED_NAMES})
+            if extensions:
+                dialog = ComboboxChoose(text = "Choose the extension of the files to import", list_choices = extensions, parent = self)
+                if dialog.exec_() != qtw.QDialog.Accepted: return
+                extension = dialog.get_selected_structure()
+            else:
+                extension, ok = qtw.QInputDialog.getText(self, "Watch folder", "The folder is empty, extension of the files to import:")
+                if not ok or not extension.strip(): return
+                extension = extension.strip()
+                if not extension.startswith("."): extension = "." + extension
+
+        self.stop_folder_watch()
+        try:
+            policy = StoragePolicy.for_file(self.filepath, config_dir)
+        except (OSError, ValueError, TypeError) as e:
+            self.textBrowser_Log.append(f"<b>Error</b> while reading the storage policy, the default one is used: {e}")
+            policy = None
+        writer = BatchWriter(self.wrapper, self.wrapper_index, policy = policy)
+        self.folder_importer = FolderImporter(directory, extension, parent_path, writer, processes = self.IMPORT_PROCESSES, parent = self)
+        self.folder_importer.loader_needed.connect(self.folder_watch_loader)
+        self.folder_importer.files_written.connect(self.folder_watch_written)
+        self.folder_importer.files_failed.connect(self.folder_watch_failed)
+        self.folder_importer.files_warned.connect(self.folder_watch_warned)
+        self.folder_importer.start()
+
+        self.b_StopWatch.show()
+        self.a_WatchFolder.setEnabled(False)
+        self.textBrowser_Log.append(f"Watching <i>{directory}</i>: the {extension} files are added to <b>{parent_path}</b>")
+        self.statusbar.showMessage(f"Watching {directory}")
+
+    def write_structure_cache(self):
+        """
+        Stores the structure of the opened file in the cache directory, so that it does not have to be read again the next time the file is opened. Temporary files are not cached.
+
+        Returns
+        -------
+        None
+        """
+        if not self.filepath or self.wrapper_index is None:
+            return
+        try:
+            self.wrapper_index.write_cache(cache_dir)
+        except OSError as e:
+            self.textBrowser_Log.append(f"The structure of the file could not be cached: {e}")
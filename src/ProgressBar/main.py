@@ -5,13 +5,33 @@ from PySide6 import QtGui as qtg
 from ProgressBar.UI.progress_bar_ui import Ui_Form
 
 class ProgressBar(qtw.QDialog, Ui_Form):
-    def __init__(self, text, parent=None):
+    # Emitted when the user cancels the process (only if the dialog was created with cancellable = True)
+    cancelled = qtc.Signal()
+
+    def __init__(self, text, parent=None, cancellable=False):
         super().__init__(parent)
         self.setupUi(self)
 
         self.progressBar.setRange(0, 100)
         self.tB_Log.append(text)
 
+        # Adds a button to cancel the process, closing the dialog also cancels the process
+        self.cancellable = cancellable
+        if cancellable:
+            self.b_Cancel = qtw.QPushButton("Cancel", self)
+            self.b_Cancel.clicked.connect(self.cancel)
+            self.gridLayout.addWidget(self.b_Cancel, 3, 2, 1, 1)
+
+    def cancel(self):
+        if self.cancellable and self.b_Cancel.isEnabled():
+            self.b_Cancel.setEnabled(False)
+            self.tB_Log.append("Cancelling...")
+            self.cancelled.emit()
+
+    def reject(self):
+        self.cancel()
+        super().reject()
+
     def update_progress(self, value, log_message=None):
         self.progressBar.setValue(value)
         if log_message:
@@ -0,0 +1,583 @@
+import os
+from PySide6 import QtCore as qtc
+from PySide6 import QtGui as qtg
+
+from wrapperIndex import HDF5_group
+
+ICONS_DIRECTORY = "assets/images"
+
+# Correspondance between the Brillouin type of an element and the icon displayed in the tree view
+BRILLOUIN_TYPE_ICONS = {"Amplitude": "Amplitude.png",
+                        "Amplitude_err": "Amplitude_error.png",
+                        "BLT": "BLT.png",
+                        "BLT_err": "BLT_error.png",
+                        "Frequency": "Frequency.png",
+                        "Linewidth": "Gamma.png",
+                        "Linewidth_err": "Gamma_error.png",
+                        "PSD": "PSD.png",
+                        "Raw_data": "Raw_data.png",
+                        "Shift": "Nu.png",
+                        "Shift_err": "Nu_error.png",
+                        "Calibration_spectrum": "Calibration.png",
+                        "Impulse_response": "Impulse_response.png",
+                        "Measure": "Measure.png",
+                        "Root": "Root.png",
+                        "Treatment": "Treatment.png"}
+
+class TreeNode:
+    """Node of the HDF5TreeModel, storing the information displayed for one element of the HDF5 file.
+
+    Attributes
+    ----------
+    name : str
+        The name of the element.
+    path : str
+        The path of the element in the HDF5 file, in the form "Brillouin/Group/...".
+    parent : TreeNode or None
+        The parent node.
+    is_group : bool
+        Whether the element is a group or a dataset.
+    brillouin_type : str
+        The Brillouin type of the element.
+    sample : str
+        The value of the "MEASURE.Sample" attribute of the element (inherited from its parents if not defined).
+    date : str
+        The value of the "MEASURE.Date_of_measure" attribute of the element (inherited from its parents if not defined).
+    children : list of TreeNode
+        The children that have already been fetched.
+    pending : list of str or None
+        The names of the children that have not been fetched yet. None if the children names have not been read yet.
+    row : int
+        The position of the node in the children of its parent.
+    """
+    __slots__ = ("name", "path", "parent", "is_group", "brillouin_type", "sample", "date", "children", "pending", "row")
+
+    def __init__(self, name, path, parent = None, is_group = True, brillouin_type = "Root", sample = "", date = ""):
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.is_group = is_group
+        self.brillouin_type = brillouin_type
+        self.sample = sample
+        self.date = date
+        self.children = []
+        self.pending = None if is_group else []
+        self.row = 0
+
+class HDF5TreeModel(qtc.QAbstractItemModel):
+    """Tree model displaying the structure of the HDF5 file opened by a wrapper.
+    The nodes of the children of a group are only created when the group is expanded (fetch-on-expand), by batches of FETCH_BATCH_SIZE elements, so that displaying a file with a very large number of elements does not block the interface.
+
+    The model is never rebuilt after a modification of the wrapper: the index is updated first, then the affected rows are patched with update_path, remove_path, rename_path or move_path, which keeps the expansion state of the view.
+    A QPersistentModelIndex is kept for every loaded element, with its path as key, so that the index of an element is found directly from its path.
+
+    Parameters
+    ----------
+    wrapper_index : wrapperIndex.WrapperIndex
+        The index of the wrapper whose file is displayed.
+    parent : QObject, optional
+        The parent object of the model.
+
+    Signals
+    -------
+    edited : (str, int, str)
+        Emitted when an element is edited in the view, with the path of the element, the edited column and the new value. The change has to be applied to the wrapper by the connected slot.
+    """
+    edited = qtc.Signal(str, int, str)
+
+    HEADERS = ["Name", "Sample", "Date"]
+    MIME_TYPE = "application/x-brillouin-path"
+    FETCH_BATCH_SIZE = 500
+
+    def __init__(self, wrapper_index, parent = None):
+        super().__init__(parent)
+        self.wrapper_index = wrapper_index
+        self._icons = {}
+        self._indexes = {}
+
+        # The invisible root node has a single child: the "Brillouin" group
+        self._root = TreeNode("", "", is_group = True)
+        self._root.pending = []
+        self._root.brillouin_type = ""
+        self._insert_nodes(self._root, [self._create_node("Brillouin", self._root)])
+
+    ##########################
+    #     Tree structure     #
+    ##########################
+
+    def node_from_index(self, index):
+        """Returns the node associated to an index, the invisible root node if the index is not valid.
+        """
+        if index.isValid():
+            return index.internalPointer()
+        return self._root
+
+    def index(self, row, column, parent = qtc.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return qtc.QModelIndex()
+        node = self.node_from_index(parent)
+        if row < len(node.children):
+            return self.createIndex(row, column, node.children[row])
+        return qtc.QModelIndex()
+
+    def parent(self, index = qtc.QModelIndex()):
+        if not index.isValid():
+            return qtc.QModelIndex()
+        node = index.internalPointer()
+        if node.parent is None or node.parent is self._root:
+            return qtc.QModelIndex()
+        return self.createIndex(node.parent.row, 0, node.parent)
+
+    def rowCount(self, parent = qtc.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node_from_index(parent).children)
+
+    def columnCount(self, parent = qtc.QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent = qtc.QModelIndex()):
+        node = self.node_from_index(parent)
+        if not node.is_group:
+            return False
+        if node.children:
+            return True
+        # The children have not been read yet: we assume the group has some so that it can be expanded
+        return node.pending is None or len(node.pending) > 0
+
+    ##########################
+    #     Lazy fetching      #
+    ##########################
+
+    def canFetchMore(self, parent):
+        node = self.node_from_index(parent)
+        if not node.is_group:
+            return False
+        return node.pending is None or len(node.pending) > 0
+
+    def fetchMore(self, parent):
+        node = self.node_from_index(parent)
+        if not self.canFetchMore(parent):
+            return
+
+        # The names of the children are read only once, their nodes are created batch by batch
+        if node.pending is None:
+            node.pending = self.wrapper_index.get_children_elements(node.path)
+        batch = node.pending[:self.FETCH_BATCH_SIZE]
+        new_nodes = [self._create_node(name, node) for name in batch]
+
+        if not new_nodes:
+            node.pending = []
+            return
+
+        node.pending = node.pending[len(new_nodes):]
+        self._insert_nodes(node, new_nodes)
+
+    def fetch_all(self, index):
+        """Fetches all the children of the element at the given index.
+
+        Parameters
+        ----------
+        index : QModelIndex
+            The index of the element.
+        """
+        while self.canFetchMore(index):
+            self.fetchMore(index)
+
+    def _create_node(self, name, parent):
+        """Creates the node of an element from its entry in the index, the attributes not defined on the element are inherited from its parent.
+
+        Parameters
+        ----------
+        name : str
+            The name of the element.
+        parent : TreeNode
+            The parent node.
+
+        Returns
+        -------
+        TreeNode
+            The new node.
+        """
+        path = f"{parent.path}/{name}" if parent.path else name
+        entry = self.wrapper_index.entries[path]
+        attributes = entry.attributes
+        node = TreeNode(name, path,
+                        parent = parent,
+                        is_group = entry.kind is HDF5_group,
+                        brillouin_type = str(attributes.get("Brillouin_type", parent.brillouin_type)),
+                        sample = str(attributes.get("MEASURE.Sample", parent.sample)),
+                        date = str(attributes.get("MEASURE.Date_of_measure", parent.date)))
+        # Empty groups are marked as fetched so that no expansion arrow is displayed
+        if node.is_group and len(entry.children) == 0 and self.wrapper_index.is_scanned(path):
+            node.pending = []
+        return node
+
+    ##########################
+    #   Data and edition     #
+    ##########################
+
+    def headerData(self, section, orientation, role = qtc.Qt.DisplayRole):
+        if orientation == qtc.Qt.Horizontal and role == qtc.Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role = qtc.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+        if role in (qtc.Qt.DisplayRole, qtc.Qt.EditRole):
+            return (node.name, node.sample, node.date)[column]
+        elif role == qtc.Qt.UserRole and column == 0:
+            return node.path
+        elif role == qtc.Qt.DecorationRole and column == 0 and node.parent is not self._root:
+            return self._icon(node.brillouin_type)
+        elif role == qtc.Qt.ToolTipRole and column == 0:
+            # The mounted HDF5 files (external links) are identified by the file they are read from
+            entry = self.wrapper_index.entries.get(node.path)
+            if entry is not None and entry.link is not None:
+                return f"Mounted from {entry.link[0]} (read-only)"
+        return None
+
+    def setData(self, index, value, role = qtc.Qt.EditRole):
+        if not index.isValid() or role != qtc.Qt.EditRole:
+            return False
+        node = index.internalPointer()
+        if value == self.data(index, role):
+            return False
+        # The change is applied to the wrapper and then to the model by the slot connected to the edited signal
+        self.edited.emit(node.path, index.column(), value)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return qtc.Qt.ItemIsDropEnabled
+        flags = qtc.Qt.ItemIsEnabled | qtc.Qt.ItemIsSelectable | qtc.Qt.ItemIsDragEnabled | qtc.Qt.ItemIsDropEnabled
+        # The name of the root group cannot be changed
+        if not (index.column() == 0 and index.internalPointer().parent is self._root):
+            flags |= qtc.Qt.ItemIsEditable
+        return flags
+
+    def _icon(self, brillouin_type):
+        if "Abscissa" in brillouin_type:
+            filename = "Abscissa.png"
+        else:
+            filename = BRILLOUIN_TYPE_ICONS.get(brillouin_type)
+        if filename is None:
+            return None
+        if filename not in self._icons:
+            self._icons[filename] = qtg.QIcon(os.path.join(ICONS_DIRECTORY, filename))
+        return self._icons[filename]
+
+    ##########################
+    #     Drag and drop      #
+    ##########################
+
+    def mimeTypes(self):
+        return [self.MIME_TYPE]
+
+    def mimeData(self, indexes):
+        mime_data = qtc.QMimeData()
+        if indexes:
+            path = indexes[0].siblingAtColumn(0).data(qtc.Qt.UserRole)
+            if path:
+                mime_data.setData(self.MIME_TYPE, path.encode("utf-8"))
+        return mime_data
+
+    def supportedDragActions(self):
+        return qtc.Qt.MoveAction | qtc.Qt.CopyAction
+
+    def supportedDropActions(self):
+        return qtc.Qt.MoveAction | qtc.Qt.CopyAction
+
+    ##########################
+    #     Path handling      #
+    ##########################
+
+    def index_from_path(self, path, column = 0):
+        """Returns the index of the element at the given path. If the element has not been loaded yet, the batches of its parents are fetched until it is.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element, in the form "Brillouin/Group/...".
+        column : int, optional
+            The column of the returned index, by default 0.
+
+        Returns
+        -------
+        QModelIndex
+            The index of the element, invalid if the path does not lead to an element.
+        """
+        if not path:
+            return qtc.QModelIndex()
+        persistent = self._indexes.get(path)
+        if persistent is None:
+            if "/" not in path:
+                return qtc.QModelIndex()
+            parent = self.index_from_path(path.rsplit("/", 1)[0])
+            if not parent.isValid():
+                return qtc.QModelIndex()
+            while path not in self._indexes and self.canFetchMore(parent):
+                self.fetchMore(parent)
+            persistent = self._indexes.get(path)
+            if persistent is None:
+                return qtc.QModelIndex()
+        if not persistent.isValid():
+            return qtc.QModelIndex()
+        return self.index(persistent.row(), column, persistent.parent())
+
+    ##########################
+    #   Incremental patches  #
+    ##########################
+
+    def update_path(self, path):
+        """Synchronizes the element at the given path and all its loaded descendants with the index. If the element is not in the model yet, it is inserted in its parent (if its parent has already been fetched). If it is not in the index anymore, it is removed.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element that has been modified or created.
+        """
+        if path not in self.wrapper_index:
+            self.remove_path(path)
+            return
+        node = self._find_node(path)
+        if node is not None:
+            self._sync_node(node)
+            return
+        parent_path, name = path.rsplit("/", 1)
+        parent = self._find_node(parent_path)
+        if parent is None or parent.pending is None:
+            # The parent has not been fetched yet, the element will be created from the index when it is
+            return
+        if parent.pending:
+            parent.pending.append(name)
+        else:
+            self._insert_nodes(parent, [self._create_node(name, parent)])
+
+    def update_scanned(self, paths):
+        """Updates the nodes of groups whose children have just been read or corrected by the structure scan. The empty groups are marked as fetched so that their expansion arrow is removed, and the rows of the groups already fetched are synchronized with the index.
+
+        Parameters
+        ----------
+        paths : list of str
+            The paths of the scanned groups.
+        """
+        for path in paths:
+            node = self._find_node(path)
+            if node is None:
+                continue
+            if node.pending is not None:
+                self._sync_node(node)
+            elif not self.wrapper_index.entries[path].children:
+                node.pending = []
+                index = self._index_from_node(node)
+                self.dataChanged.emit(index, index, [qtc.Qt.DisplayRole])
+
+    def remove_path(self, path):
+        """Removes the row of an element from the model.
+
+        Parameters
+        ----------
+        path : str
+            The path of the removed element.
+        """
+        if "/" not in path:
+            return
+        parent_path, name = path.rsplit("/", 1)
+        parent = self._find_node(parent_path)
+        if parent is None:
+            return
+        if parent.pending and name in parent.pending:
+            parent.pending.remove(name)
+            return
+        node = self._find_node(path)
+        if node is None:
+            return
+        self.beginRemoveRows(self._index_from_node(parent), node.row, node.row)
+        del parent.children[node.row]
+        for row in range(node.row, len(parent.children)):
+            parent.children[row].row = row
+        self.endRemoveRows()
+        self._unregister(node)
+
+    def rename_path(self, path, name):
+        """Renames the node of an element, keeping its row, its descendants and their expansion state.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element before it was renamed.
+        name : str
+            The new name of the element.
+        """
+        node = self._find_node(path)
+        if node is None:
+            # The element is not displayed yet, only the names waiting to be fetched are updated
+            parent = self._find_node(path.rsplit("/", 1)[0])
+            if parent is not None and parent.pending:
+                old_name = path.rsplit("/", 1)[1]
+                parent.pending = [name if e == old_name else e for e in parent.pending]
+            return
+        node.name = name
+        self._set_path(node, f"{node.parent.path}/{name}")
+        index = self._index_from_node(node)
+        self.dataChanged.emit(index, index, [qtc.Qt.DisplayRole])
+
+    def move_path(self, path, new_parent):
+        """Moves the node of an element under a new parent.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element before it was moved.
+        new_parent : str
+            The path of the group where the element has been moved.
+        """
+        self.remove_path(path)
+        if new_parent not in self.wrapper_index:
+            return
+        self.update_path(f"{new_parent}/{path.split('/')[-1]}")
+
+    def _find_node(self, path):
+        """Returns the node of the element at the given path if it has already been fetched, None otherwise.
+        """
+        persistent = self._indexes.get(path)
+        if persistent is None or not persistent.isValid():
+            return None
+        return persistent.internalPointer()
+
+    def _index_from_node(self, node, column = 0):
+        if node is self._root:
+            return qtc.QModelIndex()
+        return self.createIndex(node.row, column, node)
+
+    def _insert_nodes(self, parent, nodes):
+        first = len(parent.children)
+        for i, node in enumerate(nodes):
+            node.row = first + i
+        self.beginInsertRows(self._index_from_node(parent), first, first + len(nodes) - 1)
+        parent.children.extend(nodes)
+        self.endInsertRows()
+        for node in nodes:
+            self._indexes[node.path] = qtc.QPersistentModelIndex(self._index_from_node(node))
+
+    def _unregister(self, node):
+        self._indexes.pop(node.path, None)
+        for child in node.children:
+            self._unregister(child)
+
+    def _set_path(self, node, path):
+        self._indexes[path] = self._indexes.pop(node.path)
+        node.path = path
+        for child in node.children:
+            self._set_path(child, f"{path}/{child.name}")
+
+    def _sync_node(self, node):
+        """Updates the data of a node and of its loaded descendants from the index, and inserts or removes the rows of the children that have been created or deleted.
+        """
+        entry = self.wrapper_index.entries[node.path]
+        parent = node.parent
+        if parent is not self._root:
+            attributes = entry.attributes
+            node.brillouin_type = str(attributes.get("Brillouin_type", parent.brillouin_type))
+            node.sample = str(attributes.get("MEASURE.Sample", parent.sample))
+            node.date = str(attributes.get("MEASURE.Date_of_measure", parent.date))
+        else:
+            root = self._create_node(node.name, self._root)
+            node.sample, node.date = root.sample, root.date
+        self.dataChanged.emit(self._index_from_node(node, 0), self._index_from_node(node, len(self.HEADERS)-1), [qtc.Qt.DisplayRole, qtc.Qt.DecorationRole])
+
+        if not node.is_group or node.pending is None:
+            return
+
+        names = set(entry.children)
+        # Removes the rows of the deleted children
+        for child in reversed(list(node.children)):
+            if child.name not in names:
+                self.remove_path(child.path)
+        node.pending = [e for e in node.pending if e in names]
+
+        # Synchronizes the remaining children
+        for child in node.children:
+            self._sync_node(child)
+
+        # Adds the new children
+        known = set(c.name for c in node.children) | set(node.pending)
+        new_names = [e for e in entry.children if e not in known]
+        if not new_names:
+            return
+        if node.pending:
+            node.pending.extend(new_names)
+        else:
+            self._insert_nodes(node, [self._create_node(name, node) for name in new_names])
+
+class HDF5FilterProxyModel(qtc.QSortFilterProxyModel):
+    """Proxy model placed between the HDF5TreeModel and the tree view to display only the results of a search.
+    When a filter is set, an element is displayed if it matches the search, if it is a parent of a matching element, or if it is a descendant of a matching group (so that the content of the matching groups can still be browsed). The matching elements are displayed in bold.
+
+    Parameters
+    ----------
+    parent : QObject, optional
+        The parent object of the proxy model.
+    """
+    def __init__(self, parent = None):
+        super().__init__(parent)
+        self._matches = None
+        self._visible = None
+
+    def set_matches(self, paths):
+        """Sets the elements matching the search. Their nodes are fetched in the source model so that they can be displayed.
+
+        Parameters
+        ----------
+        paths : iterable of str or None
+            The paths of the matching elements, None to remove the filter.
+        """
+        if paths is None:
+            self._matches = None
+            self._visible = None
+        else:
+            source = self.sourceModel()
+            self._matches = set(paths)
+            self._visible = {"Brillouin"}
+            for path in self._matches:
+                source.index_from_path(path)
+                parts = path.split("/")
+                for i in range(1, len(parts)):
+                    self._visible.add("/".join(parts[:i]))
+        self.invalidateFilter()
+
+    def is_filtered(self):
+        """Returns True if a filter is set.
+        """
+        return self._matches is not None
+
+    def index_from_path(self, path, column = 0):
+        """Returns the index of the element at the given path in the proxy model, see HDF5TreeModel.index_from_path. The index is invalid if the element is hidden by the filter.
+        """
+        return self.mapFromSource(self.sourceModel().index_from_path(path, column))
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._matches is None:
+            return True
+        node = self.sourceModel().node_from_index(source_parent).children[source_row]
+        if node.path in self._visible:
+            return True
+        # Descendants of a matching group
+        path = node.path
+        while "/" in path:
+            if path in self._matches:
+                return True
+            path = path.rsplit("/", 1)[0]
+        return False
+
+    def data(self, index, role = qtc.Qt.DisplayRole):
+        if role == qtc.Qt.FontRole and self._matches is not None and index.column() == 0:
+            if index.data(qtc.Qt.UserRole) in self._matches:
+                font = qtg.QFont()
+                font.setBold(True)
+                return font
+        return super().data(index, role)
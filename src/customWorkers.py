@@ -0,0 +1,1169 @@
+import hashlib
+import os
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+import numpy as np
+import h5py
+from h5py._objects import phil
+from PySide6 import QtCore as qtc
+
+from wrapperIndex import HDF5_group, SOURCE_FINGERPRINT, VIRTUAL_SOURCES
+from storagePolicy import PRESETS
+from wrapperWriter import DIMENSION_SCALE_ATTRIBUTES
+
+class StructureScanner(qtc.QObject):
+    """Reads the structure of the file of a wrapper in a background thread, group by group (the groups closest to the root being read first), and sends it by batches to the GUI thread.
+    The scanner never modifies the index: the batches are merged in the index by the GUI thread with WrapperIndex.add_scanned.
+
+    The file is only opened while a batch is read, and h5py's global lock is held during that time, so that the GUI thread never accesses the file while it is opened by the scanner (the wrapper could not open it in write mode otherwise).
+
+    Parameters
+    ----------
+    wrapper_index : wrapperIndex.WrapperIndex
+        The index of the wrapper whose file is scanned.
+    parent : QObject, optional
+        The parent object of the scanner.
+
+    Signals
+    -------
+    batch_ready : dict
+        Emitted for each batch, with the paths of the groups read as keys and their children (list of (name, IndexEntry), see WrapperIndex.read_children) as values.
+    progress : (int, int)
+        Emitted after each batch with the number of groups and datasets found so far.
+    finished : bool
+        Emitted at the end of the scan, with True if the whole file has been read and False if the scan has been cancelled or interrupted.
+
+    Attributes
+    ----------
+    n_groups : int
+        The number of groups found so far.
+    n_datasets : int
+        The number of datasets found so far.
+    """
+    batch_ready = qtc.Signal(object)
+    progress = qtc.Signal(int, int)
+    finished = qtc.Signal(bool)
+
+    BATCH_SIZE = 2000 # Maximal number of elements read in a batch
+    BATCH_DURATION = 0.05 # Maximal time spent reading a batch (in seconds), during which the GUI thread cannot access the file
+
+    def __init__(self, wrapper_index, parent = None):
+        super().__init__(parent)
+        self.wrapper_index = wrapper_index
+        self.filepath = wrapper_index.wrapper.filepath
+        self.n_groups = 0
+        self.n_datasets = 0
+        self._cancelled = False
+
+    def cancel(self):
+        """Stops the scan after the current batch.
+        """
+        self._cancelled = True
+
+    @qtc.Slot()
+    def run(self):
+        queue = deque(["Brillouin"])
+        self.n_groups, self.n_datasets = 1, 0
+        while queue and not self._cancelled:
+            batch = {}
+            n_elements = 0
+            start = time.perf_counter()
+            try:
+                with phil, h5py.File(self.filepath, 'r') as file:
+                    while queue and n_elements < self.BATCH_SIZE and time.perf_counter() - start < self.BATCH_DURATION:
+                        path = queue.popleft()
+                        if path not in file:
+                            continue
+                        children = self.wrapper_index.read_children(file[path])
+                        batch[path] = children
+                        for name, entry in children:
+                            if entry.kind is HDF5_group:
+                                queue.append(f"{path}/{name}")
+                                self.n_groups += 1
+                            else:
+                                self.n_datasets += 1
+                        n_elements += len(children) + 1
+            except OSError:
+                # The file has been moved or deleted (by a save for example), the remaining groups will be read when they are needed
+                break
+            self.batch_ready.emit(batch)
+            self.progress.emit(self.n_groups, self.n_datasets)
+        self.finished.emit(not queue)
+
+##########################
+#  Shared memory arrays  #
+##########################
+
+# Minimal size (in bytes) of the arrays sent through shared memory by the processes of an ImportWorker, the smaller arrays being pickled
+SHARED_MEMORY_THRESHOLD = 65536
+
+class SharedArray:
+    """Reference to an array stored in a shared memory block, sent in place of the array by the processes of an ImportWorker.
+
+    Attributes
+    ----------
+    name : str
+        The name of the shared memory block.
+    shape : tuple
+        The shape of the array.
+    dtype : str
+        The type of the array (see numpy.dtype.str).
+    """
+    __slots__ = ("name", "shape", "dtype")
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+def _to_shared(value, blocks):
+    """Replaces the large arrays of a parsed dictionnary by SharedArray references, the created blocks being added to blocks.
+    """
+    if isinstance(value, dict):
+        return {key: _to_shared(item, blocks) for key, item in value.items()}
+    if isinstance(value, np.ndarray) and not value.dtype.hasobject and value.nbytes >= SHARED_MEMORY_THRESHOLD:
+        block = shared_memory.SharedMemory(create = True, size = value.nbytes)
+        blocks.append(block)
+        view = np.ndarray(value.shape, dtype = value.dtype, buffer = block.buf)
+        view[...] = value
+        del view # The block cannot be closed while a view of its buffer exists
+        return SharedArray(block.name, value.shape, value.dtype.str)
+    return value
+
+def _from_shared(value):
+    """Replaces the SharedArray references of a parsed dictionnary by the arrays, the shared memory blocks being freed.
+    """
+    if isinstance(value, dict):
+        return {key: _from_shared(item) for key, item in value.items()}
+    if isinstance(value, SharedArray):
+        block = shared_memory.SharedMemory(name = value.name)
+        try:
+            # The array is copied so that the block can be freed right away, whatever the wrapper does with the array
+            return np.ndarray(value.shape, dtype = value.dtype, buffer = block.buf).copy()
+        finally:
+            block.close()
+            block.unlink()
+    return value
+
+def _free_shared(value):
+    """Frees the shared memory blocks of a parsed dictionnary that will not be used.
+    """
+    if isinstance(value, dict):
+        for item in value.values():
+            _free_shared(item)
+    elif isinstance(value, SharedArray):
+        block = shared_memory.SharedMemory(name = value.name)
+        block.close()
+        block.unlink()
+
+def load_shared(load, filepath):
+    """Parses a file in a process of an ImportWorker and returns the parsed dictionnary with its large arrays stored in shared memory, so that they are not pickled to be sent to the parent process.
+
+    Parameters
+    ----------
+    load : callable
+        The function parsing the file.
+    filepath : str
+        The path of the file.
+
+    Returns
+    -------
+    dict
+        The parsed dictionnary, where the arrays larger than SHARED_MEMORY_THRESHOLD are replaced by SharedArray references.
+    """
+    blocks = []
+    try:
+        return _to_shared(load(filepath), blocks)
+    except BaseException:
+        for block in blocks:
+            block.unlink()
+        raise
+    finally:
+        for block in blocks:
+            block.close()
+
+##########################
+#  Source fingerprints   #
+##########################
+
+def source_fingerprint(filepath, hash_content = True):
+    """Returns the fingerprint of a source file, stored on the group of the imported file (see wrapperIndex.SOURCE_FINGERPRINT): "size:mtime:hash", the hash being the BLAKE2 hash of the content of the file.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file.
+    hash_content : bool, optional
+        If False, the hash is not computed and the fingerprint ends with ":". Default is True.
+
+    Returns
+    -------
+    str
+        The fingerprint.
+    """
+    stat = os.stat(filepath)
+    digest = ""
+    if hash_content:
+        hasher = hashlib.blake2b(digest_size = 16)
+        with open(filepath, 'rb') as file:
+            for block in iter(partial(file.read, 1 << 20), b""):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{digest}"
+
+def same_content(fingerprint, recorded):
+    """Returns True if two fingerprints have the same size and hash, whatever their modification times.
+    """
+    return fingerprint.split(":")[::2] == recorded.split(":")[::2]
+
+def load_source(load, filepath, recorded = None):
+    """Parses a source file unless it is unchanged since its last import, and stores its fingerprint in the attributes of the parsed dictionnary.
+    The file is unchanged if its size and modification time are the recorded ones, or if only its modification time changed but not its content, so that the content is only hashed for the new and modified files.
+
+    Parameters
+    ----------
+    load : callable
+        The function parsing the file.
+    filepath : str
+        The path of the file.
+    recorded : str, optional
+        The fingerprint recorded at the last import of the file, None if the file has not been imported.
+
+    Returns
+    -------
+    dict or None
+        The parsed dictionnary, None if the file is unchanged.
+    """
+    if recorded is not None:
+        size, mtime, _ = recorded.split(":")
+        if source_fingerprint(filepath, hash_content = False) == f"{size}:{mtime}:":
+            return None
+    fingerprint = source_fingerprint(filepath)
+    if recorded is not None and same_content(fingerprint, recorded):
+        return None
+    dic = load(filepath)
+    dic.setdefault("Attributes", {})[SOURCE_FINGERPRINT] = fingerprint
+    return dic
+
+##########################
+#     Import workers     #
+##########################
+
+class ImportWorker(qtc.QObject):
+    """Parses a list of files in parallel with a pool of threads, the parsed dictionnaries being sent one by one to the GUI thread which writes them in the wrapper (the wrapper is only written by one thread).
+    Only a limited number of files are parsed in advance: a new file is given to the pool each time the GUI thread calls "written", so that the memory used stays bounded when the parsing is faster than the writing.
+
+    As the threads share the GIL, the loaders spending most of their time in Python code (text files for example) do not run faster with more threads. For those, a pool of processes can be used instead: the large arrays of the parsed dictionnaries are then sent back through shared memory blocks (see load_shared) rather than being pickled, and only the parent process writes in the HDF5 file. The load function then has to be picklable (a module-level function or a functools.partial of one), and the processes are slower to start than threads, which only pays off for the imports of many files (see benchmarks/import_workers.py for a comparison of both pools).
+
+    The worker lives in the GUI thread: its signals are emitted by the threads of the pool and are received in the GUI thread.
+
+    Parameters
+    ----------
+    filepaths : list of str
+        The paths of the files to parse.
+    load : callable
+        The function parsing a file, called with the path of the file and returning the dictionnary to write (for example load_data.load_general with the creator and parameters of the files).
+    max_workers : int, optional
+        The number of threads of the pool, by default the number of processors.
+    max_pending : int, optional
+        The maximal number of files parsed or being parsed that have not been written yet, by default twice the number of threads.
+    processes : bool, optional
+        If True, the files are parsed by a pool of processes instead of a pool of threads. Default is False.
+    streaming : bool, optional
+        If True, files can be added with add_files while the import is running (for example while a DirectoryIndexer is still scanning), the import finishing only after end_files has been called. Default is False.
+    fingerprints : dict, optional
+        If given, the files are parsed with load_source: the fingerprint of each file is stored in its dictionnary, and the files whose fingerprint is in this dictionnary (path of the file as key) and unchanged are not parsed, "parsed" being emitted with None in place of their dictionnary.
+    parent : QObject, optional
+        The parent object of the worker.
+
+    Signals
+    -------
+    parsed : (int, str, object)
+        Emitted when a file has been parsed, with the position of the file in the list, its path and the parsed dictionnary (None for an unchanged file, see the "fingerprints" parameter). The receiver has to call "written" once the dictionnary has been handled.
+    failed : (int, str, str)
+        Emitted when a file could not be parsed, with the position of the file in the list, its path and the error message. The receiver has to call "written" once the error has been handled.
+    finished : bool
+        Emitted once all the files have been handled, with True if the import has not been cancelled.
+    """
+    parsed = qtc.Signal(int, str, object)
+    failed = qtc.Signal(int, str, str)
+    finished = qtc.Signal(bool)
+
+    def __init__(self, filepaths, load, max_workers = None, max_pending = None, processes = False, streaming = False, fingerprints = None, parent = None):
+        super().__init__(parent)
+        self.filepaths = list(filepaths)
+        self.load = load
+        self.fingerprints = fingerprints
+        self.processes = processes
+        self.streaming = streaming
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.max_pending = max_pending if max_pending is not None else 2 * self.max_workers
+        self._executor = None
+        self._next = 0
+        self._running = 0
+        self._cancelled = False
+
+    def start(self):
+        """Starts parsing the files.
+        """
+        if self.processes:
+            # The processes are spawned rather than forked, forking a process running Qt threads being unsafe
+            self._executor = ProcessPoolExecutor(max_workers = self.max_workers, mp_context = multiprocessing.get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers = self.max_workers)
+        self._submit_next()
+        self._check_finished()
+
+    def written(self):
+        """Signals that a parsed file has been handled by the GUI thread, so that a new file can be parsed.
+        """
+        self._running -= 1
+        self._submit_next()
+        self._check_finished()
+
+    def add_files(self, filepaths):
+        """Adds files to parse to a streaming import, see the "streaming" parameter.
+
+        Parameters
+        ----------
+        filepaths : list of str
+            The paths of the files to add, their positions in the list following the ones of the files already given.
+        """
+        self.filepaths.extend(filepaths)
+        self._submit_next()
+
+    def end_files(self):
+        """Signals that no more files will be added to a streaming import, the import finishing once the files given have been handled.
+        """
+        self.streaming = False
+        self._check_finished()
+
+    def cancel(self):
+        """Stops giving new files to the pool. The files being parsed are still sent but should be ignored (see is_cancelled): with a pool of processes, their shared memory blocks are freed and they are sent with None in place of their dictionnary, as the unchanged files.
+        """
+        self._cancelled = True
+
+    def is_cancelled(self):
+        """Returns True if the import has been cancelled.
+        """
+        return self._cancelled
+
+    def is_running(self):
+        """Returns True if the import has been started and has not finished yet.
+        """
+        return self._executor is not None
+
+    def _submit_next(self):
+        # Gives files to the pool until max_pending files are waiting to be written
+        if self._executor is None:
+            return
+        while not self._cancelled and self._running < self.max_pending and self._next < len(self.filepaths):
+            i = self._next
+            self._next += 1
+            self._running += 1
+            load = self.load
+            if self.fingerprints is not None:
+                load = partial(load_source, self.load, recorded = self.fingerprints.get(self.filepaths[i]))
+            if self.processes:
+                future = self._executor.submit(load_shared, load, self.filepaths[i])
+            else:
+                future = self._executor.submit(load, self.filepaths[i])
+            future.add_done_callback(partial(self._parsed, i))
+
+    def _parsed(self, i, future):
+        # Called in the thread of the pool, or in the thread of the executor collecting the results of the processes
+        try:
+            dic = future.result()
+            if self.processes:
+                dic = _free_shared(dic) if self._cancelled else _from_shared(dic)
+        except Exception as e:
+            self.failed.emit(i, self.filepaths[i], str(e))
+        else:
+            self.parsed.emit(i, self.filepaths[i], dic)
+
+    def _check_finished(self):
+        if self._running > 0 or self._executor is None:
+            return
+        if self._cancelled or (self._next >= len(self.filepaths) and not self.streaming):
+            self._executor.shutdown(wait = False)
+            self._executor = None
+            self.finished.emit(not self._cancelled)
+
+class DirectoryIndexer(qtc.QObject):
+    """Lists the files of a directory and of its subdirectories in a background thread with a single os.scandir walk, and sends them by batches to the GUI thread as they are found, so that the import of the first files can start while the scan continues.
+    The subdirectories are walked depth first, in the alphabetical order of their names, and the files listed in IGNORED_NAMES are skipped.
+
+    The indexer lives in the GUI thread: its signals are emitted by the thread of the scan and are received in the GUI thread.
+
+    Parameters
+    ----------
+    directory : str
+        The path of the directory to scan.
+    parent : QObject, optional
+        The parent object of the indexer.
+
+    Signals
+    -------
+    batch_ready : list
+        Emitted for each batch with the files found, as a list of (filepath, path_parent, extension) tuples, path_parent being the path of the directory of the file relative to the scanned directory with "/" as separator ("" for the files directly in the scanned directory).
+    progress : (int, int)
+        Emitted after each batch with the number of files and directories found so far.
+    finished : bool
+        Emitted at the end of the scan, with True if the whole directory has been scanned and False if the scan has been cancelled.
+
+    Attributes
+    ----------
+    n_files : int
+        The number of files found so far.
+    n_directories : int
+        The number of directories found so far.
+    """
+    batch_ready = qtc.Signal(object)
+    progress = qtc.Signal(int, int)
+    finished = qtc.Signal(bool)
+
+    BATCH_SIZE = 500 # Maximal number of files sent in a batch
+    BATCH_DURATION = 0.1 # Maximal time spent filling a batch (in seconds)
+    IGNORED_NAMES = {".DS_Store", "Thumbs.db", "desktop.ini"}
+
+    def __init__(self, directory, parent = None):
+        super().__init__(parent)
+        self.directory = directory
+        self.n_files = 0
+        self.n_directories = 0
+        self._cancelled = False
+        self._thread = None
+
+    def start(self):
+        """Starts the scan in a background thread.
+        """
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+    def cancel(self):
+        """Stops the scan after the current directory.
+        """
+        self._cancelled = True
+
+    def wait(self):
+        """Waits for the end of the scan.
+        """
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        stack = [(self.directory, "")]
+        batch = []
+        start = time.perf_counter()
+        while stack and not self._cancelled:
+            directory, path_parent = stack.pop()
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = sorted(iterator, key = lambda entry: entry.name)
+            except OSError:
+                continue
+            self.n_directories += 1
+            subdirectories = []
+            for entry in entries:
+                if entry.name in self.IGNORED_NAMES:
+                    continue
+                try:
+                    is_directory = entry.is_dir()
+                except OSError:
+                    continue
+                if is_directory:
+                    subdirectories.append((entry.path, f"{path_parent}/{entry.name}" if path_parent else entry.name))
+                else:
+                    batch.append((entry.path, path_parent, os.path.splitext(entry.name)[1]))
+                    self.n_files += 1
+                    if len(batch) >= self.BATCH_SIZE:
+                        batch = self._send(batch)
+                        start = time.perf_counter()
+            # The subdirectories are pushed in reverse order so that they are walked in alphabetical order
+            stack.extend(reversed(subdirectories))
+            if batch and time.perf_counter() - start >= self.BATCH_DURATION:
+                batch = self._send(batch)
+                start = time.perf_counter()
+        self._send(batch)
+        self.finished.emit(not stack)
+
+    def _send(self, batch):
+        # Emits a batch and returns a new empty batch
+        if batch:
+            self.batch_ready.emit(batch)
+        self.progress.emit(self.n_files, self.n_directories)
+        return []
+
+class FolderWatcher(qtc.QObject):
+    """Detects the files of a given extension appearing in a folder (the subfolders are not watched), for example the spectra written by an ongoing acquisition.
+    The folder is read again when QFileSystemWatcher signals a change, and every POLL_INTERVAL milliseconds in case the changes are not signaled (network shares for example). A file is only reported once its size and modification time have not changed for SETTLE_TIME milliseconds, so that the files still being written are not read.
+
+    Parameters
+    ----------
+    directory : str
+        The path of the folder to watch.
+    extension : str
+        The extension of the files to report (".dat" for example), the case being ignored.
+    parent : QObject, optional
+        The parent object of the watcher.
+
+    Signals
+    -------
+    files_added : list
+        Emitted with the paths of the new files, in alphabetical order. The files already in the folder when the watch starts are reported by the first emission.
+    """
+    files_added = qtc.Signal(object)
+
+    POLL_INTERVAL = 2000 # Time between two reads of the folder when no change is signaled (in milliseconds)
+    SETTLE_TIME = 200 # Time during which a new file must not change to be reported (in milliseconds)
+
+    def __init__(self, directory, extension, parent = None):
+        super().__init__(parent)
+        self.directory = directory
+        self.extension = extension.lower()
+        self._reported = set()
+        self._pending = {}
+        self._watcher = qtc.QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._changed)
+        self._poll_timer = qtc.QTimer(self)
+        self._poll_timer.timeout.connect(self._scan)
+        self._settle_timer = qtc.QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.timeout.connect(self._scan)
+
+    def start(self):
+        """Starts watching the folder.
+        """
+        self._watcher.addPath(self.directory)
+        self._poll_timer.start(self.POLL_INTERVAL)
+        self._scan()
+
+    def stop(self):
+        """Stops watching the folder.
+        """
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self._poll_timer.stop()
+        self._settle_timer.stop()
+
+    def _changed(self, path):
+        if not self._settle_timer.isActive():
+            self._settle_timer.start(self.SETTLE_TIME)
+
+    def _scan(self):
+        now = time.monotonic()
+        ready = []
+        try:
+            with os.scandir(self.directory) as iterator:
+                for entry in iterator:
+                    if entry.path in self._reported or entry.name in DirectoryIndexer.IGNORED_NAMES or os.path.splitext(entry.name)[1].lower() != self.extension:
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    signature = (stat.st_size, stat.st_mtime_ns)
+                    previous = self._pending.get(entry.path)
+                    if previous is None or previous[0] != signature:
+                        self._pending[entry.path] = (signature, now)
+                    elif (now - previous[1]) * 1000 >= self.SETTLE_TIME:
+                        del self._pending[entry.path]
+                        self._reported.add(entry.path)
+                        ready.append(entry.path)
+        except OSError:
+            # The folder is not reachable anymore, it is read again at the next poll
+            return
+        # The files that are not settled yet are checked again once they could be
+        if self._pending and not self._settle_timer.isActive():
+            self._settle_timer.start(self.SETTLE_TIME)
+        if ready:
+            self.files_added.emit(sorted(ready))
+
+class FolderImporter(qtc.QObject):
+    """Imports the files appearing in a watched folder into a group while they are written (see FolderWatcher), with the creator and parameters chosen for the first file.
+    The files are parsed by an ImportWorker and written by a BatchWriter. The batch is written when it is full and at least every FLUSH_INTERVAL milliseconds, so that the tree view can be updated once per batch and not once per file. As for the other imports, the files already imported and unchanged are skipped (see load_source).
+
+    Parameters
+    ----------
+    directory : str
+        The path of the folder to watch.
+    extension : str
+        The extension of the files to import.
+    parent_group : str
+        The path of the group where the files are imported.
+    writer : wrapperWriter.BatchWriter
+        The writer of the wrapper.
+    processes : bool, optional
+        Whether the files are parsed by a pool of processes, see ImportWorker. Default is False.
+    parent : QObject, optional
+        The parent object of the importer.
+
+    Signals
+    -------
+    loader_needed : str
+        Emitted with the path of the first file found: the receiver has to choose how the files are parsed and call set_loader (or stop).
+    files_written : list
+        Emitted after each batch with the (filepath, path of the group) of the files written.
+    files_failed : list
+        Emitted with the (filepath, error message) of the files that could not be imported.
+    files_warned : list
+        Emitted with the (filepath, warning message) of the files imported without some of their attributes (see BatchWriter.warnings).
+
+    Attributes
+    ----------
+    n_written : int
+        The number of files written.
+    n_skipped : int
+        The number of files skipped because they were already imported and unchanged.
+    n_failed : int
+        The number of files that could not be imported.
+    """
+    loader_needed = qtc.Signal(str)
+    files_written = qtc.Signal(object)
+    files_failed = qtc.Signal(object)
+    files_warned = qtc.Signal(object)
+
+    FLUSH_INTERVAL = 1000 # Maximal time between two writes of the batch (in milliseconds)
+
+    def __init__(self, directory, extension, parent_group, writer, processes = False, parent = None):
+        super().__init__(parent)
+        self.directory = directory
+        self.extension = extension
+        self.parent_group = parent_group
+        self.writer = writer
+        self.processes = processes
+        self.n_written = 0
+        self.n_skipped = 0
+        self.n_failed = 0
+        self._start_time = None
+        self._importer = None
+        self._waiting = []
+        self._fingerprints = {}
+        self._watcher = FolderWatcher(directory, extension, self)
+        self._watcher.files_added.connect(self._files_added)
+        self._flush_timer = qtc.QTimer(self)
+        self._flush_timer.timeout.connect(self._flush)
+
+    def start(self):
+        """Starts watching the folder.
+        """
+        self._start_time = time.monotonic()
+        self._watcher.start()
+        self._flush_timer.start(self.FLUSH_INTERVAL)
+
+    def stop(self):
+        """Stops watching the folder and returns once the files found have been written.
+        """
+        self._watcher.stop()
+        if self._importer is not None:
+            loop = qtc.QEventLoop()
+            self._importer.finished.connect(loop.quit)
+            self._importer.end_files()
+            if self._importer.is_running():
+                loop.exec()
+            self._importer.deleteLater()
+            self._importer = None
+        self._flush_timer.stop()
+        self._flush()
+
+    def set_loader(self, load):
+        """Sets the function parsing the files and starts importing them.
+
+        Parameters
+        ----------
+        load : callable
+            The function parsing a file, see ImportWorker.
+        """
+        self._importer = ImportWorker(self._waiting, load, processes = self.processes, streaming = True, fingerprints = self._fingerprints, parent = self)
+        self._importer.parsed.connect(self._parsed)
+        self._importer.failed.connect(self._failed)
+        self._waiting = []
+        self._importer.start()
+
+    def rate(self):
+        """Returns the number of files written per second since the start of the watch.
+        """
+        if self._start_time is None:
+            return 0
+        return self.n_written / max(time.monotonic() - self._start_time, 1e-3)
+
+    def _files_added(self, filepaths):
+        wrapper_index = self.writer.wrapper_index
+        for filepath in filepaths:
+            recorded = wrapper_index.get_attribute(f"{self.parent_group}/{self._name_group(filepath)}", SOURCE_FINGERPRINT, inherited = False)
+            if recorded is not None:
+                self._fingerprints[filepath] = str(recorded)
+        if self._importer is not None:
+            self._importer.add_files(filepaths)
+            return
+        first = not self._waiting
+        self._waiting.extend(filepaths)
+        if first:
+            self.loader_needed.emit(filepaths[0])
+
+    def _name_group(self, filepath):
+        # Same name as the groups of the files imported with MainWindow.add_data
+        return os.path.basename(filepath).split(".")[0].replace("  ", " ")
+
+    def _parsed(self, i, filepath, dic):
+        # The files parsed after the cancellation are ignored, their dictionnary being None with a pool of processes (see ImportWorker.cancel)
+        if self._importer.is_cancelled():
+            pass
+        elif dic is None:
+            self.n_skipped += 1
+        else:
+            self._report(*self.writer.add(filepath, dic, self.parent_group, self._name_group(filepath), replace = filepath in self._fingerprints))
+        self._importer.written()
+
+    def _failed(self, i, filepath, error):
+        self.n_failed += 1
+        self.files_failed.emit([(filepath, error)])
+        self._importer.written()
+
+    def _flush(self):
+        self._report(*self.writer.flush())
+
+    def _report(self, written, failed):
+        self.n_written += len(written)
+        self.n_failed += len(failed)
+        if written:
+            self.files_written.emit(written)
+        if failed:
+            self.files_failed.emit(failed)
+        if self.writer.warnings:
+            warned = list(self.writer.warnings)
+            self.writer.warnings.clear()
+            self.files_warned.emit(warned)
+
+class DatasetConsolidator(qtc.QObject):
+    """Copies the data of a virtual dataset (see wrapperWriter.combine_virtual) into a regular dataset, in the background.
+    The file being written by the main thread only, the copy is made by small steps run by a timer of the main thread, each step opening the file, copying slices of the virtual dataset for at most STEP_DURATION seconds, and closing the file: the interface stays responsive and the file can be read between two steps. The data are written in a temporary dataset with the chunks and compression of the storage policy, which replaces the virtual dataset, with its attributes, once the copy is complete. The combined datasets are kept.
+
+    Parameters
+    ----------
+    wrapper : HDF5_BLS.wrapper.Wrapper
+        The wrapper of the file.
+    path : str
+        The path of the virtual dataset.
+    policy : storagePolicy.StoragePolicy, optional
+        The policy choosing the chunks and compression of the dataset, by default the "balanced" preset.
+    parent : QObject, optional
+        The parent object of the consolidator.
+
+    Signals
+    -------
+    progress : (int, int)
+        Emitted after each step with the number of slices copied and the total number of slices.
+    finished : (bool, str)
+        Emitted at the end with True if the dataset has been consolidated (False if it has been cancelled or has failed) and an error message (empty if there is none).
+    """
+    progress = qtc.Signal(int, int)
+    finished = qtc.Signal(bool, str)
+
+    STEP_DURATION = 0.05 # Maximal duration of a step (in seconds)
+    TEMPORARY_SUFFIX = ".consolidating"
+
+    def __init__(self, wrapper, path, policy = None, parent = None):
+        super().__init__(parent)
+        self.wrapper = wrapper
+        self.path = path
+        self.policy = policy if policy is not None else PRESETS["balanced"]
+        self.n_copied = 0
+        self.n_slices = None
+        self._block = 1
+        self._timer = qtc.QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+
+    def start(self):
+        """Starts the copy, the first step being run by the event loop.
+        """
+        self._timer.start()
+
+    def cancel(self):
+        """Stops the copy and removes the temporary dataset, the virtual dataset being kept.
+        """
+        if not self._timer.isActive():
+            return
+        self._timer.stop()
+        self._remove_temporary()
+        self.finished.emit(False, "")
+
+    def is_running(self):
+        return self._timer.isActive()
+
+    def _step(self):
+        temporary_path = self.path + self.TEMPORARY_SUFFIX
+        try:
+            with h5py.File(self.wrapper.filepath, 'a') as file:
+                source = file[self.path]
+                if self.n_slices is None:
+                    if not source.is_virtual:
+                        raise ValueError(f"'{self.path}' is not a virtual dataset.")
+                    if temporary_path in file:
+                        del file[temporary_path]
+                        self.wrapper.need_for_repack = True
+                    options = self.policy.dataset_options(source.attrs.get("Brillouin_type", "Other"), source.shape, source.dtype)
+                    file.create_dataset(temporary_path, shape = source.shape, dtype = source.dtype, **options)
+                    self.n_slices = source.shape[0]
+                    # The slices are copied by blocks of whole chunks, so that no compressed chunk is written twice
+                    self._block = options["chunks"][0] if "chunks" in options else 1
+                target = file[temporary_path]
+                start = time.perf_counter()
+                while self.n_copied < self.n_slices and time.perf_counter() - start < self.STEP_DURATION:
+                    end = min(self.n_copied + self._block, self.n_slices)
+                    target[self.n_copied:end] = source[self.n_copied:end]
+                    self.n_copied = end
+                if self.n_copied == self.n_slices:
+                    # The consolidated dataset does not map the datasets anymore
+                    for key, value in source.attrs.items():
+                        if key != VIRTUAL_SOURCES:
+                            target.attrs.create(key, value)
+                    # The space of the deleted elements is only freed by a repack
+                    del file[self.path]
+                    self.wrapper.need_for_repack = True
+                    file.move(temporary_path, self.path)
+        except Exception as e:
+            self._timer.stop()
+            self._remove_temporary()
+            self.finished.emit(False, str(e))
+            return
+        self.progress.emit(self.n_copied, self.n_slices)
+        if self.n_copied == self.n_slices:
+            self._timer.stop()
+            self.finished.emit(True, "")
+
+    def _remove_temporary(self):
+        try:
+            with h5py.File(self.wrapper.filepath, 'a') as file:
+                if self.path + self.TEMPORARY_SUFFIX in file:
+                    del file[self.path + self.TEMPORARY_SUFFIX]
+                    self.wrapper.need_for_repack = True
+        except OSError:
+            pass
+
+class FileSaver(qtc.QObject):
+    """Copies the file of a wrapper to a new location in the background (the "Save As" and the repack of the interface), in place of the copies of Wrapper.save_as_hdf5 and Wrapper.repack which block the interface for the whole copy.
+    As for DatasetConsolidator, the copy is made by small steps run by a timer of the main thread, each step opening the files, copying data for at most STEP_DURATION seconds, and closing them. The file is copied element by element, from its root and its attributes: the groups with their attributes, the soft and external links as links, and the datasets with their creation properties (chunks, filters, fill value, virtual mapping). The chunks are copied as they are stored, without being decompressed and compressed again, and the other datasets by blocks of BLOCK_SIZE bytes. The dimension scales are attached again once all the datasets have been copied.
+
+    The copy is written in a temporary file next to the chosen location, which replaces the file at this location (if any) only once the copy is complete: a cancelled or failed save leaves the previous file untouched. The file of the wrapper must not be modified during the copy.
+
+    Saving the file at its own location repacks it: the copy only contains the space used by the elements of the file, the space freed by the removed elements being left behind. A storage policy can then be given to store the datasets with new chunks and compression, the datasets being decompressed and compressed again by blocks of whole chunks.
+
+    Parameters
+    ----------
+    wrapper : HDF5_BLS.wrapper.Wrapper
+        The wrapper whose file is saved.
+    filepath : str
+        The location where the file is saved.
+    policy : storagePolicy.StoragePolicy, optional
+        The policy choosing the chunks and compression of the copied datasets from their Brillouin type. By default, the datasets keep their storage.
+    libver : str, optional
+        The earliest version of the HDF5 format of the copy ("latest" for a file that can be written in SWMR mode, see SwmrWriter). By default, the version of h5py.
+    parent : QObject, optional
+        The parent object of the saver.
+
+    Attributes
+    ----------
+    scale_errors : list of (str, str)
+        The paths of the datasets whose dimension scales could not be attached again in the copy, with the error message.
+
+    Signals
+    -------
+    progress : (int, int)
+        Emitted after each step with the number of bytes written and the total number of bytes to write.
+    finished : (bool, str)
+        Emitted at the end with True if the file has been saved (False if the save has been cancelled or has failed) and an error message (empty if there is none).
+    """
+    progress = qtc.Signal(object, object)
+    finished = qtc.Signal(bool, str)
+
+    STEP_DURATION = 0.05 # Maximal duration of a step (in seconds)
+    BLOCK_SIZE = 4 * 1024 * 1024 # Size in bytes of the blocks of the datasets that are not chunked
+    TEMPORARY_SUFFIX = ".saving"
+
+    def __init__(self, wrapper, filepath, policy = None, libver = None, parent = None):
+        super().__init__(parent)
+        self.wrapper = wrapper
+        self.source = wrapper.filepath
+        self.filepath = os.path.abspath(filepath)
+        self.policy = policy
+        self.libver = libver
+        self.n_written = 0
+        self.scale_errors = []
+        self.n_bytes = None
+        self._jobs = deque()
+        self._scales = []
+        self._scaled = []
+        self._start_time = None
+        self._timer = qtc.QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+
+    def start(self):
+        """Starts the copy, the first step being run by the event loop.
+        """
+        self._start_time = time.perf_counter()
+        self._timer.start()
+
+    def cancel(self):
+        """Stops the copy and removes the temporary file, the file at the chosen location being kept.
+        """
+        if not self._timer.isActive():
+            return
+        self._timer.stop()
+        self._remove_temporary()
+        self.finished.emit(False, "")
+
+    def is_running(self):
+        return self._timer.isActive()
+
+    def is_repack(self):
+        """Returns True if the file is copied to its own location, i.e. repacked.
+        """
+        return os.path.abspath(self.source) == self.filepath
+
+    def rate(self):
+        """Returns the number of megabytes written per second since the start of the copy.
+        """
+        if self._start_time is None:
+            return 0.
+        return self.n_written / 1e6 / max(time.perf_counter() - self._start_time, 1e-6)
+
+    def _step(self):
+        temporary = self.filepath + self.TEMPORARY_SUFFIX
+        try:
+            if self.n_bytes is None:
+                self._plan(temporary)
+            with h5py.File(self.source, 'r') as source, h5py.File(temporary, 'a') as target:
+                start = time.perf_counter()
+                while self._jobs and time.perf_counter() - start < self.STEP_DURATION:
+                    self._run_job(source, target)
+                if not self._jobs:
+                    self._attach_scales(source, target)
+        except Exception as e:
+            self._timer.stop()
+            self._remove_temporary()
+            self.finished.emit(False, str(e))
+            return
+        self.progress.emit(self.n_written, self.n_bytes)
+        # The save can be cancelled by a slot of the progress signal
+        if self._jobs or not self._timer.isActive():
+            return
+        self._timer.stop()
+        try:
+            os.replace(temporary, self.filepath)
+        except OSError as e:
+            self._remove_temporary()
+            self.finished.emit(False, str(e))
+            return
+        self.finished.emit(True, "")
+
+    def _plan(self, temporary):
+        # Lists the elements to copy, in the order of the file, and the number of bytes of their data
+        self.n_bytes = 0
+        with h5py.File(self.source, 'r') as source, h5py.File(temporary, 'w', libver = self.libver):
+            root = source["/"]
+            self._jobs.append(("group", root.name))
+            def visit(name, link):
+                path = f"/{name}"
+                if isinstance(link, h5py.SoftLink):
+                    self._jobs.append(("soft", path, link.path))
+                elif isinstance(link, h5py.ExternalLink):
+                    self._jobs.append(("external", path, link.filename, link.path))
+                elif isinstance(root[name], h5py.Group):
+                    self._jobs.append(("group", path))
+                else:
+                    dataset = root[name]
+                    self._jobs.append(("dataset", path))
+                    if not dataset.is_virtual:
+                        self.n_bytes += dataset.id.get_storage_size()
+                    if dataset.attrs.get("CLASS") == b"DIMENSION_SCALE":
+                        self._scales.append(path)
+                    if "DIMENSION_LIST" in dataset.attrs:
+                        self._scaled.append(path)
+            root.visititems_links(visit)
+
+    def _run_job(self, source, target):
+        job = self._jobs[0]
+        if job[0] == "group":
+            group = target.require_group(job[1])
+            self._copy_attributes(source[job[1]], group)
+        elif job[0] == "soft":
+            target[job[1]] = h5py.SoftLink(job[2])
+        elif job[0] == "external":
+            target[job[1]] = h5py.ExternalLink(job[2], job[3])
+        elif job[0] == "dataset":
+            # The dataset is created with the creation properties of the source, or with the options of the policy, its data being copied by the following jobs
+            dataset = source[job[1]]
+            parent_path, name = job[1].rsplit("/", 1)
+            properties = dataset.id.get_create_plist()
+            layout = properties.get_layout()
+            block = None
+            if self.policy is not None and layout != h5py.h5d.VIRTUAL and dataset.shape:
+                options = self.policy.dataset_options(str(dataset.attrs.get("Brillouin_type", "Other")), dataset.shape, dataset.dtype)
+                target[parent_path].create_dataset(name, shape = dataset.shape, dtype = dataset.dtype, **options)
+                # The data are copied by blocks of whole chunks, so that no compressed chunk is written twice
+                block = options["chunks"][0] if "chunks" in options else 1
+            else:
+                h5py.h5d.create(target[parent_path].id, name.encode(), dataset.id.get_type(), dataset.id.get_space(), dcpl = properties)
+            self._copy_attributes(dataset, target[job[1]])
+            self._jobs.popleft()
+            if layout == h5py.h5d.VIRTUAL or dataset.shape is None or dataset.size == 0:
+                return
+            if block is not None:
+                row_size = max(dataset.nbytes // dataset.shape[0], 1)
+                self._jobs.appendleft(("rows", job[1], 0, max(self.BLOCK_SIZE // row_size // block, 1) * block))
+            elif layout == h5py.h5d.CHUNKED:
+                chunks = deque()
+                dataset.id.chunk_iter(lambda info: chunks.append(info.chunk_offset))
+                if chunks:
+                    self._jobs.appendleft(("chunks", job[1], chunks))
+            elif dataset.shape:
+                row_size = max(dataset.id.get_storage_size() // dataset.shape[0], 1)
+                self._jobs.appendleft(("rows", job[1], 0, max(self.BLOCK_SIZE // row_size, 1)))
+            else:
+                target[job[1]][()] = dataset[()]
+                self.n_written += dataset.id.get_storage_size()
+            return
+        elif job[0] == "chunks":
+            # The chunks are copied as they are stored, with their filter mask
+            source_id, target_id = source[job[1]].id, target[job[1]].id
+            offset = job[2].popleft()
+            filter_mask, data = source_id.read_direct_chunk(offset)
+            target_id.write_direct_chunk(offset, data, filter_mask)
+            self.n_written += len(data)
+            if job[2]:
+                return
+        elif job[0] == "rows":
+            dataset = source[job[1]]
+            start, n_rows = job[2], job[3]
+            end = min(start + n_rows, dataset.shape[0])
+            target[job[1]][start:end] = dataset[start:end]
+            self.n_written += dataset.id.get_storage_size() * (end - start) // dataset.shape[0]
+            if end < dataset.shape[0]:
+                self._jobs[0] = ("rows", job[1], end, n_rows)
+                return
+        self._jobs.popleft()
+
+    @staticmethod
+    def _copy_attributes(source, target):
+        # The attributes of the dimension scales refer to the elements of the source file, the scales are attached again at the end of the copy
+        for name in source.attrs:
+            if name in DIMENSION_SCALE_ATTRIBUTES:
+                continue
+            target.attrs.create(name, source.attrs[name], dtype = source.attrs.get_id(name).dtype)
+
+    def _attach_scales(self, source, target):
+        for path in self._scales:
+            name = source[path].attrs.get("NAME", b"")
+            target[path].make_scale(name.decode() if isinstance(name, bytes) else str(name))
+        # A scale that cannot be attached again (a reference left dangling by an operation of the wrapper) is reported and skipped, the rest of the copy being kept
+        for path in self._scaled:
+            dataset, copy = source[path], target[path]
+            for i, dimension in enumerate(dataset.dims):
+                try:
+                    scales = dimension.values()
+                    label = dimension.label
+                except Exception as e:
+                    self.scale_errors.append((path, str(e)))
+                    continue
+                for scale in scales:
+                    if scale is None or scale.name is None or scale.name not in target:
+                        self.scale_errors.append((path, f"the scale of the dimension {i} does not exist anymore"))
+                        continue
+                    try:
+                        copy.dims[i].attach_scale(target[scale.name])
+                    except Exception as e:
+                        self.scale_errors.append((path, str(e)))
+                if label:
+                    copy.dims[i].label = label
+        self._scales, self._scaled = [], []
+
+    def _remove_temporary(self):
+        try:
+            os.remove(self.filepath + self.TEMPORARY_SUFFIX)
+        except OSError:
+            pass
+
+class SwmrWriter(qtc.QObject):
+    """Keeps the file of a wrapper open in SWMR (single-writer/multiple-reader) mode, so that other processes can read the file while the interface writes it.
+    HDF5 locks a file opened for writing, and the readers cannot open it. In SWMR mode, the readers opening the file with swmr = True (and libver = "latest") read a consistent state of the file, the state of the last flush of the writer. The file stays open in the interface, the operations of the wrapper opening it again in the same process, and is flushed every FLUSH_INTERVAL milliseconds so that the readers see the new data (imports, treatments) without waiting for the file to be closed. The readers call Dataset.refresh to read the data written since they opened the file.
+
+    The file must be in the latest HDF5 format (superblock version 3 or more, see is_swmr_capable), a file in an earlier format being converted with a copy (FileSaver with libver = "latest").
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file.
+    parent : QObject, optional
+        The parent object of the writer.
+
+    Signals
+    -------
+    failed : str
+        Emitted with the error message if the file cannot be flushed anymore, the file being closed.
+    """
+    failed = qtc.Signal(str)
+
+    FLUSH_INTERVAL = 1000 # Interval between two flushes of the file (in milliseconds)
+
+    def __init__(self, filepath, parent = None):
+        super().__init__(parent)
+        self.filepath = filepath
+        self.file = None
+        self._timer = qtc.QTimer(self)
+        self._timer.setInterval(self.FLUSH_INTERVAL)
+        self._timer.timeout.connect(self.flush)
+
+    @staticmethod
+    def is_swmr_capable(filepath):
+        """Returns True if a file is in a format that can be written in SWMR mode.
+        """
+        with h5py.File(filepath, 'r') as file:
+            return file.id.get_create_plist().get_version()[0] >= 3
+
+    def start(self):
+        """Opens the file in SWMR mode and starts the periodic flushes. Raises an OSError, a ValueError or a RuntimeError if the file cannot be opened in SWMR mode.
+        """
+        self.file = h5py.File(self.filepath, 'a', libver = "latest")
+        try:
+            self.file.swmr_mode = True
+        except Exception:
+            self.file.close()
+            self.file = None
+            raise
+        self._timer.start()
+
+    def flush(self):
+        """Writes the modifications of the file so that the readers see them.
+        """
+        if self.file is None:
+            return
+        try:
+            self.file.flush()
+        except Exception as e:
+            self.close()
+            self.failed.emit(str(e))
+
+    def close(self):
+        """Flushes and closes the file, which can then be read by the other processes only once the interface does not write it.
+        """
+        self._timer.stop()
+        if self.file is None:
+            return
+        file, self.file = self.file, None
+        try:
+            file.close()
+        except Exception:
+            pass
+
+    def is_running(self):
+        return self.file is not None
@@ -0,0 +1,162 @@
+import json
+import os
+
+from PySide6 import QtCore as qtc
+
+# Name of the file of the configuration directory of the user storing the loaders of each directory (see LoaderCache)
+LOADERS_FILENAME = "loaders.json"
+
+# Number of bytes read at the beginning of a file to find its creator (see sniff_creator)
+SNIFF_SIZE = 4096
+
+class LoaderCache:
+    """Remembers how the files of each directory have been loaded, by extension: the creator chosen by the user and the parameters given to the loader (see load_data.load_general).
+    The files of a directory and extension already loaded are then loaded directly with the same creator and parameters, without the failed attempts of the loader and the dialogs asking them. The cache is stored in a JSON file of the configuration directory of the user.
+
+    Parameters
+    ----------
+    filepath : str or None
+        The path of the JSON file of the cache, None for a cache that is not stored.
+
+    Attributes
+    ----------
+    loaders : dict
+        The creator and parameters of each extension, by directory: {directory: {extension: {"creator": str or None, "parameters": dict or None}}}.
+    """
+    def __init__(self, filepath = None):
+        self.filepath = filepath
+        self.loaders = {}
+
+    @classmethod
+    def from_config(cls, config_dir):
+        """Reads the cache of the configuration directory of the user, an empty cache being returned if it does not exist or cannot be read.
+        """
+        cache = cls(os.path.join(config_dir, LOADERS_FILENAME))
+        try:
+            with open(cache.filepath, 'r') as file:
+                loaders = json.load(file)
+            if isinstance(loaders, dict):
+                cache.loaders = loaders
+        except (OSError, ValueError):
+            pass
+        return cache
+
+    def save(self):
+        """Writes the cache in its JSON file.
+        """
+        if self.filepath is None:
+            return
+        os.makedirs(os.path.dirname(self.filepath), exist_ok = True)
+        # The cache is written in a temporary file first so that an interrupted write does not leave a corrupted cache
+        with open(self.filepath + ".tmp", 'w') as file:
+            json.dump(self.loaders, file, indent = 4)
+        os.replace(self.filepath + ".tmp", self.filepath)
+
+    @staticmethod
+    def _key(filepath):
+        directory, name = os.path.split(os.path.abspath(filepath))
+        return directory, os.path.splitext(name)[1].lower()
+
+    @staticmethod
+    def _encode(value):
+        # The lists and tuples are stored as JSON arrays, the tuples and the check states of the parameter window being tagged to be restored by _decode
+        if isinstance(value, qtc.Qt.CheckState):
+            return {"CheckState": value.value}
+        if isinstance(value, tuple):
+            return {"tuple": [LoaderCache._encode(v) for v in value]}
+        if isinstance(value, list):
+            return [LoaderCache._encode(v) for v in value]
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            return value
+        return getattr(value, "value", str(value))
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, dict) and list(value) == ["CheckState"]:
+            return qtc.Qt.CheckState(value["CheckState"])
+        if isinstance(value, dict) and list(value) == ["tuple"]:
+            return tuple(LoaderCache._decode(v) for v in value["tuple"])
+        if isinstance(value, list):
+            return [LoaderCache._decode(v) for v in value]
+        return value
+
+    def forget(self, filepath):
+        """Forgets the creator and the parameters remembered for the files of the directory and extension of a file, the cache being saved if they were remembered.
+        """
+        directory, extension = self._key(filepath)
+        if self.loaders.get(directory, {}).pop(extension, None) is None:
+            return
+        if not self.loaders[directory]:
+            del self.loaders[directory]
+        self.save()
+
+    def forget_directory(self, directory):
+        """Forgets the creators and the parameters remembered for all the files of a directory, the cache being saved if they were remembered.
+        """
+        if self.loaders.pop(os.path.abspath(directory), None) is not None:
+            self.save()
+
+    def get(self, filepath):
+        """Returns the creator and the parameters used to load the files of the directory and extension of a file, None if no file of the directory and extension has been loaded.
+        """
+        directory, extension = self._key(filepath)
+        loader = self.loaders.get(directory, {}).get(extension)
+        if loader is None:
+            return None
+        parameters = loader.get("parameters")
+        if isinstance(parameters, dict):
+            parameters = {k: self._decode(v) for k, v in parameters.items()}
+        return loader.get("creator"), parameters
+
+    def set(self, filepath, creator, parameters):
+        """Remembers the creator and the parameters used to load a file for the files of its directory and extension, the cache being saved if they have changed.
+
+        Parameters
+        ----------
+        filepath : str
+            The path of the loaded file.
+        creator : str or None
+            The creator of the file.
+        parameters : dict or None
+            The parameters used to load the file. The lists and tuples are stored as JSON arrays and the check states of the parameter window by their value, the tuples and check states being restored by get.
+        """
+        directory, extension = self._key(filepath)
+        if parameters is not None:
+            parameters = {str(k): self._encode(v) for k, v in parameters.items()}
+        loader = {"creator": creator, "parameters": parameters}
+        if self.loaders.get(directory, {}).get(extension) == loader:
+            return
+        self.loaders.setdefault(directory, {})[extension] = loader
+        self.save()
+
+def sniff_creator(filepath):
+    """Finds the creator of a file from its first bytes and its companion files, without decoding its data, for the formats whose extension is shared by several creators (see load_data.load_general).
+    The .dat files of TimeDomain are binary traces described by a MATLAB file of the same name with the ".m" extension, the ones of GHOST are text files starting with "key: value" lines.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file.
+
+    Returns
+    -------
+    str or None
+        The creator of the file, None if it cannot be found from the header of the file or if the extension of the file does not need a creator.
+    """
+    if os.path.splitext(filepath)[1].lower() != ".dat":
+        return None
+    meta_filepath = filepath[:-4] + ".m"
+    try:
+        if os.path.isfile(meta_filepath):
+            with open(meta_filepath, 'r', errors = 'replace') as file:
+                if "scp." in file.read(SNIFF_SIZE):
+                    return "TimeDomain"
+        with open(filepath, 'rb') as file:
+            header = file.read(SNIFF_SIZE)
+    except OSError:
+        return None
+    lines = header.decode("utf-8", errors = 'replace').splitlines()
+    keys = {line.split(":", 1)[0].strip() for line in lines if ":" in line}
+    if {"Scan amplitude", "Wavelength"} <= keys:
+        return "GHOST"
+    return None
@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 from PySide6 import QtCore as qtc
 from PySide6 import QtWidgets as qtw
 from PySide6 import QtGui as qtg
@@ -11,6 +12,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
 from Main import main
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Needed by the processes importing the files in the frozen application
     app = qtw.QApplication(sys.argv)
     main_win = main.MainWindow()
     main_win.show()
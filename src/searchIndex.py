@@ -0,0 +1,186 @@
+import re
+from bisect import bisect_left
+
+from wrapperIndex import SOURCE_FINGERPRINT
+
+# Names of the fields that can be used in the queries in place of the names of the attributes
+FIELD_ALIASES = {"sample": "measure.sample",
+                 "date": "measure.date_of_measure",
+                 "type": "brillouin_type"}
+
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+")
+
+def tokenize(text):
+    """Splits a text in lowercase alphanumeric tokens.
+    """
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+class SearchIndex:
+    """Inverted index of the elements of a WrapperIndex, used to search the tree view.
+    The names of the elements and the values of the attributes kept in the WrapperIndex (Brillouin type, MEASURE.* and SPECTROMETER.* attributes) are split in tokens, and each token is associated to the paths of the elements where it appears. The index is updated incrementally with the changes of the WrapperIndex.
+
+    A query is a list of terms separated by spaces, all of which have to be matched. A term is either a text, searched in all the fields, or a text preceded by the name of a field ("sample:water", "type:psd", "name:data", "SPECTROMETER.Type:vipa"). The last token of each term is matched as a prefix so that the results can be updated while the query is typed.
+    As the attributes are inherited in the file, an element matches a term if the term is found on the element or on one of its parents ("sample:water type:psd" gives the PSD datasets of the water samples).
+
+    Parameters
+    ----------
+    wrapper_index : wrapperIndex.WrapperIndex
+        The index of the wrapper to search.
+
+    Attributes
+    ----------
+    wrapper_index : wrapperIndex.WrapperIndex
+        The indexed WrapperIndex.
+    postings : dict
+        The paths of the elements (set of str) associated to each key. The keys are in the form "field:token", the keys ":token" gathering the tokens of all the fields.
+    """
+    def __init__(self, wrapper_index):
+        self.wrapper_index = wrapper_index
+        self.postings = {}
+        self._keys = []
+        self._element_keys = {}
+        self._children = {}
+        for path in wrapper_index.entries:
+            self._add(path)
+        self._keys = sorted(self.postings)
+        wrapper_index.listeners.append(self.update)
+
+    def __len__(self):
+        return len(self._element_keys)
+
+    ##########################
+    #   Incremental update   #
+    ##########################
+
+    def update(self, removed, added):
+        """Updates the index after a change of the WrapperIndex, see WrapperIndex.listeners.
+
+        Parameters
+        ----------
+        removed : list of str
+            The paths removed from the WrapperIndex.
+        added : list of str
+            The paths added to the WrapperIndex.
+        """
+        for path in removed:
+            self._remove(path)
+        new_keys = []
+        for path in added:
+            new_keys.extend(self._add(path))
+        if new_keys:
+            # The sort of an already sorted list followed by a few new keys is done in linear time
+            self._keys.extend(new_keys)
+            self._keys.sort()
+
+    def _add(self, path):
+        """Adds the keys of an element to the index and returns the keys that were not in the index yet.
+        """
+        self._remove(path)
+        entry = self.wrapper_index.entries.get(path)
+        if entry is None:
+            return []
+        keys = set()
+        for token in tokenize(path.rsplit("/", 1)[-1]):
+            keys.add(f"name:{token}")
+            keys.add(f":{token}")
+        for name, value in entry.attributes.items():
+            if name == SOURCE_FINGERPRINT:
+                continue
+            field = name.lower()
+            for token in tokenize(value):
+                keys.add(f"{field}:{token}")
+                keys.add(f":{token}")
+        new_keys = []
+        for key in keys:
+            paths = self.postings.get(key)
+            if paths is None:
+                paths = self.postings[key] = set()
+                new_keys.append(key)
+            paths.add(path)
+        self._element_keys[path] = keys
+        self._children.setdefault(path.rpartition("/")[0], set()).add(path)
+        return new_keys
+
+    def _remove(self, path):
+        # The keys left without any path are kept, so that the sorted list of keys does not have to be updated
+        keys = self._element_keys.pop(path, None)
+        if keys is None:
+            return
+        for key in keys:
+            self.postings[key].discard(path)
+        # Only the groups having children are kept in self._children
+        parent = path.rpartition("/")[0]
+        self._children[parent].discard(path)
+        if not self._children[parent]:
+            del self._children[parent]
+
+    ##########################
+    #        Searches        #
+    ##########################
+
+    def search(self, query):
+        """Returns the paths of the elements matching a query.
+
+        Parameters
+        ----------
+        query : str
+            The query, see the description of the class.
+
+        Returns
+        -------
+        set of str
+            The paths of the matching elements.
+        """
+        term_matches = []
+        for term in query.split():
+            matches = self._search_term(term)
+            if matches is None:
+                continue
+            if not matches:
+                return set()
+            term_matches.append(matches)
+        if not term_matches:
+            return set()
+        if len(term_matches) == 1:
+            return term_matches[0]
+
+        # The matching elements are the elements found by one of the terms whose other terms are found on themselves or on their parents
+        closures = sorted((self._with_descendants(matches) for matches in term_matches), key = len)
+        result = closures[0]
+        for closure in closures[1:]:
+            result = result & closure
+        return set().union(*(result & matches for matches in term_matches))
+
+    def _search_term(self, term):
+        """Returns the paths of the elements where all the tokens of a term are found, None if the term has no token.
+        """
+        field, _, text = term.rpartition(":")
+        field = FIELD_ALIASES.get(field.lower(), field.lower())
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        result = self._search_prefix(f"{field}:{tokens[-1]}")
+        for token in tokens[:-1]:
+            result &= self.postings.get(f"{field}:{token}", set())
+        return result
+
+    def _with_descendants(self, paths):
+        """Returns the given elements and all their descendants. The descendants are added level by level with set operations, only the groups being gone through.
+        """
+        result = paths
+        groups = paths & self._children.keys()
+        while groups:
+            children = set().union(*(self._children[group] for group in groups))
+            result = result | children
+            groups = children & self._children.keys()
+        return result
+
+    def _search_prefix(self, prefix):
+        """Returns the paths associated to all the keys starting with the given prefix.
+        """
+        paths = set()
+        i = bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            paths |= self.postings[self._keys[i]]
+            i += 1
+        return paths
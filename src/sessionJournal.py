@@ -0,0 +1,293 @@
+import inspect
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+from PySide6 import QtCore as qtc
+
+from HDF5_BLS.wrapper import is_tempfile
+
+# Name of the directory of the configuration directory of the user storing the journals of the sessions (see SessionJournal)
+JOURNALS_DIRNAME = "journals"
+
+# Methods of the wrapper whose calls are recorded in the journal (see SessionJournal.attach)
+JOURNALED_METHODS = ("add_dictionnary", "add_hdf5", "update_property", "change_name", "move", "delete_element", "change_brillouin_type", "create_group",
+                     "add_treated_data", "add_attributes", "add_abscissa", "add_frequency", "add_PSD", "add_raw_data", "add_other", "combine_datasets",
+                     "copy_dataset", "import_properties_data")
+
+class SessionJournal:
+    """Append-only journal of the operations made on the file of a wrapper, written to recover a session that ended unexpectedly.
+    The journal is a JSON lines file: each operation is recorded when it starts (its name and the references of its arguments) and when it ends, so that an operation interrupted by a crash is known. The arrays are not written in the journal, only their shape and type: the imports are recorded with the paths of their source files, which are read again when the operations are replayed (see replay). The saves of the file are recorded too, the operations recorded before a save being in the saved file.
+
+    The journal is locked while its session runs and removed when the session is closed, so that the journals left in the directory with no lock are the ones of the sessions that ended unexpectedly (see orphans).
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the journal.
+
+    Attributes
+    ----------
+    n_records : int
+        The number of records written in the journal.
+    """
+    SYNC_INTERVAL = 1. # Minimal duration between two synchronisations of the journal on the disk (in seconds)
+    LOCK_SUFFIX = ".lock"
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.n_records = 0
+        self._file = None
+        self._lock = None
+        self._depth = 0
+        self._last_sync = 0.
+
+    @classmethod
+    def start(cls, directory, wrapper):
+        """Creates and locks a new journal in a directory, records the file of the wrapper and attaches the journal to the wrapper.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the journals.
+        wrapper : HDF5_BLS.wrapper.Wrapper
+            The wrapper whose operations are recorded.
+
+        Returns
+        -------
+        SessionJournal
+            The journal.
+        """
+        os.makedirs(directory, exist_ok = True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl"
+        journal = cls(os.path.join(directory, name))
+        journal._lock = qtc.QLockFile(journal.filepath + cls.LOCK_SUFFIX)
+        journal._lock.tryLock(0)
+        journal._file = open(journal.filepath, 'a', encoding = 'utf-8')
+        journal._write({"operation": "open", "file": wrapper.filepath, "temporary": is_tempfile(wrapper.filepath)}, sync = True)
+        journal.attach(wrapper)
+        return journal
+
+    @classmethod
+    def orphans(cls, directory):
+        """Returns the journals of a directory left by the sessions that ended unexpectedly, from the most recent one.
+        """
+        try:
+            names = sorted((name for name in os.listdir(directory) if name.endswith(".jsonl")), reverse = True)
+        except OSError:
+            return []
+        orphans = []
+        for name in names:
+            filepath = os.path.join(directory, name)
+            # The lock of a running session cannot be taken, the locks of the sessions that ended unexpectedly are stale and are taken
+            lock = qtc.QLockFile(filepath + cls.LOCK_SUFFIX)
+            if lock.tryLock(0):
+                lock.unlock()
+                orphans.append(filepath)
+        return orphans
+
+    @staticmethod
+    def read(filepath):
+        """Returns the records of a journal, the last line being ignored if it has been partially written.
+        """
+        records = []
+        with open(filepath, 'r', encoding = 'utf-8') as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        return records
+
+    @staticmethod
+    def remove(filepath):
+        """Removes a journal and its lock.
+        """
+        for path in (filepath, filepath + SessionJournal.LOCK_SUFFIX):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def attach(self, wrapper):
+        """Records the calls of the methods of JOURNALED_METHODS of a wrapper, the methods of the wrapper instance being replaced by methods recording their calls. The journal is stored in the "journal" attribute of the wrapper, for the functions writing the file directly (see journal_operation).
+        """
+        for name in JOURNALED_METHODS:
+            method = getattr(wrapper, name, None)
+            if method is not None:
+                setattr(wrapper, name, self._journaled(name, method))
+        wrapper.journal = self
+
+    def close(self):
+        """Closes the journal at the end of its session and removes it.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if self._lock is not None:
+            self._lock.unlock()
+        self.remove(self.filepath)
+
+    @contextmanager
+    def operation(self, operation, arguments):
+        """Records an operation, its start being written before the operation and its end after it. The operations run by a recorded operation are not recorded.
+
+        Parameters
+        ----------
+        operation : str
+            The name of the operation.
+        arguments : dict
+            The arguments of the operation by name, the arrays being recorded by their shape and type only (see reference).
+        """
+        if self._file is None or self._depth > 0:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        identifier = self.n_records
+        self._write({"id": identifier, "operation": operation, "arguments": reference(arguments)})
+        self._depth += 1
+        try:
+            yield
+        except Exception as e:
+            self._write({"id": identifier, "status": "failed", "error": str(e)})
+            raise
+        finally:
+            self._depth -= 1
+        self._write({"id": identifier, "status": "done"})
+
+    def saved(self, filepath):
+        """Records a save of the file at a location, which is then the file of the session.
+        """
+        if self._file is not None:
+            self._write({"operation": "save", "file": os.path.abspath(filepath), "temporary": is_tempfile(filepath)}, sync = True)
+
+    def _journaled(self, name, method):
+        signature = inspect.signature(method)
+
+        @wraps(method)
+        def journaled(*args, **kwargs):
+            try:
+                arguments = signature.bind(*args, **kwargs).arguments
+            except TypeError:
+                # The wrapper reports the wrong arguments itself
+                return method(*args, **kwargs)
+            with self.operation(name, arguments):
+                return method(*args, **kwargs)
+        return journaled
+
+    def _write(self, record, sync = False):
+        record["time"] = time.time()
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self.n_records += 1
+        # The journal is synchronised on the disk at most every SYNC_INTERVAL seconds, so that the bulk operations are not slowed down
+        now = time.monotonic()
+        if sync or now - self._last_sync >= self.SYNC_INTERVAL:
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+
+@contextmanager
+def journal_operation(wrapper, operation, /, **arguments):
+    """Records an operation in the journal of a wrapper, if it has one (see SessionJournal.operation). Used by the functions writing the file of the wrapper without its methods.
+    """
+    journal = getattr(wrapper, "journal", None)
+    if journal is None:
+        yield
+        return
+    with journal.operation(operation, arguments):
+        yield
+
+def reference(value):
+    """Returns a JSON representation of the arguments of an operation: the arrays are represented by their shape and type ({"array": [shape, dtype]}), the other objects by their value.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): reference(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [reference(v) for v in value]
+    if hasattr(value, "shape") and hasattr(value, "dtype"):
+        if value.shape == ():
+            return value.item() if hasattr(value, "item") else str(value)
+        return {"array": [list(value.shape), str(value.dtype)]}
+    if hasattr(value, "value"):
+        return reference(value.value)
+    return str(value)
+
+def has_array(arguments):
+    """Returns True if the recorded arguments of an operation reference an array, whose data is not in the journal.
+    """
+    if isinstance(arguments, dict):
+        return set(arguments) == {"array"} or any(has_array(v) for v in arguments.values())
+    if isinstance(arguments, list):
+        return any(has_array(v) for v in arguments)
+    return False
+
+def session_state(records):
+    """Returns the state of a session from the records of its journal.
+
+    Returns
+    -------
+    filepath : str or None
+        The file of the session, the last one opened or saved.
+    saved : bool
+        True if the file has been saved during the session or is not a temporary file, i.e. if the operations recorded before the last save are in a file the user knows.
+    operations : list of dict
+        The start records of the operations completed since the last save, in order.
+    interrupted : list of dict
+        The start records of the operations that had started but not ended when the session ended.
+    """
+    filepath, saved = None, False
+    started, operations = {}, []
+    for record in records:
+        if record.get("operation") in ("open", "save"):
+            filepath = record.get("file")
+            saved = not record.get("temporary", False)
+            operations = []
+        elif "status" in record:
+            start = started.pop(record.get("id"), None)
+            if start is not None and record["status"] == "done":
+                operations.append(start)
+        elif "id" in record:
+            started[record["id"]] = record
+    return filepath, saved, operations, list(started.values())
+
+def replay(operations, handlers):
+    """Runs again recorded operations.
+
+    Parameters
+    ----------
+    operations : list of dict
+        The start records of the operations (see session_state).
+    handlers : dict
+        The function running each operation, by name, called with the recorded arguments. The operations whose arguments reference an array are only run by the handlers of the operations whose data is read again (imports of source files) and are otherwise skipped.
+
+    Returns
+    -------
+    replayed : list of str
+        The names of the operations run.
+    skipped : list of (str, str)
+        The names of the operations that could not be run with the reason.
+    """
+    replayed, skipped = [], []
+    for record in operations:
+        name, arguments = record["operation"], record.get("arguments", {})
+        handler = handlers.get(name)
+        if handler is None:
+            skipped.append((name, "it cannot be replayed"))
+        elif has_array(arguments):
+            skipped.append((name, "its data is not stored in the journal"))
+        else:
+            try:
+                handler(**arguments)
+                replayed.append(name)
+            except Exception as e:
+                skipped.append((name, str(e)))
+    return replayed, skipped
@@ -0,0 +1,214 @@
+import json
+import os
+import numpy as np
+
+# Name of the file defining the storage policy of the HDF5 files of a directory (project) or of the user
+POLICY_FILENAME = "storage_policy.json"
+
+class StoragePolicy:
+    """Chooses the chunk shape and the compression of the datasets created during an import, from their Brillouin type (role), shape and type.
+
+    The chunks are shaped after the way each role is read:
+        - "spectra": the spectral axis (the last one) is kept whole and the other axes are cut first, so that a spectrum is read from a single chunk (treatment of the raw data and PSD).
+        - "images": the spectral axis is cut first, so that an image at a given frequency is read from a few chunks.
+        - "tiles": the largest axes are cut first, giving compact blocks (maps of shift, linewidth, ...).
+        - "contiguous": the dataset is not chunked and not compressed.
+    The datasets smaller than min_chunked_size bytes are always contiguous, the chunking and the filters costing more than they save on them.
+
+    A policy is described by a dictionnary (see to_dict), stored in a "storage_policy.json" file. The file placed in the directory of an HDF5 file applies to this file (project policy), the one of the configuration directory of the user applies to the other files (see for_file). The dictionnary can start from one of the PRESETS with the "preset" key and override its values.
+
+    Parameters
+    ----------
+    name : str, optional
+        The name of the policy.
+    compression : str or None, optional
+        The compression filter ("gzip", "lzf" or None).
+    compression_opts : int or None, optional
+        The level of the gzip compression (0 to 9).
+    shuffle : bool, optional
+        Whether the shuffle filter is applied before the compression.
+    chunk_size : int, optional
+        The target size of the chunks in bytes.
+    min_chunked_size : int, optional
+        The size in bytes under which the datasets are contiguous.
+    layouts : dict, optional
+        The layout of each Brillouin type, completing DEFAULT_LAYOUTS. The "*" key gives the layout of the types that are not in the dictionnary, in place of DEFAULT_LAYOUTS and DEFAULT_LAYOUT.
+    """
+    # Layout of the chunks of each Brillouin type
+    DEFAULT_LAYOUTS = {"Raw_data": "spectra",
+                       "PSD": "spectra",
+                       "Frequency": "spectra",
+                       "Abscissa": "contiguous",
+                       "Shift": "tiles",
+                       "Shift_err": "tiles",
+                       "Linewidth": "tiles",
+                       "Linewidth_err": "tiles",
+                       "Amplitude": "tiles",
+                       "Amplitude_err": "tiles",
+                       "BLT": "tiles",
+                       "BLT_err": "tiles"}
+    DEFAULT_LAYOUT = "tiles"
+    LAYOUTS = ("spectra", "images", "tiles", "contiguous")
+
+    def __init__(self, name = "custom", compression = "gzip", compression_opts = 4, shuffle = True, chunk_size = 262144, min_chunked_size = 65536, layouts = None):
+        if compression not in ("gzip", "lzf", None):
+            raise ValueError(f"Unsupported compression filter: {compression}")
+        for layout in (layouts or {}).values():
+            if layout not in self.LAYOUTS:
+                raise ValueError(f"Unknown chunk layout: {layout}")
+        self.name = name
+        self.compression = compression
+        self.compression_opts = compression_opts if compression == "gzip" else None
+        self.shuffle = shuffle and compression is not None
+        self.chunk_size = chunk_size
+        self.min_chunked_size = min_chunked_size
+        self.layouts = dict(layouts or {})
+
+    ##########################
+    #     Configuration      #
+    ##########################
+
+    def to_dict(self):
+        """Returns the description of the policy, see from_dict.
+        """
+        return {"name": self.name,
+                "compression": self.compression,
+                "compression_opts": self.compression_opts,
+                "shuffle": self.shuffle,
+                "chunk_size": self.chunk_size,
+                "min_chunked_size": self.min_chunked_size,
+                "layouts": dict(self.layouts)}
+
+    @classmethod
+    def from_dict(cls, dic):
+        """Creates a policy from its description.
+
+        Parameters
+        ----------
+        dic : dict
+            The parameters of the policy (see the parameters of the class), the "preset" key giving the name of the preset whose values are used for the missing parameters.
+
+        Returns
+        -------
+        StoragePolicy
+            The policy.
+        """
+        dic = dict(dic)
+        preset = dic.pop("preset", "balanced")
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown storage policy preset: {preset}")
+        parameters = PRESETS[preset].to_dict()
+        parameters.update(dic)
+        return cls(**parameters)
+
+    @classmethod
+    def load(cls, filepath):
+        """Reads a policy from a JSON file, see from_dict.
+        """
+        with open(filepath, 'r') as file:
+            return cls.from_dict(json.load(file))
+
+    def save(self, filepath):
+        """Writes the policy in a JSON file.
+        """
+        with open(filepath, 'w') as file:
+            json.dump(self.to_dict(), file, indent = 4)
+
+    @classmethod
+    def for_file(cls, filepath, config_dir = None):
+        """Returns the policy applying to an HDF5 file: the one of the directory of the file, or else the one of the user, or else the "balanced" preset.
+
+        Parameters
+        ----------
+        filepath : str or None
+            The path of the HDF5 file, None for a file that has not been saved yet.
+        config_dir : str, optional
+            The configuration directory of the user.
+
+        Returns
+        -------
+        StoragePolicy
+            The policy.
+        """
+        for directory in (os.path.dirname(os.path.abspath(filepath)) if filepath else None, config_dir):
+            if directory is None:
+                continue
+            policy_filepath = os.path.join(directory, POLICY_FILENAME)
+            if os.path.isfile(policy_filepath):
+                return cls.load(policy_filepath)
+        return PRESETS["balanced"]
+
+    ##########################
+    #    Dataset options     #
+    ##########################
+
+    def layout(self, role):
+        """Returns the layout of the chunks of a Brillouin type.
+        """
+        if role.startswith("Abscissa"):
+            role = "Abscissa"
+        if role in self.layouts:
+            return self.layouts[role]
+        if "*" in self.layouts:
+            return self.layouts["*"]
+        return self.DEFAULT_LAYOUTS.get(role, self.DEFAULT_LAYOUT)
+
+    def dataset_options(self, role, shape, dtype):
+        """Returns the storage options of a dataset.
+
+        Parameters
+        ----------
+        role : str
+            The Brillouin type of the dataset.
+        shape : tuple
+            The shape of the dataset.
+        dtype : numpy.dtype
+            The type of the dataset.
+
+        Returns
+        -------
+        dict
+            The keyword arguments to give to h5py.Group.create_dataset ("chunks", "compression", "compression_opts" and "shuffle"), empty for a contiguous dataset.
+        """
+        dtype = np.dtype(dtype)
+        if dtype.hasobject or dtype.kind in "SUO" or len(shape) == 0 or 0 in shape:
+            return {}
+        layout = self.layout(role)
+        if layout == "contiguous" or int(np.prod(shape)) * dtype.itemsize < self.min_chunked_size:
+            return {}
+        options = {"chunks": self.chunk_shape(layout, shape, dtype.itemsize)}
+        if self.compression is not None:
+            options["compression"] = self.compression
+            if self.compression_opts is not None:
+                options["compression_opts"] = self.compression_opts
+            options["shuffle"] = self.shuffle
+        return options
+
+    def chunk_shape(self, layout, shape, itemsize):
+        """Returns the shape of the chunks of a dataset, see the layouts in the description of the class.
+        """
+        chunk = list(shape)
+        n_elements = max(self.chunk_size // itemsize, 1)
+        if layout == "spectra":
+            order = list(range(len(shape) - 1)) + [len(shape) - 1]
+        elif layout == "images":
+            order = [len(shape) - 1] + list(range(len(shape) - 1))
+        else:
+            order = None
+        while int(np.prod(chunk)) > n_elements:
+            if order is None:
+                # The largest axis is halved
+                axis = max(range(len(chunk)), key = lambda i: chunk[i])
+                chunk[axis] = (chunk[axis] + 1) // 2
+                continue
+            axis = next(i for i in order if chunk[i] > 1)
+            # The axis is reduced just enough to reach the target size if possible, to 1 otherwise
+            others = int(np.prod(chunk)) // chunk[axis]
+            chunk[axis] = max(n_elements // others, 1)
+        return tuple(chunk)
+
+# Predefined policies
+PRESETS = {"none": StoragePolicy("none", compression = None, layouts = {"*": "contiguous"}),
+           "fast": StoragePolicy("fast", compression = "lzf", shuffle = True),
+           "balanced": StoragePolicy("balanced", compression = "gzip", compression_opts = 4, shuffle = True),
+           "compact": StoragePolicy("compact", compression = "gzip", compression_opts = 9, shuffle = True, chunk_size = 1048576)}
@@ -0,0 +1,119 @@
+import os
+from datetime import datetime
+from functools import partial
+import numpy as np
+
+from HDF5_BLS import load_data
+
+# Size in bytes from which the files are streamed instead of being loaded in memory (see load_streamed)
+STREAMING_SIZE = 64 * 1024 * 1024
+
+class StreamedArray:
+    """Array of a loaded file whose frames (the elements of its first dimension) are only read when they are written, so that files larger than the memory can be imported.
+    It can be used in place of a numpy array in the dictionnaries returned by the loaders: the batch writer (see wrapperWriter.BatchWriter) creates the dataset with the shape and type of the array and writes it by blocks of frames, while the functions expecting a numpy array read the whole array through numpy.asarray.
+    The array only stores the function reading the frames, so it can be sent from a process to another without reading the data.
+
+    Parameters
+    ----------
+    shape : tuple
+        The shape of the array.
+    dtype : numpy.dtype
+        The type of the array.
+    reader : callable
+        The function returning the frames between two indexes (start, stop) as a numpy array. It has to be picklable to be used by a pool of processes (a module level function or a functools.partial of one).
+    """
+    def __init__(self, shape, dtype, reader):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.reader = reader
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype = None, copy = None):
+        data = self.read(0, len(self))
+        return data if dtype is None else data.astype(dtype)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def read(self, start, stop):
+        """Reads the frames between two indexes.
+        """
+        return np.asarray(self.reader(start, stop), dtype = self.dtype)
+
+##########################
+#     Frame readers      #
+##########################
+
+def _read_npy(filepath, start, stop):
+    return np.array(np.load(filepath, mmap_mode = 'r')[start:stop])
+
+def _read_sif(filepath, shape, start, stop):
+    import sif_parser
+    data, _ = sif_parser.np_open(filepath, lazy = 'memmap')
+    return np.array(data.reshape(shape)[start:stop])
+
+##########################
+#        Loaders         #
+##########################
+
+def stream_npy(filepath):
+    """Loads a .npy file as load_data.load_general does, the array being a StreamedArray.
+    """
+    data = np.load(filepath, mmap_mode = 'r')
+    name = ".".join(os.path.basename(filepath).split(".")[:-1])
+    return {"Raw_data": {"Name": "Raw_data", "Data": StreamedArray(data.shape, data.dtype, partial(_read_npy, filepath))},
+            "Attributes": {"FILEPROP.Name": name}}
+
+def stream_sif(filepath, parameters = None):
+    """Loads a .sif file as load_data.load_general does, the array being a StreamedArray. The "shape" parameter is supported, not the "raster" one.
+    """
+    import sif_parser
+    data, info = sif_parser.np_open(filepath, lazy = 'memmap')
+    shape = data.shape
+    if parameters is not None and "shape" in parameters:
+        shape = tuple(parameters["shape"])
+        if int(np.prod(shape)) != data.size:
+            raise ValueError(f"The shape {parameters['shape']} is not compatible with the data.")
+    attributes = {'MEASURE.Exposure_(s)': str(info["ExposureTime"]),
+                  'SPECTROMETER.Detector_Model': info["DetectorType"],
+                  'MEASURE.Date_of_measure': datetime.fromtimestamp(info["ExperimentTime"]).isoformat(),
+                  'FILEPROP.Name': os.path.splitext(filepath)[0]}
+    return {"Raw_data": {"Name": "Raw data", "Data": StreamedArray(shape, data.dtype, partial(_read_sif, filepath, shape))},
+            "Attributes": attributes}
+
+def load_streamed(filepath, creator = None, parameters = None):
+    """Loads a file as load_data.load_general does, the large files of the formats that can be read frame by frame (.npy, .sif) being returned as StreamedArray so that they are never loaded in memory as a whole.
+    The files smaller than STREAMING_SIZE, the other formats and the parameters that need the whole array are loaded by load_data.load_general.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file.
+    creator : str, optional
+        The creator of the file, see load_data.load_general.
+    parameters : dict, optional
+        The parameters used to load the file, see load_data.load_general.
+
+    Returns
+    -------
+    dict
+        The dictionnary of the file.
+    """
+    extension = os.path.splitext(filepath)[1].lower()
+    if os.path.getsize(filepath) >= STREAMING_SIZE:
+        if extension == ".npy":
+            return stream_npy(filepath)
+        if extension == ".sif" and not (parameters and parameters.get("raster")):
+            try:
+                return stream_sif(filepath, parameters)
+            except ValueError:
+                # The frames are not contiguous in the file or the shape is not compatible with the data: the file is loaded by the library, which reports the errors
+                pass
+    return load_data.load_general(filepath, creator = creator, parameters = parameters)
@@ -0,0 +1,63 @@
+import json
+import os
+
+# Name of the file of the configuration directory of the user storing the options of the interface (see UserSettings)
+SETTINGS_FILENAME = "settings.json"
+
+class UserSettings:
+    """Options of the interface chosen by the user in the menus, stored in a JSON file of the configuration directory of the user so that they are kept from one session to the next.
+
+    Parameters
+    ----------
+    filepath : str or None
+        The path of the JSON file of the settings, None for settings that are not stored.
+
+    Attributes
+    ----------
+    values : dict
+        The value of each option, by name.
+    """
+    def __init__(self, filepath = None):
+        self.filepath = filepath
+        self.values = {}
+
+    @classmethod
+    def from_config(cls, config_dir):
+        """Reads the settings of the configuration directory of the user, empty settings being returned if they do not exist or cannot be read.
+        """
+        settings = cls(os.path.join(config_dir, SETTINGS_FILENAME))
+        try:
+            with open(settings.filepath, 'r') as file:
+                values = json.load(file)
+            if isinstance(values, dict):
+                settings.values = values
+        except (OSError, ValueError):
+            pass
+        return settings
+
+    def save(self):
+        """Writes the settings in their JSON file.
+        """
+        if self.filepath is None:
+            return
+        os.makedirs(os.path.dirname(self.filepath), exist_ok = True)
+        # The settings are written in a temporary file first so that an interrupted write does not leave corrupted settings
+        with open(self.filepath + ".tmp", 'w') as file:
+            json.dump(self.values, file, indent = 4)
+        os.replace(self.filepath + ".tmp", self.filepath)
+
+    def get(self, name, default = None):
+        """Returns the value of an option, the default value if it has not been set or if it is not of the type of the default value.
+        """
+        value = self.values.get(name, default)
+        if default is not None and type(value) is not type(default):
+            return default
+        return value
+
+    def set(self, name, value):
+        """Sets the value of an option, the settings being saved if it has changed.
+        """
+        if self.values.get(name) == value and name in self.values:
+            return
+        self.values[name] = value
+        self.save()
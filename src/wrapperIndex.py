@@ -0,0 +1,800 @@
+import hashlib
+import os
+import pickle
+import h5py
+
+HDF5_group = h5py._hl.group.Group
+HDF5_dataset = h5py._hl.dataset.Dataset
+
+# Version of the format of the structure cache, to increment when the content of the IndexEntry changes
+CACHE_VERSION = 5
+# Number of bytes at the beginning of the file used to compute the header hash of the cache key
+CACHE_HEADER_SIZE = 65536
+# Attribute storing the fingerprint of the source file of an imported group (see customWorkers.source_fingerprint)
+SOURCE_FINGERPRINT = "FILEPROP.Source_fingerprint"
+# Attribute of a virtual dataset listing the paths of the datasets it maps (see wrapperWriter.combine_virtual)
+VIRTUAL_SOURCES = "Virtual_sources"
+
+def file_key(filepath):
+    """Returns the key identifying the state of a file in the structure cache: its absolute path, size, modification time and a hash of its first bytes.
+
+    Parameters
+    ----------
+    filepath : str
+        The path to the file.
+
+    Returns
+    -------
+    tuple or None
+        The key of the file, None if the file does not exist.
+    """
+    if filepath is None or not os.path.isfile(filepath):
+        return None
+    filepath = os.path.abspath(filepath)
+    stat = os.stat(filepath)
+    with open(filepath, 'rb') as file:
+        header_hash = hashlib.sha1(file.read(CACHE_HEADER_SIZE)).hexdigest()
+    return (filepath, stat.st_size, stat.st_mtime_ns, header_hash)
+
+def cache_filepath(directory, filepath):
+    """Returns the path of the structure cache of a file in the given cache directory.
+    """
+    return os.path.join(directory, hashlib.sha1(os.path.abspath(filepath).encode()).hexdigest() + ".pkl")
+
+class IndexEntry:
+    """Metadata of one element of the HDF5 file stored in the WrapperIndex.
+
+    Attributes
+    ----------
+    kind : type
+        The h5py type of the element (h5py._hl.group.Group or h5py._hl.dataset.Dataset).
+    brillouin_type : str or None
+        The "Brillouin_type" attribute of the element, None if it is not defined.
+    shape : tuple or None
+        The shape of the dataset, None for groups.
+    dtype : numpy.dtype or None
+        The type of the dataset, None for groups.
+    attributes : dict
+        The attributes of the element whose name is in WrapperIndex.INDEXED_ATTRIBUTES or starts with one of WrapperIndex.INDEXED_PREFIXES.
+    children : list of str
+        The names of the children of the element, in the order of the file.
+    link : tuple or None
+        The path of the file and the path in this file of the target of the element if it is an external link (a mounted file, see wrapperWriter.mount_hdf5), None otherwise.
+    """
+    __slots__ = ("kind", "brillouin_type", "shape", "dtype", "attributes", "children", "link")
+
+    def __init__(self, kind, brillouin_type = None, shape = None, dtype = None, attributes = None, link = None):
+        self.kind = kind
+        self.brillouin_type = brillouin_type
+        self.shape = shape
+        self.dtype = dtype
+        self.attributes = attributes if attributes is not None else {}
+        self.children = []
+        self.link = link
+
+class WrapperIndex:
+    """In-memory index of the structure of the file of a wrapper, built in a single pass over the file.
+    It reproduces the reading methods of the wrapper used to browse the file (get_type, get_children_elements) without opening the file, and is updated incrementally after each modification of the wrapper.
+
+    The index can also be created with only the root of the file and filled progressively (see customWorkers.StructureScanner): the groups whose children have not been read yet are kept in "unscanned", and are read from the file as soon as a lookup needs them.
+    Finally, the index can be saved in a cache directory (write_cache) and loaded from it when the file has not changed (from_cache). The groups loaded from the cache are kept in "unverified" until they have been read again from the file.
+
+    Parameters
+    ----------
+    wrapper : wrapper.Wrapper
+        The wrapper to index.
+    scan : bool, optional
+        If True (default), the whole file is read at creation. If False, only the root of the file is read.
+
+    Attributes
+    ----------
+    wrapper : wrapper.Wrapper
+        The indexed wrapper.
+    entries : dict
+        The entries of the index, with the paths of the elements as keys ("Brillouin/Group/...").
+    unscanned : set of str
+        The paths of the groups of the index whose children have not been read yet.
+    unverified : set of str
+        The paths of the groups loaded from the cache whose children have not been compared to the file yet.
+    listeners : list of callable
+        Functions called after each incremental update of the index, with the list of the paths removed from the index and the list of the paths added to it (a modified element being both removed and added).
+    modified : set of str
+        The paths of the elements created, modified, moved or removed by the incremental updates since the index was created or since mark_saved was called. The elements read by the structure scan are not modified elements.
+    """
+    # Attributes kept in the index. The other attributes are read from the file when needed.
+    INDEXED_ATTRIBUTES = ("Brillouin_type",
+                          "MEASURE.Sample",
+                          "MEASURE.Date_of_measure",
+                          "SPECTROMETER.Type",
+                          "Process_PSD",
+                          SOURCE_FINGERPRINT,
+                          VIRTUAL_SOURCES)
+    # Prefixes of the other attributes kept in the index
+    INDEXED_PREFIXES = ("MEASURE.", "SPECTROMETER.")
+
+    def __init__(self, wrapper, scan = True):
+        self.wrapper = wrapper
+        self.entries = {}
+        self.unscanned = set()
+        self.unverified = set()
+        self.listeners = []
+        self.modified = set()
+        if scan:
+            self.build()
+        else:
+            self.build_root()
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    ##########################
+    #     Index creation     #
+    ##########################
+
+    def build(self):
+        """Builds the index from the file of the wrapper.
+        """
+        with h5py.File(self.wrapper.filepath, 'r') as file:
+            self.entries = self._read_subtree(file["Brillouin"], "Brillouin")
+        self.unscanned = set()
+        self.unverified = set()
+
+    def build_root(self):
+        """Builds an index containing only the root of the file, the other groups being read with scan_group or add_scanned.
+        """
+        with h5py.File(self.wrapper.filepath, 'r') as file:
+            self.entries = {"Brillouin": self._read_entry(file["Brillouin"])}
+        self.unscanned = {"Brillouin"}
+        self.unverified = set()
+
+    @classmethod
+    def from_cache(cls, wrapper, directory, key):
+        """Creates the index of a wrapper from the structure cache. Only the root of the file is read, the groups of the cache being marked as unverified.
+
+        Parameters
+        ----------
+        wrapper : wrapper.Wrapper
+            The wrapper to index.
+        directory : str
+            The cache directory.
+        key : tuple or None
+            The key of the file when it was opened (see file_key).
+
+        Returns
+        -------
+        WrapperIndex or None
+            The index, None if the file is not in the cache or if it has changed since it was cached.
+        """
+        if key is None:
+            return None
+        try:
+            with open(cache_filepath(directory, wrapper.filepath), 'rb') as file:
+                cache = pickle.load(file)
+        except Exception:
+            return None
+        if cache.get("version") != CACHE_VERSION or cache.get("key") != key:
+            return None
+
+        index = cls(wrapper, scan = False)
+        root = index.entries["Brillouin"]
+        entries = {}
+        for path, (is_group, brillouin_type, shape, dtype, attributes, children, link) in cache["entries"].items():
+            entry = IndexEntry(HDF5_group if is_group else HDF5_dataset, brillouin_type, shape, dtype, attributes, link)
+            entry.children = children
+            entries[path] = entry
+        # The root is the one read from the file, with the children of the cache
+        root.children = entries["Brillouin"].children
+        entries["Brillouin"] = root
+        index.entries = entries
+        index.unscanned = set(cache["unscanned"])
+        index.unverified = set(p for p, e in entries.items() if e.kind is HDF5_group and p not in index.unscanned)
+        return index
+
+    def write_cache(self, directory):
+        """Writes the index in the structure cache, with the current key of the file.
+
+        Parameters
+        ----------
+        directory : str
+            The cache directory.
+        """
+        key = file_key(self.wrapper.filepath)
+        if key is None:
+            return
+        cache = {"version": CACHE_VERSION,
+                 "key": key,
+                 "entries": {p: (e.kind is HDF5_group, e.brillouin_type, e.shape, e.dtype, e.attributes, e.children, e.link) for p, e in self.entries.items()},
+                 "unscanned": list(self.unscanned)}
+        os.makedirs(directory, exist_ok = True)
+        filepath = cache_filepath(directory, self.wrapper.filepath)
+        # The cache is written in a temporary file first so that an interrupted write does not leave a corrupted cache
+        with open(filepath + ".tmp", 'wb') as file:
+            pickle.dump(cache, file, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(filepath + ".tmp", filepath)
+
+    def is_scanned(self, path):
+        """Returns True if the children of the element are known to the index.
+        """
+        return path not in self.unscanned
+
+    def read_children(self, group):
+        """Reads the entries of the children of an opened group. The index is not modified, so this method can be called from another thread.
+
+        Parameters
+        ----------
+        group : h5py.Group
+            The opened group.
+
+        Returns
+        -------
+        list of (str, IndexEntry)
+            The names and entries of the children of the group, in the order of the file.
+        """
+        children = []
+        for name in group:
+            link = group.get(name, getlink = True)
+            if isinstance(link, h5py.ExternalLink):
+                children.append((name, self._read_link(group, name, link)))
+            else:
+                children.append((name, self._read_entry(group[name])))
+        return children
+
+    def add_scanned(self, path, children):
+        """Adds the children of a group that has not been scanned yet to the index. The children already in the index are kept as they are.
+        If the group has been loaded from the cache and not verified yet, its children are compared to the given ones and the index is corrected.
+
+        Parameters
+        ----------
+        path : str
+            The path of the group.
+        children : list of (str, IndexEntry)
+            The children of the group, as returned by read_children.
+
+        Returns
+        -------
+        bool
+            True if the group has been added or corrected, False if it was already scanned (or is unchanged) or is not in the index anymore.
+        """
+        if path not in self.entries:
+            return False
+        if path in self.unverified:
+            self.unverified.discard(path)
+            return self._verify(path, children)
+        if path not in self.unscanned:
+            return False
+        self.unscanned.discard(path)
+        added = []
+        for name, entry in children:
+            child_path = f"{path}/{name}"
+            if child_path in self.entries:
+                continue
+            self.entries[child_path] = entry
+            added.append(child_path)
+            if entry.kind is HDF5_group:
+                self.unscanned.add(child_path)
+        names = [name for name, _ in children]
+        # Keeps the children added to the index since the group was read
+        self.entries[path].children = names + [e for e in self.entries[path].children if e not in names]
+        self._notify([], added)
+        return True
+
+    def scan_group(self, path):
+        """Reads the children of a group from the file if they are not in the index yet.
+
+        Parameters
+        ----------
+        path : str
+            The path of the group.
+        """
+        if path not in self.unscanned:
+            return
+        with h5py.File(self.wrapper.filepath, 'r') as file:
+            children = self.read_children(file[path]) if path in file else []
+        self.add_scanned(path, children)
+
+    def _verify(self, path, children):
+        """Compares the children of a group loaded from the cache with the ones read from the file and corrects the index.
+
+        Returns
+        -------
+        bool
+            True if the index has been corrected.
+        """
+        changed = False
+        updated = []
+        names = [name for name, _ in children]
+        for name in self.entries[path].children:
+            if name not in names:
+                self._remove(f"{path}/{name}")
+                changed = True
+        for name, entry in children:
+            child_path = f"{path}/{name}"
+            old = self.entries.get(child_path)
+            if old is not None and old.kind is entry.kind:
+                if not self._same_entry(old, entry):
+                    old.brillouin_type, old.shape, old.dtype, old.attributes = entry.brillouin_type, entry.shape, entry.dtype, entry.attributes
+                    updated.append(child_path)
+                    changed = True
+                continue
+            if old is not None:
+                self._remove(child_path)
+            self.entries[child_path] = entry
+            updated.append(child_path)
+            if entry.kind is HDF5_group:
+                self.unscanned.add(child_path)
+            changed = True
+        self._notify(updated, updated)
+        changed = changed or self.entries[path].children != names
+        self.entries[path].children = names
+        return changed
+
+    @staticmethod
+    def _same_entry(entry, other):
+        # The attributes are compared as strings, some of them being stored as numpy arrays
+        return (entry.brillouin_type == other.brillouin_type and entry.shape == other.shape and entry.dtype == other.dtype and entry.link == other.link
+                and {k: str(v) for k, v in entry.attributes.items()} == {k: str(v) for k, v in other.attributes.items()})
+
+    def _load(self, path):
+        """Makes sure that an element is in the index by scanning its parents if needed.
+        """
+        if path in self.entries or not self.unscanned:
+            return
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            parent_path = "/".join(parts[:i])
+            if parent_path not in self.entries:
+                return
+            self.scan_group(parent_path)
+
+    def is_indexed(self, name):
+        """Returns True if the attribute of the given name is kept in the index.
+        """
+        return name in self.INDEXED_ATTRIBUTES or name.startswith(self.INDEXED_PREFIXES)
+
+    def _read_entry(self, element, link = None):
+        """Creates the entry of an opened h5py element.
+        """
+        attributes = {}
+        for name, value in element.attrs.items():
+            if self.is_indexed(name):
+                attributes[name] = value.decode() if isinstance(value, bytes) else value
+        if isinstance(element, h5py.Group):
+            return IndexEntry(HDF5_group, attributes.get("Brillouin_type"), attributes = attributes, link = link)
+        return IndexEntry(HDF5_dataset, attributes.get("Brillouin_type"), element.shape, element.dtype, attributes, link)
+
+    def _read_link(self, group, name, link):
+        """Creates the entry of an external link of an opened group. A link whose target cannot be opened (moved or deleted file) is kept as an empty group.
+        """
+        try:
+            return self._read_entry(group[name], (link.filename, link.path))
+        except (KeyError, OSError):
+            return IndexEntry(HDF5_group, "Root", link = (link.filename, link.path))
+
+    @staticmethod
+    def _link_target(file, path):
+        # The target of an element of an opened file if it is an external link, None otherwise
+        element_link = file.get(path, getlink = True)
+        if isinstance(element_link, h5py.ExternalLink):
+            return (element_link.filename, element_link.path)
+        return None
+
+    def _read_subtree(self, group, path, link = None):
+        """Reads the entries of a group and all its descendants with a single visit of the links of the group, and one more for each mounted file.
+
+        Parameters
+        ----------
+        group : h5py.Group or h5py.Dataset
+            The opened element at the top of the subtree.
+        path : str
+            The path of the element in the wrapper.
+        link : tuple, optional
+            The target of the element if it is an external link, see IndexEntry.
+
+        Returns
+        -------
+        dict
+            The entries of the subtree, with the paths as keys.
+        """
+        entries = {path: self._read_entry(group, link)}
+        links = []
+        if isinstance(group, h5py.Group):
+            # The external links (mounted files) are not followed by the visit, their subtrees are read afterwards
+            def visit(name, element_link):
+                if isinstance(element_link, h5py.HardLink):
+                    entries[f"{path}/{name}"] = self._read_entry(group[name])
+                elif isinstance(element_link, h5py.ExternalLink):
+                    entries[f"{path}/{name}"] = None
+                    links.append((name, element_link))
+            group.visititems_links(visit)
+
+        # The children lists are deduced from the paths, the visit going through the children of a group in the order of the file
+        for child_path in list(entries.keys())[1:]:
+            parent_path, name = child_path.rsplit("/", 1)
+            entries[parent_path].children.append(name)
+        for name, element_link in links:
+            target = (element_link.filename, element_link.path)
+            try:
+                entries.update(self._read_subtree(group[name], f"{path}/{name}", target))
+            except (KeyError, OSError):
+                entries[f"{path}/{name}"] = IndexEntry(HDF5_group, "Root", link = target)
+        return entries
+
+    ##########################
+    #   Incremental update   #
+    ##########################
+
+    def refresh(self, path):
+        """Reads again an element and all its descendants from the file. If the element does not exist anymore, it is removed from the index. Parents missing from the index are also added.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element to read again.
+        """
+        self.refresh_paths([path])
+
+    def refresh_paths(self, paths):
+        """Reads again several elements and all their descendants in a single opening of the file, see refresh.
+
+        Parameters
+        ----------
+        paths : list of str
+            The paths of the elements to read again. The paths whose parent is also in the list are read with their parent.
+        """
+        paths = set(paths)
+        paths = [path for path in paths if not any("/".join(path.split("/")[:i]) in paths for i in range(1, path.count("/") + 1))]
+        self.modified.update(paths)
+        for path in paths:
+            self._remove(path)
+        added = []
+        with h5py.File(self.wrapper.filepath, 'r') as file:
+            for path in paths:
+                if path not in file:
+                    continue
+                # Makes sure that all the parents of the element are in the index
+                parts = path.split("/")
+                for i in range(2, len(parts)):
+                    parent_path = "/".join(parts[:i])
+                    if parent_path not in self.entries:
+                        self.entries[parent_path] = self._read_entry(file[parent_path], self._link_target(file, parent_path))
+                        self.unscanned.add(parent_path)
+                        self._add_child(parent_path)
+                        added.append(parent_path)
+                link = self._link_target(file, path)
+                try:
+                    subtree = self._read_subtree(file[path], path, link)
+                except KeyError:
+                    # External link whose target cannot be opened
+                    subtree = {path: IndexEntry(HDF5_group, "Root", link = link)}
+                self.entries.update(subtree)
+                self._add_child(path)
+                added.extend(subtree)
+        self._notify([], added)
+
+    def remove(self, path):
+        """Removes an element and all its descendants from the index.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element to remove.
+        """
+        self.modified.add(path)
+        self._remove(path)
+
+    def _remove(self, path):
+        self._scan_parent(path)
+        removed = list(self.walk(path, scan = False))
+        for p in removed:
+            del self.entries[p]
+            self.unscanned.discard(p)
+            self.unverified.discard(p)
+        if "/" in path:
+            parent_path, name = path.rsplit("/", 1)
+            if parent_path in self.entries and name in self.entries[parent_path].children:
+                self.entries[parent_path].children.remove(name)
+        if removed:
+            self._notify(removed, [])
+
+    def rename(self, path, name):
+        """Updates the index after an element has been renamed.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element before it was renamed.
+        name : str
+            The new name of the element.
+        """
+        parent_path = "/".join(path.split("/")[:-1])
+        self._rekey(path, f"{parent_path}/{name}")
+
+    def move(self, path, new_parent):
+        """Updates the index after an element has been moved to a new group.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element before it was moved.
+        new_parent : str
+            The path of the group where the element has been moved.
+        """
+        if new_parent not in self.entries:
+            self.refresh(new_parent)
+        self._rekey(path, f"{new_parent}/{path.split('/')[-1]}")
+
+    def set_attribute(self, path, name, value):
+        """Updates an attribute of an element in the index. Attributes that are not indexed are ignored.
+
+        Parameters
+        ----------
+        path : str
+            The path of the element.
+        name : str
+            The name of the attribute.
+        value : str
+            The new value of the attribute.
+        """
+        self.modified.add(path)
+        if not self.is_indexed(name) or path not in self.entries:
+            return
+        entry = self.entries[path]
+        entry.attributes[name] = value
+        if name == "Brillouin_type":
+            entry.brillouin_type = value
+        self._notify([path], [path])
+
+    def mark_saved(self):
+        """Forgets the modified elements, after the file has been saved.
+
+        Returns
+        -------
+        list of str
+            The paths of the elements modified since the previous save, parents first.
+        """
+        modified, self.modified = self.modified, set()
+        return sorted(modified, key = lambda p: (p.count("/"), p))
+
+    def _notify(self, removed, added):
+        for listener in self.listeners:
+            listener(removed, added)
+
+    def _scan_parent(self, path):
+        # The parent of a modified element is scanned (and considered as verified) before the modification is applied, so that a batch of the structure scan read before the modification cannot be added to the index after it
+        if "/" in path:
+            parent_path = path.rsplit("/", 1)[0]
+            if parent_path in self.entries:
+                self.scan_group(parent_path)
+                self.unverified.discard(parent_path)
+
+    def _add_child(self, path):
+        parent_path, name = path.rsplit("/", 1)
+        if parent_path in self.entries and name not in self.entries[parent_path].children:
+            self.entries[parent_path].children.append(name)
+
+    def _rekey(self, path, new_path):
+        self.modified.update((path, new_path))
+        self._scan_parent(path)
+        self._scan_parent(new_path)
+        if path == new_path or path not in self.entries:
+            return
+        subtree = [(p, self.entries.pop(p)) for p in list(self.walk(path, scan = False))]
+        if "/" in path:
+            parent_path, name = path.rsplit("/", 1)
+            if parent_path in self.entries and name in self.entries[parent_path].children:
+                self.entries[parent_path].children.remove(name)
+        for p, entry in subtree:
+            self.entries[new_path + p[len(path):]] = entry
+            for pending in (self.unscanned, self.unverified):
+                if p in pending:
+                    pending.discard(p)
+                    pending.add(new_path + p[len(path):])
+        self._add_child(new_path)
+        self._notify([p for p, _ in subtree], [new_path + p[len(path):] for p, _ in subtree])
+
+    ##########################
+    #        Lookups         #
+    ##########################
+
+    def get_type(self, path = None, return_Brillouin_type = False):
+        """Returns the type of the element, see wrapper.Wrapper.get_type.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path to the element, by default None which means the root of the file ("Brillouin" group)
+        return_Brillouin_type : bool, optional
+            If True, the Brillouin type of the element is returned instead of its h5py type, by default False.
+
+        Returns
+        -------
+        type or str
+            The type of the element
+        """
+        if path is None: path = "Brillouin"
+        self._load(path)
+        entry = self.entries[path]
+        if return_Brillouin_type:
+            return entry.brillouin_type
+        return entry.kind
+
+    def get_children_elements(self, path = None, Brillouin_type = None):
+        """Returns the children elements of a given path, see wrapper.Wrapper.get_children_elements.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path to the element, by default None which means the root of the file ("Brillouin" group)
+        Brillouin_type : str, optional
+            The type of the element, by default None which means all the elements are returned
+
+        Returns
+        -------
+        list
+            The list of children elements
+        """
+        if path is None: path = "Brillouin"
+        self._load(path)
+        self.scan_group(path)
+        children = self.entries[path].children
+        if Brillouin_type is None:
+            return list(children)
+        return [e for e in children if self.entries[f"{path}/{e}"].brillouin_type == Brillouin_type]
+
+    def get_attribute(self, path, name, default = None, inherited = True):
+        """Returns the value of an indexed attribute of an element. As in the wrapper, attributes not defined on the element are inherited from its parents.
+
+        Parameters
+        ----------
+        path : str
+            The path to the element.
+        name : str
+            The name of the attribute, must be kept in the index (see is_indexed).
+        default : any, optional
+            The value returned if the attribute is not defined, by default None.
+        inherited : bool, optional
+            If False, only the attributes defined on the element itself are considered, by default True.
+
+        Returns
+        -------
+        any
+            The value of the attribute.
+        """
+        self._load(path)
+        while path:
+            entry = self.entries.get(path)
+            if entry is not None and name in entry.attributes:
+                return entry.attributes[name]
+            if not inherited:
+                break
+            path = path.rpartition("/")[0]
+        return default
+
+    def get_shape(self, path, squeeze = False):
+        """Returns the shape of a dataset without reading it.
+
+        Parameters
+        ----------
+        path : str
+            The path to the dataset.
+        squeeze : bool, optional
+            If True, the singleton dimensions are removed from the shape, by default False.
+
+        Returns
+        -------
+        tuple or None
+            The shape of the dataset, None if the element is a group.
+        """
+        self._load(path)
+        shape = self.entries[path].shape
+        if shape is not None and squeeze:
+            shape = tuple(s for s in shape if s > 1)
+        return shape
+
+    def get_mount(self, path):
+        """Returns the mounted file (external link) containing an element.
+
+        Parameters
+        ----------
+        path : str
+            The path to the element.
+
+        Returns
+        -------
+        str or None
+            The path of the external link containing the element (the element itself if it is a link), None if the element is stored in the file.
+        """
+        parts = path.split("/")
+        for i in range(2, len(parts) + 1):
+            entry = self.entries.get("/".join(parts[:i]))
+            if entry is not None and entry.link is not None:
+                return "/".join(parts[:i])
+        return None
+
+    def get_mounts(self, path = "Brillouin", scan = True):
+        """Returns the mounted files (external links) of a subtree. The content of the mounted files is not searched.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the element at the top of the subtree, by default the root of the file.
+        scan : bool, optional
+            If True (default), the groups that have not been scanned yet are read from the file. If False, only the elements already in the index are considered.
+
+        Returns
+        -------
+        list of str
+            The paths of the external links of the subtree.
+        """
+        if scan:
+            self._load(path)
+        mounts = []
+        stack = [path]
+        while stack:
+            p = stack.pop()
+            entry = self.entries.get(p)
+            if entry is None:
+                continue
+            if entry.link is not None:
+                mounts.append(p)
+                continue
+            if scan:
+                self.scan_group(p)
+            stack.extend(f"{p}/{e}" for e in reversed(entry.children))
+        return mounts
+
+    def get_virtual_datasets(self, paths):
+        """Returns the virtual datasets (see wrapperWriter.combine_virtual) mapping datasets of subtrees, which cannot be read anymore once these datasets are removed, renamed or moved. The virtual datasets inside the subtrees are left out.
+
+        Parameters
+        ----------
+        paths : list of str
+            The paths of the elements at the top of the subtrees.
+
+        Returns
+        -------
+        list of str
+            The paths of the virtual datasets.
+        """
+        def inside(path):
+            return any(path == p or path.startswith(p + "/") for p in paths)
+
+        virtual_datasets = []
+        for path in self.walk():
+            sources = self.entries[path].attributes.get(VIRTUAL_SOURCES)
+            if sources is None or inside(path):
+                continue
+            sources = [sources] if isinstance(sources, (str, bytes)) else list(sources)
+            if any(inside(source.decode() if isinstance(source, bytes) else str(source)) for source in sources):
+                virtual_datasets.append(path)
+        return virtual_datasets
+
+    def walk(self, path = "Brillouin", scan = True):
+        """Goes through an element and all its descendants.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the element at the top of the subtree, by default the root of the file.
+        scan : bool, optional
+            If True (default), the groups that have not been scanned yet are read from the file. If False, only the elements already in the index are given.
+
+        Yields
+        ------
+        str
+            The paths of the elements of the subtree, parents being given before their children.
+        """
+        if scan:
+            self._load(path)
+        if path not in self.entries:
+            return
+        stack = [path]
+        while stack:
+            p = stack.pop()
+            if scan:
+                self.scan_group(p)
+            yield p
+            stack.extend(f"{p}/{e}" for e in reversed(self.entries[p].children))
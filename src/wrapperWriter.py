@@ -0,0 +1,902 @@
+import os
+from contextlib import contextmanager
+import h5py
+import numpy as np
+
+from HDF5_BLS import WrapperError_ArgumentType, WrapperError_FileNotFound, WrapperError_Overwrite, WrapperError_StructureError
+from HDF5_BLS.wrapper import is_tempfile
+
+from sessionJournal import journal_operation
+from storagePolicy import PRESETS
+from streamedData import StreamedArray
+from wrapperIndex import VIRTUAL_SOURCES
+
+# Attributes written by HDF5 on the datasets linked by dimension scales (see BatchWriter._attach_scales)
+DIMENSION_SCALE_ATTRIBUTES = ("CLASS", "NAME", "REFERENCE_LIST", "DIMENSION_LIST", "DIMENSION_LABELS")
+
+class BatchWriter:
+    """Writes the dictionnaries of a bulk import in the file of a wrapper by batches.
+    Wrapper.add_dictionnary opens the file three or four times for each dictionnary, and the groups between the dropped directory and the files are created with one Wrapper.create_group call each. The batch writer writes a whole batch in a single opening of the file: the missing parent groups of the batch are created first in one pass, then the groups of the dictionnaries with their datasets and attributes, and the index is refreshed once for the batch.
+
+    A batch is written as a transaction: if one of its dictionnaries cannot be written, everything created by the batch is removed and the dictionnaries are written again one by one, so that only the faulty ones are reported. The dictionnaries whose group already exists in the file (or twice in the batch) are written after the batch with Wrapper.add_dictionnary, which handles the merge with the existing group, unless they are added with replace = True: their group is then written under a temporary name and swapped with the existing group once the whole batch has been written.
+
+    Parameters
+    ----------
+    wrapper : HDF5_BLS.wrapper.Wrapper
+        The wrapper to write in.
+    wrapper_index : wrapperIndex.WrapperIndex
+        The index of the wrapper, refreshed after each batch.
+    batch_size : int, optional
+        The number of dictionnaries written together, by default BATCH_SIZE.
+    policy : storagePolicy.StoragePolicy, optional
+        The policy choosing the chunks and the compression of the datasets, by default the "balanced" preset. The dictionnaries merged by the wrapper are written with the defaults of the wrapper.
+
+    Attributes
+    ----------
+    pending : list of tuple
+        The dictionnaries waiting to be written, as (key, dic, parent_group, name_group, replace) tuples.
+    warnings : list of (object, str)
+        The keys of the written dictionnaries with the attributes that could not be stored and were skipped, as Wrapper.add_dictionnary does. The list is filled by flush and emptied by the caller once the warnings are reported.
+    """
+    BATCH_SIZE = 64
+    # Size in bytes of the blocks of frames read from a StreamedArray and written at once
+    STREAM_BLOCK_SIZE = 64 * 1024 * 1024
+    # Suffix of the name of the groups written to replace an existing group
+    REPLACE_SUFFIX = ".replacing"
+    # Brillouin types of the datasets written from the source file, which are not kept when a modified source file replaces its group (the abscissas having the "Abscissa_" prefix)
+    IMPORTED_TYPES = ("Raw_data", "PSD", "Frequency")
+
+    def __init__(self, wrapper, wrapper_index, batch_size = None, policy = None):
+        self.wrapper = wrapper
+        self.wrapper_index = wrapper_index
+        self.batch_size = batch_size if batch_size is not None else self.BATCH_SIZE
+        self.warnings = []
+        self.policy = policy if policy is not None else PRESETS["balanced"]
+        self.pending = []
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, key, dic, parent_group, name_group, replace = False):
+        """Adds a dictionnary to the current batch, the batch being written if it is full.
+
+        Parameters
+        ----------
+        key : object
+            The identifier of the dictionnary in the results of flush (the path of the imported file for example).
+        dic : dict
+            The dictionnary to write, see Wrapper.add_dictionnary.
+        parent_group : str
+            The path of the parent group of the group of the dictionnary. The missing groups of the path are created with the "Root" Brillouin type.
+        name_group : str
+            The name of the group of the dictionnary.
+        replace : bool, optional
+            If True, an existing group of the same name is replaced by the group of the dictionnary (an updated source file for example). The children of the existing group that were not written from the source file (treatments, elements added by the user, see IMPORTED_TYPES) and its attributes that are not in the dictionnary are kept. Default is False.
+
+        Returns
+        -------
+        tuple
+            The results of flush if the batch has been written, ([], []) otherwise.
+        """
+        self.pending.append((key, dic, parent_group, name_group, replace))
+        if len(self.pending) >= self.batch_size:
+            return self.flush()
+        return [], []
+
+    def flush(self):
+        """Writes the current batch.
+
+        Returns
+        -------
+        written : list of (object, str)
+            The keys and the paths of the groups of the dictionnaries written.
+        failed : list of (object, str)
+            The keys of the dictionnaries that could not be written with the error message.
+        """
+        items, self.pending = self.pending, []
+        if not items:
+            return [], []
+        # The dictionnaries are recorded in the journal by the files they come from, which are read again if the import is replayed
+        with journal_operation(self.wrapper, "import_files", files = [{"source": key, "parent_group": parent_group, "name_group": name_group, "replace": replace} for key, _, parent_group, name_group, replace in items]):
+            return self._write_batch(items)
+
+    def _write_batch(self, items):
+        # Writes the dictionnaries of a batch, see flush
+        written, failed = [], []
+
+        # The dictionnaries whose group already exists are merged by the wrapper after the batch, unless they replace it
+        with h5py.File(self.wrapper.filepath, 'r') as file:
+            names = set()
+            batch, merged = [], []
+            for item in items:
+                path = f"{item[2]}/{item[3]}"
+                if path in names or (path in file and not item[4]):
+                    merged.append(item)
+                else:
+                    names.add(path)
+                    batch.append(item)
+
+        created = []
+        try:
+            created = self._transaction(batch)
+            written.extend((key, f"{parent_group}/{name_group}") for key, _, parent_group, name_group, _ in batch)
+        except Exception:
+            # The batch is written again dictionnary by dictionnary to find the faulty ones
+            for item in batch:
+                try:
+                    created.extend(self._transaction([item]))
+                    written.append((item[0], f"{item[2]}/{item[3]}"))
+                except Exception as e:
+                    failed.append((item[0], str(e)))
+
+        for key, dic, parent_group, name_group, _ in merged:
+            try:
+                self.wrapper.add_dictionnary(dic, parent_group = parent_group, name_group = name_group)
+                created.append(f"{parent_group}/{name_group}")
+                written.append((key, f"{parent_group}/{name_group}"))
+            except Exception as e:
+                failed.append((key, str(e)))
+
+        if created:
+            if is_tempfile(self.wrapper.filepath):
+                self.wrapper.save = True
+            self.wrapper_index.refresh_paths(created)
+        return written, failed
+
+    def _transaction(self, items):
+        """Writes dictionnaries in a single opening of the file and returns the paths of the elements created or replaced, nothing being kept in the file if one of the dictionnaries cannot be written.
+        """
+        if not items:
+            return []
+        created = []
+        replaced = []
+        skipped = []
+        with h5py.File(self.wrapper.filepath, 'a') as file:
+            try:
+                # Creating the missing parent groups, the shallowest first
+                parents = sorted({parent_group for _, _, parent_group, _, _ in items}, key = lambda p: p.count("/"))
+                for parent_group in parents:
+                    parts = parent_group.split("/")
+                    for i in range(1, len(parts) + 1):
+                        path = "/".join(parts[:i])
+                        if path not in file:
+                            group = file.create_group(path)
+                            group.attrs.create("Brillouin_type", "Root")
+                            created.append(path)
+                        elif not isinstance(file[path], h5py.Group):
+                            raise WrapperError_ArgumentType(f"The parent group '{path}' is a dataset.")
+                for key, dic, parent_group, name_group, _ in items:
+                    path = f"{parent_group}/{name_group}"
+                    if path in file:
+                        replaced.append(path)
+                        path += self.REPLACE_SUFFIX
+                    group = file.create_group(path)
+                    created.append(path)
+                    skipped.extend((key, warning) for warning in self._write_dictionnary(group, dic))
+            except Exception:
+                for path in reversed(created):
+                    if path in file:
+                        del file[path]
+                        self.wrapper.need_for_repack = True
+                raise
+
+            # The whole batch has been written, the replaced groups can be swapped
+            self.warnings.extend(skipped)
+            for path in replaced:
+                self._swap(file, path, path + self.REPLACE_SUFFIX)
+        return [path[:-len(self.REPLACE_SUFFIX)] if path.endswith(self.REPLACE_SUFFIX) else path for path in created]
+
+    def _swap(self, file, path, new_path):
+        # Replaces the group at path by the group at new_path, keeping the attributes of the old group that are not in the new one and the children that were not written from the source file (treatments and elements added by the user)
+        old_group, new_group = file[path], file[new_path]
+        for name in list(old_group.keys()):
+            if name in new_group:
+                continue
+            if isinstance(old_group.get(name, getlink = True), h5py.HardLink) and isinstance(old_group[name], h5py.Dataset):
+                brillouin_type = old_group[name].attrs.get("Brillouin_type", "")
+                brillouin_type = brillouin_type.decode() if isinstance(brillouin_type, bytes) else str(brillouin_type)
+                if brillouin_type in self.IMPORTED_TYPES or brillouin_type.startswith("Abscissa_"):
+                    continue
+            file.move(f"{path}/{name}", f"{new_path}/{name}")
+        for name, value in old_group.attrs.items():
+            if name not in new_group.attrs:
+                new_group.attrs.create(name, value)
+        # The replaced data stay in the file until it is repacked
+        del file[path]
+        self.wrapper.need_for_repack = True
+        file.move(new_path, path)
+
+    def _write_dictionnary(self, group, dic):
+        # Same layout as Wrapper.add_dictionnary for a new group, the attributes that cannot be stored being skipped. Returns the messages of the skipped attributes
+        group.attrs.create("Brillouin_type", "Measure")
+        abscissas, datasets = [], {}
+        skipped = []
+        for key, value in dic.items():
+            if type(value) is dict and "Abscissa_" in key:
+                if not list(value.keys()) == ["Name", "Data", "Unit", "Dim_start", "Dim_end"]:
+                    raise WrapperError_ArgumentType("The abscissa should be a dictionnary with the keys 'Name', 'Data', 'Unit', 'Dim_start' and 'Dim_end'.")
+                dataset = self._create_dataset(group, value["Name"], self._as_data(value["Data"]), "Abscissa")
+                dataset.attrs.create("Brillouin_type", "Abscissa_" + str(value["Dim_start"]) + "_" + str(value["Dim_end"]))
+                dataset.attrs.create("Unit", value["Unit"])
+                abscissas.append((dataset, value["Dim_start"], value["Dim_end"]))
+            elif type(value) is dict and key in self.wrapper.BRILLOUIN_TYPES_DATASETS:
+                dataset = self._create_dataset(group, value["Name"], self._as_data(value["Data"]), key)
+                dataset.attrs.create("Brillouin_type", key)
+                datasets[key] = dataset
+            elif key == "Attributes":
+                for k, v in value.items():
+                    if k in group.attrs:
+                        continue
+                    try:
+                        group.attrs.create(k, v)
+                    except Exception as e:
+                        skipped.append(f"the attribute '{k}' with value {v} could not be added: {e}")
+            else:
+                raise WrapperError_ArgumentType(f"The key '{key}' is not recognized.")
+        self._attach_scales(abscissas, datasets)
+        return skipped
+
+    def _attach_scales(self, abscissas, datasets):
+        """Attaches the abscissas of a group to its arrays as HDF5 dimension scales, so that the axes of a map stored as one N-D dataset are labelled and can be read by other HDF5 tools. Only the 1-D abscissas applying to a single dimension whose length they match are attached, and a 1-D frequency axis is attached to the last (spectral) dimension of the PSD.
+        """
+        scales = [(dataset, dim_start) for dataset, dim_start, dim_end in abscissas if dataset.ndim == 1 and int(dim_end) - int(dim_start) == 1]
+        frequency = datasets.get("Frequency")
+        for key in ("Raw_data", "PSD"):
+            data = datasets.get(key)
+            if data is None:
+                continue
+            for scale, dim in scales:
+                dim = int(dim)
+                if dim < data.ndim and data.shape[dim] == scale.shape[0]:
+                    self._attach_scale(data, dim, scale)
+            if key == "PSD" and frequency is not None and frequency.ndim == 1 and data.ndim > 0 and data.shape[-1] == frequency.shape[0]:
+                self._attach_scale(data, data.ndim - 1, frequency)
+
+    @staticmethod
+    def _attach_scale(data, dim, scale, label = None):
+        name = scale.name.split("/")[-1]
+        if not scale.is_scale:
+            scale.make_scale(name)
+        data.dims[dim].attach_scale(scale)
+        data.dims[dim].label = name if label is None else label
+
+    @staticmethod
+    def _as_data(data):
+        # The streamed arrays are read while they are written
+        return data if isinstance(data, StreamedArray) else np.array(data)
+
+    def _create_dataset(self, group, name, data, role):
+        options = self.policy.dataset_options(role, data.shape, data.dtype)
+        if not isinstance(data, StreamedArray):
+            return group.create_dataset(name, data = data, **options)
+        # The dataset is allocated with its final shape and filled block by block, so that only one block is in memory at a time. The blocks are made of whole chunks so that no compressed chunk is written twice
+        dataset = group.create_dataset(name, shape = data.shape, dtype = data.dtype, **options)
+        frame_size = max(data.nbytes // max(len(data), 1), 1)
+        n_frames = max(self.STREAM_BLOCK_SIZE // frame_size, 1)
+        if "chunks" in options:
+            n_frames = max(n_frames // options["chunks"][0], 1) * options["chunks"][0]
+        for start in range(0, len(data), n_frames):
+            stop = min(start + n_frames, len(data))
+            dataset[start:stop] = data.read(start, stop)
+        return dataset
+
+class SpectrumStacker:
+    """Writes the spectra of a bulk import of single-spectrum files in stacked datasets, in place of one group per file.
+    The spectra sharing a Brillouin type (raw data or PSD), a length, a type and a frequency axis are written as the rows of a single chunked dataset of shape (number of files, number of points), in a group named after the import. The files of each row are listed in a "Sources" dataset (of Brillouin type "Other") with their attributes: its "Columns" attribute gives the name of each column, the first one being the key of the file. The attributes shared by all the files are also written on the group, where they apply to the whole stack, and listed in the "Shared_columns" attribute of the "Sources" dataset so that only these are updated when files are added.
+
+    The spectra are written by batches, the stacked dataset being extended at each batch. A file added again (an updated source file) replaces its row. The dictionnaries that do not hold a single spectrum (maps, abscissas, several datasets, ...) are given to a BatchWriter and written in their own group.
+
+    Parameters
+    ----------
+    wrapper : HDF5_BLS.wrapper.Wrapper
+        The wrapper to write in.
+    wrapper_index : wrapperIndex.WrapperIndex
+        The index of the wrapper, refreshed after each batch.
+    parent_group : str
+        The path of the group where the stacks are created. The missing groups of the path are created with the "Root" Brillouin type.
+    name : str
+        The name of the group of the first stack, the other stacks being named after it with a number. An existing stack of the same name and spectra is extended.
+    batch_size : int, optional
+        The number of spectra written together, by default BATCH_SIZE.
+    policy : storagePolicy.StoragePolicy, optional
+        The policy choosing the chunks and the compression of the datasets, by default the "balanced" preset.
+
+    Attributes
+    ----------
+    pending : list of tuple
+        The spectra waiting to be written, as (key, signature, dic) tuples.
+    stacks : dict
+        The path of the group of each stack, by signature of its spectra (see _signature).
+    warnings : list of (object, str)
+        The warnings of the dictionnaries written in their own group, see BatchWriter.
+    """
+    BATCH_SIZE = 1024
+    # Name of the dataset listing the files of a stack and their attributes
+    SOURCES = "Sources"
+    # Attribute of the sources dataset listing the columns written on the group of the stack because all its files share their value
+    SHARED_COLUMNS = "Shared_columns"
+
+    def __init__(self, wrapper, wrapper_index, parent_group, name, batch_size = None, policy = None):
+        self.writer = BatchWriter(wrapper, wrapper_index, policy = policy)
+        self.warnings = self.writer.warnings
+        self.parent_group = parent_group
+        self.name = name
+        self.batch_size = batch_size if batch_size is not None else self.BATCH_SIZE
+        self.pending = []
+        self.stacks = {}
+
+    def __len__(self):
+        return len(self.pending) + len(self.writer)
+
+    def add(self, key, dic, parent_group, name_group, replace = False):
+        """Adds a dictionnary to the current batch, the batch being written if it is full. The arguments are the ones of BatchWriter.add, the group of the dictionnary being only used if it does not hold a single spectrum.
+
+        Returns
+        -------
+        tuple
+            The results of flush if the batch has been written, ([], []) otherwise.
+        """
+        signature = self._signature(dic)
+        if signature is None:
+            written, failed = self.writer.add(key, dic, parent_group, name_group, replace = replace)
+        else:
+            self.pending.append((key, signature, dic))
+            written, failed = [], []
+        if len(self.pending) >= self.batch_size:
+            more_written, more_failed = self.flush()
+            written, failed = written + more_written, failed + more_failed
+        return written, failed
+
+    def flush(self):
+        """Writes the current batch, see BatchWriter.flush.
+        """
+        files = [{"source": key, "parent_group": parent_group, "name_group": name_group, "replace": replace} for key, _, parent_group, name_group, replace in self.writer.pending]
+        files.extend({"source": key} for key, _, _ in self.pending)
+        if not files:
+            return [], []
+        with journal_operation(self.writer.wrapper, "import_files", files = files, stack = {"parent_group": self.parent_group, "name": self.name}):
+            return self._write_batch()
+
+    def _write_batch(self):
+        # Writes the dictionnaries of the writer and the spectra of the current batch, see flush
+        written, failed = self.writer.flush()
+        items, self.pending = self.pending, []
+        if not items:
+            return written, failed
+
+        by_signature = {}
+        for item in items:
+            by_signature.setdefault(item[1], []).append(item)
+        created = []
+        with h5py.File(self.writer.wrapper.filepath, 'a') as file:
+            for signature, stacked in by_signature.items():
+                try:
+                    path = self._write_stack(file, signature, stacked, created)
+                    written.extend((key, path) for key, _, _ in stacked)
+                except Exception as e:
+                    failed.extend((key, str(e)) for key, _, _ in stacked)
+
+        if created:
+            if is_tempfile(self.writer.wrapper.filepath):
+                self.writer.wrapper.save = True
+            self.writer.wrapper_index.refresh_paths(created)
+        return written, failed
+
+    def recorded_values(self, column):
+        """Returns the values of a column of the tables of the sources of the stacks of the import (the fingerprints of the files for example, see wrapperIndex.SOURCE_FINGERPRINT), by file. The stacks are the groups named after the import in the parent group, as found by _find_stack.
+
+        Parameters
+        ----------
+        column : str
+            The name of the column.
+
+        Returns
+        -------
+        dict
+            The value of the column for each file of the stacks, the files without a value being left out.
+        """
+        values = {}
+        with h5py.File(self.writer.wrapper.filepath, 'r') as file:
+            parent = file.get(self.parent_group)
+            if not isinstance(parent, h5py.Group):
+                return values
+            for name in parent:
+                if name != self.name and not (name.startswith(self.name + "_") and name[len(self.name) + 1:].isdigit()):
+                    continue
+                sources = parent[name].get(self.SOURCES) if isinstance(parent.get(name), h5py.Group) else None
+                if not isinstance(sources, h5py.Dataset):
+                    continue
+                columns = [str(c) for c in sources.attrs.get("Columns", [])]
+                if column not in columns:
+                    continue
+                index = columns.index(column)
+                for row in sources[...]:
+                    row = [value.decode() if isinstance(value, bytes) else str(value) for value in row]
+                    if row[index]:
+                        values[row[0]] = row[index]
+        return values
+
+    @staticmethod
+    def _signature(dic):
+        # Returns what the spectra of a stack share (Brillouin type, name, length and type of the spectrum, frequency axis), None if the dictionnary does not hold a single spectrum
+        roles = [key for key in dic if key != "Attributes"]
+        spectra = [key for key in roles if key in ("Raw_data", "PSD")]
+        if len(spectra) != 1 or any(key not in ("Raw_data", "PSD", "Frequency") for key in roles):
+            return None
+        role = spectra[0]
+        if type(dic[role]) is not dict or (("Frequency" in dic) and type(dic["Frequency"]) is not dict):
+            return None
+        data = np.asarray(dic[role]["Data"])
+        if data.ndim != 1 or data.dtype.kind not in "iuf" or len(data) == 0:
+            return None
+        frequency = None
+        if "Frequency" in dic:
+            frequency = np.asarray(dic["Frequency"]["Data"])
+            if frequency.shape != data.shape or frequency.dtype.kind not in "iuf":
+                return None
+            frequency = (dic["Frequency"]["Name"], frequency.dtype.str, frequency.tobytes())
+        return role, dic[role]["Name"], len(data), data.dtype.str, frequency
+
+    def _write_stack(self, file, signature, items, created):
+        # Writes the spectra of a signature in its stack, creating the stack if needed, and returns the path of its group. The rows added are removed if the spectra cannot be written
+        role, name, length, dtype, frequency = signature
+        path = self.stacks.get(signature)
+        if path is None:
+            path = self._find_stack(file, signature)
+            self.stacks[signature] = path
+        if path not in file:
+            parts = path.split("/")
+            for i in range(1, len(parts)):
+                parent = "/".join(parts[:i])
+                if parent not in file:
+                    file.create_group(parent).attrs.create("Brillouin_type", "Root")
+                    created.append(parent)
+            group = file.create_group(path)
+            created.append(path)
+            try:
+                group.attrs.create("Brillouin_type", "Measure")
+                options = self.writer.policy.dataset_options(role, (self.batch_size, length), dtype)
+                options.setdefault("chunks", True)
+                dataset = group.create_dataset(name, shape = (0, length), maxshape = (None, length), dtype = dtype, **options)
+                dataset.attrs.create("Brillouin_type", role)
+                if frequency is not None:
+                    frequency_name, frequency_dtype, frequency_data = frequency
+                    scale = group.create_dataset(frequency_name, data = np.frombuffer(frequency_data, dtype = frequency_dtype))
+                    scale.attrs.create("Brillouin_type", "Frequency")
+                    if role == "PSD":
+                        BatchWriter._attach_scale(dataset, 1, scale)
+                group.create_dataset(self.SOURCES, shape = (0, 1), maxshape = (None, None), dtype = h5py.string_dtype(), chunks = (self.batch_size, 8))
+                group[self.SOURCES].attrs.create("Brillouin_type", "Other")
+                group[self.SOURCES].attrs.create("Columns", ["File"])
+            except Exception:
+                del file[path]
+                created.remove(path)
+                raise
+        group = file[path]
+        dataset, sources = group[name], group[self.SOURCES]
+
+        # The rows of the files already in the stack are replaced, the other files are appended
+        columns = [str(column) for column in sources.attrs["Columns"]]
+        previous_columns = list(columns)
+        table = [[value.decode() if isinstance(value, bytes) else str(value) for value in row] for row in sources[...]]
+        rows = {row[0]: i for i, row in enumerate(table)}
+        n_rows = dataset.shape[0]
+        indices, new_keys = [], []
+        for key, _, _ in items:
+            key = str(key)
+            if key not in rows:
+                rows[key] = n_rows + len(new_keys)
+                new_keys.append(key)
+            indices.append(rows[key])
+        try:
+            dataset.resize(n_rows + len(new_keys), axis = 0)
+            for index, (_, _, dic) in zip(indices, items):
+                dataset[index] = np.asarray(dic[role]["Data"])
+
+            # The table of the sources is written again with the new columns
+            records = {row[0]: dict(zip(columns[1:], row[1:])) for row in table}
+            for key, _, dic in items:
+                records[str(key)] = {str(k): str(v) for k, v in dic.get("Attributes", {}).items()}
+            keys = sorted(rows, key = rows.get)
+            for record in records.values():
+                columns.extend(column for column in record if column not in columns)
+            sources.resize((len(keys), len(columns)))
+            sources[...] = np.array([[key] + [records[key].get(column, "") for column in columns[1:]] for key in keys], dtype = object).reshape(len(keys), len(columns))
+            sources.attrs["Columns"] = columns
+        except Exception:
+            dataset.resize(n_rows, axis = 0)
+            raise
+
+        # The attributes shared by all the files apply to the stack. Only the attributes written this way are updated or removed, the other attributes of the group (set by the user for example) are kept
+        shared = {str(column) for column in sources.attrs.get(self.SHARED_COLUMNS, [])}
+        for column in list(shared):
+            # A shared attribute whose value on the group is not the one of the files anymore has been modified by the user
+            value = group.attrs.get(column)
+            value = value.decode() if isinstance(value, bytes) else str(value)
+            previous = {row[previous_columns.index(column)] for row in table} if column in previous_columns else set()
+            if previous != {value}:
+                shared.discard(column)
+        for column in columns[1:]:
+            values = {records[key].get(column) for key in keys}
+            if len(values) == 1 and None not in values:
+                if column in shared or column not in group.attrs:
+                    group.attrs[column] = values.pop()
+                    shared.add(column)
+            elif column in shared:
+                if column in group.attrs:
+                    del group.attrs[column]
+                shared.discard(column)
+        sources.attrs.create(self.SHARED_COLUMNS, sorted(shared), dtype = h5py.string_dtype())
+        if path not in created:
+            created.append(path)
+        return path
+
+    def _find_stack(self, file, signature):
+        # Returns the path of the existing stack of the spectra of a signature, or of a new stack named after the import
+        role, name, length, dtype, frequency = signature
+        i = 1
+        while True:
+            path = f"{self.parent_group}/{self.name}" if i == 1 else f"{self.parent_group}/{self.name}_{i}"
+            i += 1
+            if path in self.stacks.values():
+                continue
+            group = file.get(path)
+            if group is None:
+                return path
+            if not isinstance(group, h5py.Group) or self.SOURCES not in group or not isinstance(group.get(name), h5py.Dataset):
+                continue
+            dataset = group[name]
+            if dataset.attrs.get("Brillouin_type") != role or dataset.shape[1:] != (length,) or dataset.dtype.str != dtype:
+                continue
+            if frequency is not None:
+                scale = group.get(frequency[0])
+                if not isinstance(scale, h5py.Dataset) or scale[...].astype(frequency[1]).tobytes() != frequency[2]:
+                    continue
+            return path
+
+# Suffix of the name of the groups written to replace a mounted file
+MATERIALIZE_SUFFIX = ".materializing"
+
+def mount_hdf5(wrapper, wrapper_index, filepaths, parent_group):
+    """Mounts HDF5 files in a group of the file of a wrapper, in place of the copy of Wrapper.add_hdf5.
+    Each file is added as an external link to its "Brillouin" group, named after the file as in Wrapper.add_hdf5: nothing is copied, the data stay in the mounted file and are read from it when the link is accessed. The mounted files are read-only in the interface (see WrapperIndex.get_mount) and their data can be copied in the file later with materialize. The links store the absolute path of the mounted files, which must therefore not be moved.
+
+    Parameters
+    ----------
+    wrapper : HDF5_BLS.wrapper.Wrapper
+        The wrapper to mount the files in.
+    wrapper_index : wrapperIndex.WrapperIndex
+        The index of the wrapper, refreshed once for all the files.
+    filepaths : list of str
+        The paths of the HDF5 files to mount.
+    parent_group : str
+        The group where the files are mounted. The missing groups of the path are created with the "Root" Brillouin type, and the parent group of a dataset is used instead of the dataset.
+
+    Returns
+    -------
+    mounted : list of (str, str)
+        The paths of the files mounted and of their links.
+    failed : list of (str, str)
+        The paths of the files that could not be mounted with the error message.
+    """
+    mounted, failed = [], []
+    created = []
+    with journal_operation(wrapper, "mount_hdf5", filepaths = filepaths, parent_group = parent_group), h5py.File(wrapper.filepath, 'a') as file:
+        parts = parent_group.split("/")
+        for i in range(1, len(parts) + 1):
+            path = "/".join(parts[:i])
+            if path not in file:
+                group = file.create_group(path)
+                group.attrs.create("Brillouin_type", "Root")
+                created.append(path)
+            elif not isinstance(file[path], h5py.Group):
+                parent_group = "/".join(parts[:i - 1])
+                break
+        group = file[parent_group]
+        for filepath in filepaths:
+            filepath = os.path.abspath(filepath)
+            name = os.path.basename(filepath).split(".")[0]
+            try:
+                if not os.path.isfile(filepath):
+                    raise WrapperError_FileNotFound(f"The file '{filepath}' does not exist.")
+                if os.path.samefile(filepath, wrapper.filepath):
+                    raise WrapperError_ArgumentType("A file cannot be mounted in itself.")
+                if name in group:
+                    raise WrapperError_Overwrite(f"A group with the name '{name}' already exists in the parent group '{parent_group}'.")
+                with h5py.File(filepath, 'r') as source:
+                    if not isinstance(source.get("Brillouin"), h5py.Group):
+                        raise WrapperError_StructureError(f"The file '{filepath}' has no 'Brillouin' group.")
+                group[name] = h5py.ExternalLink(filepath, "/Brillouin")
+                mounted.append((filepath, f"{parent_group}/{name}"))
+            except Exception as e:
+                failed.append((filepath, str(e)))
+
+    if mounted or created:
+        if is_tempfile(wrapper.filepath):
+            wrapper.save = True
+        wrapper_index.refresh_paths(created + [path for _, path in mounted])
+    return mounted, failed
+
+def materialize(wrapper, wrapper_index, paths):
+    """Copies the data of mounted files (see mount_hdf5) in the file of a wrapper, in place of their external links.
+    The datasets are copied with their chunks and filters, the external links of the mounted files themselves being kept as links. Each file is copied under a temporary name first, the link being replaced only once the copy is complete.
+
+    Parameters
+    ----------
+    wrapper : HDF5_BLS.wrapper.Wrapper
+        The wrapper whose mounted files are copied.
+    wrapper_index : wrapperIndex.WrapperIndex
+        The index of the wrapper, refreshed once for all the files.
+    paths : list of str
+        The paths of the external links to replace.
+
+    Returns
+    -------
+    materialized : list of str
+        The paths of the links replaced by the data.
+    failed : list of (str, str)
+        The paths of the links that could not be replaced with the error message.
+    """
+    materialized, failed = [], []
+    with journal_operation(wrapper, "materialize", paths = paths), h5py.File(wrapper.filepath, 'a') as file:
+        for path in paths:
+            temporary_path = path + MATERIALIZE_SUFFIX
+            try:
+                link = file.get(path, getlink = True)
+                if not isinstance(link, h5py.ExternalLink):
+                    raise WrapperError_ArgumentType(f"The element '{path}' is not a mounted file.")
+                # Relative links are resolved from the directory of the file, as HDF5 does
+                filepath = os.path.join(os.path.dirname(os.path.abspath(wrapper.filepath)), link.filename)
+                if not os.path.isfile(filepath):
+                    raise WrapperError_FileNotFound(f"The mounted file '{filepath}' does not exist.")
+                parent_group, name = path.rsplit("/", 1)
+                try:
+                    with h5py.File(filepath, 'r') as source:
+                        source.copy(source[link.path], file[parent_group], name + MATERIALIZE_SUFFIX)
+                        # The dimension scales copied from another file refer to the elements of this file
+                        attachments = scale_attachments(source, link.path)
+                    reattach_scales(file, attachments, link.path, temporary_path)
+                except Exception:
+                    if temporary_path in file:
+                        del file[temporary_path]
+                        wrapper.need_for_repack = True
+                    raise
+                del file[path]
+                file.move(temporary_path, path)
+                materialized.append(path)
+            except Exception as e:
+                failed.append((path, str(e)))
+
+    if materialized:
+        if is_tempfile(wrapper.filepath):
+            wrapper.save = True
+        wrapper_index.refresh_paths(materialized)
+    return materialized, failed
+
+def combine_virtual(wrapper, wrapper_index, datasets, parent_group, name):
+    """Combines datasets of the same shape into a virtual dataset, in place of the copy of Wrapper.combine_datasets.
+    The virtual dataset has the same layout as the dataset created by Wrapper.combine_datasets (the first dimension being the number of datasets) but maps onto the combined datasets, which are not copied: it is created instantly and uses no space, but the combined datasets must be kept at their paths, which are listed in the VIRTUAL_SOURCES attribute of the virtual dataset (see WrapperIndex.get_virtual_datasets). It can be turned into a regular dataset later with customWorkers.DatasetConsolidator.
+
+    Parameters
+    ----------
+    wrapper : HDF5_BLS.wrapper.Wrapper
+        The wrapper of the file.
+    wrapper_index : wrapperIndex.WrapperIndex
+        The index of the wrapper.
+    datasets : list of str
+        The paths of the datasets to combine, in the order of the first dimension of the virtual dataset.
+    parent_group : str
+        The path of the group of the virtual dataset.
+    name : str
+        The name of the virtual dataset, which is given the Brillouin type of the combined datasets.
+
+    Returns
+    -------
+    str
+        The path of the virtual dataset.
+    """
+    if not datasets:
+        raise WrapperError_ArgumentType("No dataset to combine.")
+    path = f"{parent_group}/{name}"
+    with journal_operation(wrapper, "combine_virtual", datasets = datasets, parent_group = parent_group, name = name), h5py.File(wrapper.filepath, 'a') as file:
+        if path in file:
+            raise WrapperError_Overwrite(f"A dataset with the name '{name}' already exists.")
+        sources = []
+        for dataset in datasets:
+            if not isinstance(file.get(dataset), h5py.Dataset):
+                raise WrapperError_ArgumentType(f"The datasets '{dataset}' are not datasets.")
+            sources.append(file[dataset])
+        if len({source.shape for source in sources}) > 1:
+            raise WrapperError_ArgumentType("The datasets have different shapes.")
+        shape = sources[0].shape
+        layout = h5py.VirtualLayout(shape = (len(sources),) + shape, dtype = np.result_type(*[source.dtype for source in sources]))
+        for i, source in enumerate(sources):
+            # The sources are in the same file ("."), so that the virtual dataset remains valid if the file is renamed or copied
+            layout[i] = h5py.VirtualSource(".", source.name, shape = shape, dtype = source.dtype)
+        dataset = file.require_group(parent_group).create_virtual_dataset(name, layout, fillvalue = np.nan if layout.dtype.kind == "f" else 0)
+        dataset.attrs.create("Brillouin_type", sources[0].attrs.get("Brillouin_type", "Other"))
+        dataset.attrs.create(VIRTUAL_SOURCES, [source.name.lstrip("/") for source in sources], dtype = h5py.string_dtype())
+
+    if is_tempfile(wrapper.filepath):
+        wrapper.save = True
+    wrapper_index.refresh(path)
+    return path
+
+def scale_attachments(file, path):
+    """Returns the dimension scales attached to the datasets of an element (the element itself and the datasets under it), by path, so that they can be attached again after the element has been moved or copied (see preserve_scales). The scales stored as HDF5 object references that cannot be resolved anymore are skipped.
+
+    Parameters
+    ----------
+    file : h5py.File
+        The opened file.
+    path : str
+        The path of the element.
+
+    Returns
+    -------
+    list of (str, int, str, str)
+        The path of each dataset, the dimension, the path of the scale and the label of the dimension.
+    """
+    element = file.get(path)
+    if element is None:
+        return []
+    datasets = [element] if isinstance(element, h5py.Dataset) else []
+    if isinstance(element, h5py.Group):
+        element.visititems(lambda name, obj: datasets.append(obj) if isinstance(obj, h5py.Dataset) else None)
+    attachments = []
+    for dataset in datasets:
+        if "DIMENSION_LIST" not in dataset.attrs:
+            continue
+        for i, dimension in enumerate(dataset.dims):
+            try:
+                scales = dimension.values()
+                label = dimension.label
+            except (RuntimeError, ValueError, KeyError):
+                continue
+            for scale in scales:
+                if scale is not None and scale.name is not None:
+                    attachments.append((dataset.name, i, scale.name, label))
+    return attachments
+
+def _prune_reference_list(file, scale):
+    # Removes from the list of the datasets using a scale the datasets that do not exist anymore
+    if "REFERENCE_LIST" not in scale.attrs:
+        return
+    entries = scale.attrs["REFERENCE_LIST"]
+    valid = []
+    for entry in entries:
+        try:
+            if file[entry[0]].name is not None:
+                valid.append(entry)
+        except (ValueError, KeyError, RuntimeError):
+            pass
+    if len(valid) == len(entries):
+        return
+    dtype = scale.attrs.get_id("REFERENCE_LIST").dtype
+    del scale.attrs["REFERENCE_LIST"]
+    if valid:
+        scale.attrs.create("REFERENCE_LIST", np.array(valid, dtype = dtype), dtype = dtype)
+
+def reattach_scales(file, attachments, path, new_path):
+    """Attaches again dimension scales read with scale_attachments after the element at path has been moved or copied to new_path, possibly from another file. The scale attributes of the datasets at the new path are removed and the scales are attached again by path, the scales under the element being replaced by their copies.
+
+    Parameters
+    ----------
+    file : h5py.File
+        The opened file where the element is now.
+    attachments : list of (str, int, str, str)
+        The scales of the element before the operation, see scale_attachments.
+    path : str
+        The path of the element before the operation.
+    new_path : str
+        The path of the element after the operation.
+    """
+    # The paths of h5py start with a "/", the ones of the wrapper do not
+    path, new_path = "/" + path.strip("/"), "/" + new_path.strip("/")
+
+    def moved(name):
+        if name == path or name.startswith(path + "/"):
+            return new_path + name[len(path):]
+        return name
+
+    element = file.get(new_path)
+    if element is None:
+        return
+    elements = [element] if isinstance(element, h5py.Dataset) else []
+    if isinstance(element, h5py.Group):
+        element.visititems(lambda name, obj: elements.append(obj) if isinstance(obj, h5py.Dataset) else None)
+    for dataset in elements:
+        for name in DIMENSION_SCALE_ATTRIBUTES:
+            if name in dataset.attrs:
+                del dataset.attrs[name]
+    for dataset_path, dim, scale_path, label in attachments:
+        dataset, scale = file.get(moved(dataset_path)), file.get(moved(scale_path))
+        if not isinstance(dataset, h5py.Dataset) or not isinstance(scale, h5py.Dataset) or dim >= dataset.ndim:
+            continue
+        _prune_reference_list(file, scale)
+        BatchWriter._attach_scale(dataset, dim, scale, label or None)
+
+@contextmanager
+def preserve_scales(wrapper, path, new_path, source = None, target = None):
+    """Attaches again the dimension scales of the datasets of an element after an operation of the wrapper moving or copying it to a new path (Wrapper.move, Wrapper.change_name, Wrapper.copy_dataset, Wrapper.add_hdf5, Wrapper.export_group).
+    The scales are stored as HDF5 object references, which these operations do not update: the copied datasets keep references to the original scales, which are dangling once the originals are deleted or in another file. The scales attached before the operation are read by path and attached again once it is done (see reattach_scales).
+
+    Parameters
+    ----------
+    wrapper : HDF5_BLS.wrapper.Wrapper
+        The wrapper of the operation.
+    path : str
+        The path of the element before the operation.
+    new_path : str
+        The path of the element after the operation.
+    source : str, optional
+        The file of the element before the operation, by default the file of the wrapper.
+    target : str, optional
+        The file of the element after the operation, by default the file of the wrapper.
+    """
+    with h5py.File(source or wrapper.filepath, 'r') as file:
+        attachments = scale_attachments(file, path)
+    yield
+    with h5py.File(target or wrapper.filepath, 'a') as file:
+        reattach_scales(file, attachments, path, new_path)
+
+def is_virtual(wrapper, path):
+    """Returns True if the element at the given path is a virtual dataset (see combine_virtual).
+    """
+    with h5py.File(wrapper.filepath, 'r') as file:
+        element = file.get(path)
+        return isinstance(element, h5py.Dataset) and element.is_virtual
+
+def sync_file(filepath):
+    """Makes sure that the modifications of a file are written on the disk, the operating system keeping the written blocks in memory for a while after h5py has closed the file. Only the blocks modified since the last synchronization are written.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file.
+    """
+    with open(filepath, 'r+b') as file:
+        os.fsync(file.fileno())
+
+# Estimated size in bytes of the metadata of each element of a file (object header, link and attributes) and of each chunk of a dataset (entry of the chunk index), see estimate_wasted_space
+METADATA_PER_ELEMENT = 2048
+METADATA_PER_CHUNK = 64
+# A repack is worthwhile when it frees at least REPACK_MIN_WASTED bytes and REPACK_MIN_RATIO of the file, see is_repack_worthwhile
+REPACK_MIN_WASTED = 16 * 1024 * 1024
+REPACK_MIN_RATIO = 0.1
+
+def estimate_wasted_space(filepath):
+    """Estimates the space of a file that is not used by its elements, for example the space of the removed elements, which HDF5 does not give back. This space is freed by repacking the file.
+    The used space is the space allocated to the data of the datasets plus an estimate of the metadata of the elements (METADATA_PER_ELEMENT and METADATA_PER_CHUNK), slightly larger than the actual metadata so that the wasted space is not overestimated. The elements of the mounted files (external links) are not counted.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file.
+
+    Returns
+    -------
+    size : int
+        The size of the file in bytes.
+    wasted : int
+        The estimated number of bytes that are not used.
+    """
+    size = os.path.getsize(filepath)
+    used = METADATA_PER_ELEMENT
+    with h5py.File(filepath, 'r') as file:
+        def visit(name, link):
+            nonlocal used
+            used += METADATA_PER_ELEMENT
+            if isinstance(link, h5py.HardLink):
+                element = file[name]
+                if isinstance(element, h5py.Dataset) and not element.is_virtual:
+                    used += element.id.get_storage_size()
+                    if element.chunks is not None:
+                        used += element.id.get_num_chunks() * METADATA_PER_CHUNK
+        file.visititems_links(visit)
+    return size, max(size - used, 0)
+
+def is_repack_worthwhile(size, wasted):
+    """Returns True if repacking a file frees enough space to be worth the copy of the file, from the results of estimate_wasted_space.
+    """
+    return wasted >= REPACK_MIN_WASTED and wasted >= REPACK_MIN_RATIO * size